@@ -10,24 +10,73 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform, EVENT_HOMEASSISTANT_STARTED
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .api import configure_base_urls, configure_rate_limits
+from .const import (
+    CONF_RATE_BURST,
+    CONF_RATE_LIMIT,
+    CONF_REALTIME_BASE_URL,
+    CONF_RESROBOT_BASE_URL,
+    DEFAULT_RATE_BURST,
+    DEFAULT_RATE_LIMIT,
+    DOMAIN,
+)
 from .coordinator import TrafikLabCoordinator
+from .quota import async_get_quota_planner
+from .scheduler import async_get_poll_scheduler
+from .snapshot import async_get_snapshot_store
 from .services_setup import async_setup_services, async_remove_services
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON]
 
 _LOGGER = logging.getLogger(__name__)
 
-# Allow an (optional) empty YAML stub `trafiklab:` so the integration loads at
+# Allow an (optional) YAML stub `trafiklab:` so the integration loads at
 # startup and registers its services even before any config entry is created.
 # Users who only want to use the stop_lookup service can add this stub.
-CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({}, extra=vol.PREVENT_EXTRA)}, extra=vol.ALLOW_EXTRA)
+# The stub may also tune the request budget shared per API key by all entries
+# and services.
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Any(
+            None,
+            vol.Schema(
+                {
+                    vol.Optional(CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT): vol.All(
+                        vol.Coerce(float), vol.Range(min=1)
+                    ),
+                    vol.Optional(CONF_RATE_BURST, default=DEFAULT_RATE_BURST): vol.All(
+                        vol.Coerce(int), vol.Range(min=1)
+                    ),
+                    # For testing against a stand-in server only
+                    vol.Optional(CONF_REALTIME_BASE_URL): cv.url,
+                    vol.Optional(CONF_RESROBOT_BASE_URL): cv.url,
+                },
+                extra=vol.PREVENT_EXTRA,
+            ),
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up Trafiklab at Home Assistant start (register services)."""
     # Ensure services are available even before any config entry is created.
     _LOGGER.info("[Trafiklab] async_setup called - registering services early")
+    conf = config.get(DOMAIN) or {}
+    configure_rate_limits(
+        conf.get(CONF_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+        conf.get(CONF_RATE_BURST, DEFAULT_RATE_BURST),
+    )
+    configure_base_urls(
+        conf.get(CONF_REALTIME_BASE_URL), conf.get(CONF_RESROBOT_BASE_URL)
+    )
+    if CONF_REALTIME_BASE_URL in conf or CONF_RESROBOT_BASE_URL in conf:
+        _LOGGER.warning(
+            "[Trafiklab] Using overridden API base URLs: %s, %s",
+            conf.get(CONF_REALTIME_BASE_URL, "(default)"),
+            conf.get(CONF_RESROBOT_BASE_URL, "(default)"),
+        )
     async_setup_services(hass)
     
     # Fallback: ensure services registered once HA fully started
@@ -43,6 +92,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Trafiklab from a config entry."""
     _LOGGER.info("[Trafiklab] Setting up config entry %s", entry.entry_id)
     coordinator = TrafikLabCoordinator(hass, entry)
+    # Show the data saved before the restart until the first refresh
+    restored_recent = await coordinator.async_restore_snapshot()
+    # Pace the entry to its key's monthly quota, together with the others
+    planner = await async_get_quota_planner(hass)
+    entry.async_on_unload(planner.async_register(coordinator))
     
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -53,10 +107,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Schedule initial data fetch without blocking setup
-    hass.async_create_task(
-        coordinator.async_config_entry_first_refresh()
-    )
+    # Schedule initial data fetch without blocking setup; entries set up
+    # together get spaced-out start slots instead of refreshing at once. A
+    # recent snapshot is shown meanwhile, and then the first refresh simply
+    # waits for the entry's normal slot.
+    if not restored_recent:
+        async_get_poll_scheduler(hass).async_schedule_first_refresh(entry, coordinator)
 
     # Listen for options updates
     entry.async_on_unload(entry.add_update_listener(_update_listener))
@@ -153,6 +209,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the saved snapshot of a removed entry."""
+    (await async_get_snapshot_store(hass)).async_remove(entry.entry_id)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -3,9 +3,24 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
 from typing import Any
+from urllib.parse import urlsplit
 
 import aiohttp
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    from homeassistant.util.json import json_loads as _json_loads
 
 from .const import (
     API_BASE_URL,
@@ -15,6 +30,9 @@ from .const import (
     RESROBOT_BASE_URL,
     RESROBOT_TRAVEL_SEARCH_ENDPOINT,
     RESROBOT_LOCATION_ENDPOINT,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_BURST,
+    DOMAIN,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -33,10 +51,13 @@ class TrafikLabApiError(Exception):
         *,
         error_code: str | None = None,
         http_status: int | None = None,
+        retry_after: float | None = None,
     ) -> None:
         super().__init__(message)
         self.error_code = error_code
         self.http_status = http_status
+        # Seconds the server asked us to wait (Retry-After header), if any
+        self.retry_after = retry_after
 
 
 class TrafikLabAuthError(TrafikLabApiError):
@@ -55,6 +76,10 @@ class TrafikLabServerError(TrafikLabApiError):
     """Raised when the API returns a server-side error (5xx)."""
 
 
+class TrafikLabUnavailableError(TrafikLabApiError):
+    """Raised without a request while the circuit breaker for a host is open."""
+
+
 # ---------------------------------------------------------------------------
 # Private error-parsing helpers
 # ---------------------------------------------------------------------------
@@ -138,12 +163,953 @@ def _raise_resrobot_error(
     raise TrafikLabApiError(message, error_code=error_code or None, http_status=status)
 
 
+def _decode_json(body: bytes) -> Any:
+    """Decode a response body; an empty body decodes to None.
+
+    Raises ValueError on malformed JSON.
+    """
+    if not body.strip():
+        return None
+    return _json_loads(body)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+# Endpoint families. Used to pick per-endpoint cache TTLs.
+ENDPOINT_DEPARTURES = "departures"
+ENDPOINT_ARRIVALS = "arrivals"
+ENDPOINT_STOP_LOOKUP = "stop_lookup"
+ENDPOINT_RESROBOT_TRIP = "resrobot_trip"
+ENDPOINT_RESROBOT_LOCATION = "resrobot_location"
+
+# Seconds a successful response may be served from the cache. Realtime boards
+# stay well below MINIMUM_SCAN_INTERVAL so an entry never gets its own previous
+# poll back; they only absorb near-simultaneous reads (other entries on the
+# same stop, platform enrichment, diagnostics, config flow validation). Stop
+# searches change rarely and are cached for much longer. A TTL of 0 disables
+# caching for that family.
+DEFAULT_CACHE_TTLS: dict[str, float] = {
+    ENDPOINT_DEPARTURES: 20,
+    ENDPOINT_ARRIVALS: 20,
+    ENDPOINT_STOP_LOOKUP: 3600,
+    ENDPOINT_RESROBOT_TRIP: 30,
+    ENDPOINT_RESROBOT_LOCATION: 3600,
+}
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+
+class ResponseCache:
+    """In-memory TTL cache for decoded API responses with LRU eviction.
+
+    Cached objects are handed out as-is; callers must treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttls: dict[str, float] = {**DEFAULT_CACHE_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def enabled_for(self, family: str) -> bool:
+        """Return True when responses of *family* are cached."""
+        return self.ttls.get(family, 0) > 0
+
+    def get(self, key: tuple) -> Any | None:
+        """Return the cached value for *key*, or None when absent or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, family: str, key: tuple, value: Any) -> None:
+        """Store *value* under *key* using the TTL configured for *family*."""
+        ttl = self.ttls.get(family, 0)
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters for diagnostics."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttls": dict(self.ttls),
+        }
+
+
+# Shared by all clients so every entry, service and flow benefits from it.
+_RESPONSE_CACHE = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    return _RESPONSE_CACHE
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+
+class RateLimiter:
+    """Token-bucket rate limiter where callers wait for a slot instead of failing.
+
+    Implemented in its GCRA form: every caller reserves the next free slot at
+    call time and sleeps until it comes up, so waiters are served strictly in
+    arrival order. Up to ``burst`` requests may go out back-to-back; after that
+    requests are paced at ``rate`` per minute. A reservation abandoned by a
+    cancelled caller is not handed back, which errs on the side of the quota.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE_LIMIT, burst: int = DEFAULT_RATE_BURST) -> None:
+        self.configure(rate, burst)
+        # Theoretical arrival time of the next request (monotonic clock)
+        self._tat = 0.0
+        self.requests = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+
+    def configure(self, rate: float, burst: int) -> None:
+        """Change the rate (requests per minute) and burst size."""
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._interval = 60.0 / self.rate
+
+    def reserve(self) -> float:
+        """Reserve the next slot and return how many seconds to wait for it."""
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        delay = max(0.0, tat - (self.burst - 1) * self._interval - now)
+        self._tat = tat + self._interval
+        self.requests += 1
+        if delay > 0:
+            self.delayed += 1
+            self.total_wait += delay
+        return delay
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the time spent waiting in seconds."""
+        delay = self.reserve()
+        if delay > 0:
+            _LOGGER.debug("Rate limit reached; waiting %.1f s for a request slot", delay)
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self) -> dict[str, Any]:
+        """Return configuration and counters for diagnostics."""
+        return {
+            "rate_per_minute": self.rate,
+            "burst": self.burst,
+            "requests": self.requests,
+            "delayed_requests": self.delayed,
+            "total_wait_seconds": round(self.total_wait, 2),
+            "queued_seconds": round(max(0.0, self._tat - time.monotonic()), 2),
+        }
+
+
+# One limiter per API key, shared by every client in the process. Trafiklab
+# enforces its limits per key, so entries and service calls using the same key
+# draw from the same budget.
+_RATE_LIMITERS: dict[str, RateLimiter] = {}
+_rate_limit_defaults: dict[str, float] = {
+    "rate": DEFAULT_RATE_LIMIT,
+    "burst": DEFAULT_RATE_BURST,
+}
+
+
+# Per-key rates (requests per minute) that take precedence over the defaults
+_KEY_RATE_LIMITS: dict[str, float] = {}
+
+
+def get_rate_limiter(api_key: str) -> RateLimiter:
+    """Return the shared rate limiter for *api_key*, creating it on first use."""
+    limiter = _RATE_LIMITERS.get(api_key)
+    if limiter is None:
+        limiter = RateLimiter(
+            _KEY_RATE_LIMITS.get(api_key, _rate_limit_defaults["rate"]),
+            int(_rate_limit_defaults["burst"]),
+        )
+        _RATE_LIMITERS[api_key] = limiter
+    return limiter
+
+
+def configure_rate_limits(rate: float, burst: int) -> None:
+    """Set the rate (per minute) and burst used for every API key."""
+    _rate_limit_defaults["rate"] = rate
+    _rate_limit_defaults["burst"] = burst
+    for api_key, limiter in _RATE_LIMITERS.items():
+        limiter.configure(_KEY_RATE_LIMITS.get(api_key, rate), burst)
+
+
+def configure_key_rate_limit(api_key: str, rate: float | None) -> None:
+    """Set the per-minute quota of one API key; None restores the default rate."""
+    if rate is None:
+        _KEY_RATE_LIMITS.pop(api_key, None)
+    else:
+        _KEY_RATE_LIMITS[api_key] = float(rate)
+    if api_key in _RATE_LIMITERS:
+        _RATE_LIMITERS[api_key].configure(
+            _KEY_RATE_LIMITS.get(api_key, _rate_limit_defaults["rate"]),
+            int(_rate_limit_defaults["burst"]),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Retries
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How transient failures of one endpoint family are retried.
+
+    Server errors (5xx), timeouts and connection errors are retried up to
+    ``max_attempts`` in total, sleeping with decorrelated jitter between
+    ``base_delay`` and ``max_delay``. A 429 is only retried when the server
+    sends Retry-After; a longer Retry-After also stretches the backoff of a
+    5xx. No retry is started that would end past ``deadline`` seconds from
+    the first attempt, which also caps each attempt's timeout.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 8.0
+    deadline: float = 30.0
+
+    def next_delay(self, previous: float) -> float:
+        """Return the next backoff delay given the previous one (0 on the first retry)."""
+        upper = max(self.base_delay, previous * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+
+# Realtime boards are polled; a couple of quick retries beat waiting a whole
+# refresh interval. Stop searches are interactive (config flow, services), so
+# they give up sooner.
+DEFAULT_RETRY_POLICIES: dict[str, RetryPolicy] = {
+    ENDPOINT_DEPARTURES: RetryPolicy(),
+    ENDPOINT_ARRIVALS: RetryPolicy(),
+    ENDPOINT_STOP_LOOKUP: RetryPolicy(max_attempts=2, deadline=20.0),
+    ENDPOINT_RESROBOT_TRIP: RetryPolicy(),
+    ENDPOINT_RESROBOT_LOCATION: RetryPolicy(max_attempts=2, deadline=20.0),
+}
+
+
+def is_host_failure(err: TrafikLabApiError) -> bool:
+    """Return True when *err* suggests the host itself is unhealthy."""
+    if isinstance(err, TrafikLabServerError):
+        return True
+    return isinstance(err.__cause__, (asyncio.TimeoutError, aiohttp.ClientError))
+
+
+def _is_transient(err: TrafikLabApiError) -> bool:
+    """Return True for failures that may succeed when simply tried again."""
+    if isinstance(err, TrafikLabQuotaError):
+        return err.retry_after is not None
+    return is_host_failure(err)
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 60.0
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream host is down.
+
+    After ``failure_threshold`` consecutive host failures (5xx, timeouts,
+    connection errors) the circuit opens and requests raise
+    TrafikLabUnavailableError without touching the network. Once
+    ``recovery_timeout`` seconds have passed the circuit goes half-open and
+    lets a single probe request through: success closes it, failure opens it
+    for another period. Any HTTP response that is not a server error (even a
+    4xx) shows the host is up and counts as a success.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+    ) -> None:
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def before_request(self) -> None:
+        """Raise TrafikLabUnavailableError unless a request may go out now."""
+        if self.state == CIRCUIT_CLOSED:
+            return
+        if self.state == CIRCUIT_OPEN:
+            remaining = self.recovery_timeout - (time.monotonic() - (self.opened_at or 0.0))
+            if remaining > 0:
+                self._reject(remaining)
+            _LOGGER.debug("Circuit for %s half-open; sending probe request", self.host)
+            self.state = CIRCUIT_HALF_OPEN
+        if self._probe_in_flight:
+            self._reject(None)
+        self._probe_in_flight = True
+
+    def _reject(self, retry_after: float | None) -> None:
+        self.rejected += 1
+        raise TrafikLabUnavailableError(
+            f"{self.host} is unavailable (circuit {self.state})",
+            error_code="circuit_open",
+            retry_after=retry_after,
+        )
+
+    def record_success(self) -> None:
+        """Close the circuit after the host answered."""
+        if self.state != CIRCUIT_CLOSED:
+            _LOGGER.info("Circuit for %s closed; host is responding again", self.host)
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a host failure, opening the circuit when the threshold is hit."""
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != CIRCUIT_OPEN:
+                _LOGGER.warning(
+                    "Circuit for %s opened after %d failures; pausing requests for %.0f s",
+                    self.host, self.failures, self.recovery_timeout,
+                )
+            self.state = CIRCUIT_OPEN
+            self.opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """Give up a half-open probe that ended without an answer (cancelled)."""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict[str, Any]:
+        """Return state and counters for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected_requests": self.rejected,
+            "seconds_open": (
+                round(time.monotonic() - self.opened_at, 1) if self.opened_at else None
+            ),
+        }
+
+
+# One breaker per upstream host (realtime-api.trafiklab.se, api.resrobot.se),
+# shared by every client in the process.
+_CIRCUIT_BREAKERS: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Return the shared circuit breaker for *host*, creating it on first use."""
+    breaker = _CIRCUIT_BREAKERS.get(host)
+    if breaker is None:
+        breaker = _CIRCUIT_BREAKERS[host] = CircuitBreaker(host)
+    return breaker
+
+
+def circuit_breaker_states() -> dict[str, dict[str, Any]]:
+    """Return stats for every host a request has been made to."""
+    return {host: breaker.stats() for host, breaker in _CIRCUIT_BREAKERS.items()}
+
+
+# ---------------------------------------------------------------------------
+# Request instrumentation
+# ---------------------------------------------------------------------------
+
+@dataclass
+class RequestInfo:
+    """What is known about one HTTP attempt, handed to request hooks.
+
+    Times are in seconds. ``queue_wait`` is the time spent waiting for the
+    rate limiter; ``dns_time`` and ``connect_time`` (which includes DNS) are
+    only filled in on sessions created by async_get_api_session, and are 0
+    when a pooled connection was reused.
+    """
+
+    family: str
+    url: str
+    attempt: int = 1
+    status: int | None = None
+    bytes_received: int | None = None
+    queue_wait: float = 0.0
+    dns_time: float | None = None
+    connect_time: float | None = None
+    decode_time: float | None = None
+    elapsed: float | None = None
+    # Key the request is made with; hooks use it to count per-key usage
+    api_key: str = field(default="", repr=False)
+    _marks: dict[str, float] = field(default_factory=dict, repr=False)
+
+
+class RequestHook:
+    """Base class for request lifecycle hooks; override what you need.
+
+    ``on_request_start`` runs right before a request is sent (after any rate
+    limiter wait), ``on_response`` once a response body has been read and
+    decoded (whatever its status) and ``on_error`` for every failed attempt.
+    Hooks run on the event loop and must not block; exceptions they raise
+    are logged and otherwise ignored.
+    """
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        """Handle a request about to be sent."""
+
+    def on_response(self, info: RequestInfo) -> None:
+        """Handle a received and decoded response."""
+
+    def on_error(self, info: RequestInfo, err: TrafikLabApiError) -> None:
+        """Handle a failed attempt."""
+
+
+class RequestStatsRecorder(RequestHook):
+    """Aggregate per-endpoint-family request counters for diagnostics."""
+
+    _TIMINGS = ("elapsed", "queue_wait", "connect_time", "decode_time")
+
+    def __init__(self) -> None:
+        self._families: dict[str, dict[str, Any]] = {}
+
+    def _family(self, family: str) -> dict[str, Any]:
+        stats = self._families.get(family)
+        if stats is None:
+            stats = self._families[family] = {
+                "requests": 0,
+                "responses": 0,
+                "errors": 0,
+                "status_counts": {},
+                "error_types": {},
+                "bytes_total": 0,
+                "bytes_max": 0,
+                **{f"{name}_total": 0.0 for name in self._TIMINGS},
+                **{f"{name}_count": 0 for name in self._TIMINGS},
+                **{f"{name}_max": 0.0 for name in self._TIMINGS},
+            }
+        return stats
+
+    def _add_timing(self, stats: dict[str, Any], name: str, value: float | None) -> None:
+        if value is None:
+            return
+        stats[f"{name}_total"] += value
+        stats[f"{name}_count"] += 1
+        stats[f"{name}_max"] = max(stats[f"{name}_max"], value)
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        stats = self._family(info.family)
+        stats["requests"] += 1
+        self._add_timing(stats, "queue_wait", info.queue_wait)
+
+    def on_response(self, info: RequestInfo) -> None:
+        stats = self._family(info.family)
+        stats["responses"] += 1
+        status = str(info.status)
+        stats["status_counts"][status] = stats["status_counts"].get(status, 0) + 1
+        size = info.bytes_received or 0
+        stats["bytes_total"] += size
+        stats["bytes_max"] = max(stats["bytes_max"], size)
+        self._add_timing(stats, "elapsed", info.elapsed)
+        self._add_timing(stats, "connect_time", info.connect_time)
+        self._add_timing(stats, "decode_time", info.decode_time)
+
+    def on_error(self, info: RequestInfo, err: TrafikLabApiError) -> None:
+        stats = self._family(info.family)
+        stats["errors"] += 1
+        kind = type(err).__name__
+        stats["error_types"][kind] = stats["error_types"].get(kind, 0) + 1
+
+    def clear(self) -> None:
+        """Reset all counters."""
+        self._families.clear()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return per-family summaries (averages in milliseconds)."""
+        out: dict[str, dict[str, Any]] = {}
+        for family, stats in self._families.items():
+            summary: dict[str, Any] = {
+                "requests": stats["requests"],
+                "responses": stats["responses"],
+                "errors": stats["errors"],
+                "status_counts": dict(stats["status_counts"]),
+                "error_types": dict(stats["error_types"]),
+                "avg_bytes": (
+                    round(stats["bytes_total"] / stats["responses"]) if stats["responses"] else None
+                ),
+                "max_bytes": stats["bytes_max"],
+            }
+            for name in self._TIMINGS:
+                count = stats[f"{name}_count"]
+                summary[f"avg_{name}_ms"] = (
+                    round(stats[f"{name}_total"] / count * 1000, 1) if count else None
+                )
+                summary[f"max_{name}_ms"] = round(stats[f"{name}_max"] * 1000, 1) if count else None
+            out[family] = summary
+        return out
+
+
+# Hooks applied to every client in the process, in registration order. The
+# stats recorder feeding diagnostics is always installed.
+_REQUEST_STATS = RequestStatsRecorder()
+_REQUEST_HOOKS: list[RequestHook] = [_REQUEST_STATS]
+
+
+def register_request_hook(hook: RequestHook) -> Callable[[], None]:
+    """Apply *hook* to requests from every client; returns a function that removes it."""
+    _REQUEST_HOOKS.append(hook)
+
+    def _remove() -> None:
+        if hook in _REQUEST_HOOKS:
+            _REQUEST_HOOKS.remove(hook)
+
+    return _remove
+
+
+def get_request_stats() -> RequestStatsRecorder:
+    """Return the process-wide request stats recorder."""
+    return _REQUEST_STATS
+
+
+def _call_hooks(hooks: tuple[RequestHook, ...], method: str, *args: Any) -> None:
+    for hook in hooks:
+        try:
+            getattr(hook, method)(*args)
+        except Exception:  # noqa: BLE001 - a broken hook must not fail the request
+            _LOGGER.exception("Request hook %r failed in %s", hook, method)
+
+
+def _trace_mark(name: str, start: str | None = None, target: str | None = None):
+    """Build an aiohttp trace callback that timestamps *name* on the RequestInfo.
+
+    With *start* and *target*, the time since the *start* mark is stored in
+    the RequestInfo attribute *target*.
+    """
+
+    async def _callback(session: aiohttp.ClientSession, ctx: Any, params: Any) -> None:
+        info = ctx.trace_request_ctx
+        if not isinstance(info, RequestInfo):
+            return
+        now = time.monotonic()
+        info._marks[name] = now
+        if target is not None:
+            began = info._marks.get(start) if start else None
+            setattr(info, target, now - began if began is not None else 0.0)
+
+    return _callback
+
+
+def _create_trace_config() -> aiohttp.TraceConfig:
+    """Trace config recording DNS and connect times into RequestInfo."""
+    trace = aiohttp.TraceConfig()
+    trace.on_dns_resolvehost_start.append(_trace_mark("dns_start"))
+    trace.on_dns_resolvehost_end.append(_trace_mark("dns_end", "dns_start", "dns_time"))
+    trace.on_dns_cache_hit.append(_trace_mark("dns_cached", None, "dns_time"))
+    trace.on_connection_create_start.append(_trace_mark("connect_start"))
+    trace.on_connection_create_end.append(
+        _trace_mark("connect_end", "connect_start", "connect_time")
+    )
+    trace.on_connection_reuseconn.append(_trace_mark("connect_reused", None, "connect_time"))
+    return trace
+
+
+_DATA_API_SESSION = f"{DOMAIN}_api_session"
+
+
+def async_get_api_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the session shared by all Trafiklab clients.
+
+    It uses Home Assistant's connection pool like async_get_clientsession,
+    and adds request tracing so hooks see DNS and connect times.
+    """
+    session: aiohttp.ClientSession | None = hass.data.get(_DATA_API_SESSION)
+    if session is None:
+        # Not tied to a config entry: other entries keep using it after one
+        # unloads. Only the session is detached at close; the pool is HA's.
+        session = async_create_clientsession(
+            hass, auto_cleanup=False, trace_configs=[_create_trace_config()]
+        )
+        hass.data[_DATA_API_SESSION] = session
+
+        @callback
+        def _detach(_: Event) -> None:
+            hass.data.pop(_DATA_API_SESSION, None)
+            session.detach()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _detach)
+    return session
+
+
+# ---------------------------------------------------------------------------
+# Base URLs
+# ---------------------------------------------------------------------------
+
+# Process-wide base URLs. Normally the public APIs; YAML may point them at a
+# stand-in server (see scripts/fake_trafiklab_server.py) for offline testing.
+_BASE_URLS: dict[str, str] = {
+    "realtime": API_BASE_URL,
+    "resrobot": RESROBOT_BASE_URL,
+}
+
+
+def configure_base_urls(
+    realtime: str | None = None, resrobot: str | None = None
+) -> None:
+    """Override (or with None, restore) the Realtime and Resrobot base URLs."""
+    _BASE_URLS["realtime"] = (realtime or API_BASE_URL).rstrip("/")
+    _BASE_URLS["resrobot"] = (resrobot or RESROBOT_BASE_URL).rstrip("/")
+
+
+def get_realtime_base_url() -> str:
+    """Return the base URL used for Realtime API requests."""
+    return _BASE_URLS["realtime"]
+
+
+def get_resrobot_base_url() -> str:
+    """Return the base URL used for Resrobot API requests."""
+    return _BASE_URLS["resrobot"]
+
+
 # ---------------------------------------------------------------------------
 # API client
 # ---------------------------------------------------------------------------
 
 class TrafikLabApiClient:
     """API client for Trafiklab and Resrobot endpoints."""
+
+    # Requests currently on the wire, shared by every client in the process so
+    # that concurrent identical calls (several entries watching the same stop,
+    # a coordinator refresh racing an update_now service call, ...) await one
+    # HTTP request instead of issuing one each. Keyed by URL + query params,
+    # which include the API key, so different keys never share a response.
+    _inflight: dict[tuple, asyncio.Task] = {}
+
+    def __init__(
+        self,
+        api_key: str,
+        session: aiohttp.ClientSession | None = None,
+        timeout: int = 15,
+        use_cache: bool = True,
+        retry_policies: dict[str, RetryPolicy] | None = None,
+        hooks: list[RequestHook] | None = None,
+    ) -> None:
+        """Initialize the API client.
+
+        Pass ``use_cache=False`` to always go to the network (requests are
+        still coalesced with identical in-flight calls). ``retry_policies``
+        overrides DEFAULT_RETRY_POLICIES per endpoint family. ``hooks`` run
+        for this client's requests, after the process-wide ones.
+        """
+        self.api_key = api_key
+        self._session = session
+        self._close_session = False
+        self.timeout = timeout
+        self._cache: ResponseCache | None = _RESPONSE_CACHE if use_cache else None
+        self.retry_policies: dict[str, RetryPolicy] = {
+            **DEFAULT_RETRY_POLICIES,
+            **(retry_policies or {}),
+        }
+        self.hooks: list[RequestHook] = list(hooks or [])
+
+    async def __aenter__(self) -> TrafikLabApiClient:
+        """Async context manager entry."""
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        """Async context manager exit."""
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the session if we created it."""
+        if self._close_session and self._session:
+            await self._session.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Get or create session."""
+        if self._session is None:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(timeout=timeout)
+            self._close_session = True
+        return self._session
+
+    async def _get_json(
+        self,
+        family: str,
+        url: str,
+        params: dict[str, str],
+        *,
+        api_key: str,
+        raise_error: Callable[[int, str, dict | None], None],
+        label: str = "Request",
+    ) -> dict[str, Any]:
+        """GET *url* and return the decoded JSON body, coalescing identical calls.
+
+        A fresh cached response for the same URL and query parameters is
+        returned without a request. Otherwise, when an identical request is
+        already in flight, the caller awaits that request's result instead of
+        issuing a new one. Cached and shared result objects are handed to every
+        caller, so callers must treat them as read-only.
+        """
+        key = (url, tuple(sorted(params.items())))
+        cache = self._cache if self._cache and self._cache.enabled_for(family) else None
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                _LOGGER.debug("Serving %s from response cache", url)
+                return cached
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(
+                self._fetch_json(
+                    url,
+                    params,
+                    family=family,
+                    api_key=api_key,
+                    raise_error=raise_error,
+                    label=label,
+                    policy=self.retry_policies.get(family, RetryPolicy()),
+                )
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._release_inflight(k, t))
+        else:
+            _LOGGER.debug("Joining in-flight request for %s", url)
+        # shield() keeps the shared request alive when one of its waiters is
+        # cancelled (e.g. an entry unloading mid-refresh).
+        result = await asyncio.shield(task)
+        if cache is not None:
+            cache.set(family, key, result)
+        return result
+
+    @classmethod
+    def _release_inflight(cls, key: tuple, task: asyncio.Task) -> None:
+        """Drop a finished request from the in-flight registry."""
+        if cls._inflight.get(key) is task:
+            del cls._inflight[key]
+        # Mark the exception as retrieved; every waiter re-raises it anyway.
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_json(
+        self,
+        url: str,
+        params: dict[str, str],
+        *,
+        family: str,
+        api_key: str,
+        raise_error: Callable[[int, str, dict | None], None],
+        label: str,
+        policy: RetryPolicy,
+    ) -> dict[str, Any]:
+        """GET *url*, retrying transient failures according to *policy*."""
+        started = time.monotonic()
+        delay = 0.0
+        attempt = 1
+        while True:
+            remaining = policy.deadline - (time.monotonic() - started)
+            try:
+                return await self._fetch_once(
+                    url,
+                    params,
+                    family=family,
+                    attempt=attempt,
+                    api_key=api_key,
+                    raise_error=raise_error,
+                    label=label,
+                    timeout=max(1.0, min(self.timeout, remaining)),
+                )
+            except TrafikLabApiError as err:
+                if attempt >= policy.max_attempts or not _is_transient(err):
+                    raise
+                delay = policy.next_delay(delay)
+                if err.retry_after is not None:
+                    delay = max(delay, err.retry_after)
+                if time.monotonic() - started + delay >= policy.deadline:
+                    raise
+                _LOGGER.debug(
+                    "%s attempt %d/%d failed (%s); retrying in %.1f s",
+                    label, attempt, policy.max_attempts, err, delay,
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _fetch_once(
+        self,
+        url: str,
+        params: dict[str, str],
+        *,
+        family: str,
+        attempt: int,
+        api_key: str,
+        raise_error: Callable[[int, str, dict | None], None],
+        label: str,
+        timeout: float,
+    ) -> dict[str, Any]:
+        """Perform a single GET request and map failures to TrafikLabApiError.
+
+        Fails fast while the host's circuit breaker is open, then waits for a
+        slot from the API key's shared rate limiter.
+        """
+        breaker = get_circuit_breaker(urlsplit(url).hostname or url)
+        breaker.before_request()
+        try:
+            result = await self._request_json(
+                url,
+                params,
+                info=RequestInfo(family=family, url=url, attempt=attempt, api_key=api_key),
+                api_key=api_key,
+                raise_error=raise_error,
+                label=label,
+                timeout=timeout,
+            )
+        except TrafikLabApiError as err:
+            if is_host_failure(err):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
+
+    async def _request_json(
+        self,
+        url: str,
+        params: dict[str, str],
+        *,
+        info: RequestInfo,
+        api_key: str,
+        raise_error: Callable[[int, str, dict | None], None],
+        label: str,
+        timeout: float,
+    ) -> dict[str, Any]:
+        """Send the GET request and decode the response, reporting to hooks."""
+        info.queue_wait = await get_rate_limiter(api_key).acquire()
+        hooks = (*_REQUEST_HOOKS, *self.hooks)
+        _call_hooks(hooks, "on_request_start", info)
+        started = time.monotonic()
+        try:
+            async with self.session.get(
+                url,
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                trace_request_ctx=info,
+            ) as response:
+                # Read the body once; it is decoded once and, on errors, the
+                # same bytes feed the error classifier.
+                body = await response.read()
+                info.status = response.status
+                info.bytes_received = len(body)
+                decode_started = time.monotonic()
+                decode_error: ValueError | None = None
+                try:
+                    decoded = _decode_json(body)
+                except ValueError as err:
+                    decoded, decode_error = None, err
+                info.decode_time = time.monotonic() - decode_started
+                info.elapsed = time.monotonic() - started
+                _call_hooks(hooks, "on_response", info)
+                if response.status == 200:
+                    if decode_error is not None:
+                        raise TrafikLabApiError(
+                            f"{label} returned invalid JSON"
+                        ) from decode_error
+                    return decoded
+                try:
+                    raise_error(
+                        response.status,
+                        body.decode("utf-8", errors="replace"),
+                        decoded if isinstance(decoded, dict) else None,
+                    )
+                except TrafikLabApiError as err:
+                    err.retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                    raise
+                # raise_error() always raises; this keeps type checkers satisfied.
+                raise TrafikLabApiError(f"{label} failed")  # pragma: no cover
+        except TrafikLabApiError as err:
+            self._report_error(hooks, info, started, err)
+            raise
+        except asyncio.TimeoutError as err:
+            api_err = TrafikLabApiError(f"{label} timed out")
+            api_err.__cause__ = err
+            self._report_error(hooks, info, started, api_err)
+            raise api_err from err
+        except aiohttp.ClientError as err:
+            api_err = TrafikLabApiError(f"{label} failed: {err}")
+            api_err.__cause__ = err
+            self._report_error(hooks, info, started, api_err)
+            raise api_err from err
+
+    @staticmethod
+    def _report_error(
+        hooks: tuple[RequestHook, ...],
+        info: RequestInfo,
+        started: float,
+        err: TrafikLabApiError,
+    ) -> None:
+        if info.elapsed is None:
+            info.elapsed = time.monotonic() - started
+        _call_hooks(hooks, "on_error", info, err)
+
     async def get_resrobot_travel_search(
         self,
         api_key: str,
@@ -158,7 +1124,7 @@ class TrafikLabApiClient:
     ) -> dict[str, Any]:
         """Call Resrobot Travel Search API."""
         # Build endpoint and params
-        url = f"{RESROBOT_BASE_URL}{RESROBOT_TRAVEL_SEARCH_ENDPOINT}"
+        url = f"{get_resrobot_base_url()}{RESROBOT_TRAVEL_SEARCH_ENDPOINT}"
         params = {
             "accessId": api_key,
             "format": "json",
@@ -190,51 +1156,14 @@ class TrafikLabApiClient:
         if products is not None:
             params["products"] = str(products)
 
-        try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                response_text = await response.text()
-                json_body: dict | None = None
-                try:
-                    json_body = await response.json(content_type=None)
-                except Exception:
-                    pass
-                _raise_resrobot_error(response.status, response_text, json_body)
-        except asyncio.TimeoutError as err:
-            raise TrafikLabApiError("Resrobot request timed out") from err
-        except TrafikLabApiError:
-            raise
-        except aiohttp.ClientError as err:
-            raise TrafikLabApiError(f"Resrobot request failed: {err}") from err
-    def __init__(self, api_key: str, session: aiohttp.ClientSession | None = None, timeout: int = 15) -> None:
-        """Initialize the API client."""
-        self.api_key = api_key
-        self._session = session
-        self._close_session = False
-        self.timeout = timeout
-
-    async def __aenter__(self) -> TrafikLabApiClient:
-        """Async context manager entry."""
-        return self
-
-    async def __aexit__(self, *args) -> None:
-        """Async context manager exit."""
-        await self.close()
-
-    async def close(self) -> None:
-        """Close the session if we created it."""
-        if self._close_session and self._session:
-            await self._session.close()
-
-    @property
-    def session(self) -> aiohttp.ClientSession:
-        """Get or create session."""
-        if self._session is None:
-            timeout = aiohttp.ClientTimeout(total=self.timeout)
-            self._session = aiohttp.ClientSession(timeout=timeout)
-            self._close_session = True
-        return self._session
+        return await self._get_json(
+            ENDPOINT_RESROBOT_TRIP,
+            url,
+            params,
+            api_key=api_key,
+            raise_error=_raise_resrobot_error,
+            label="Resrobot request",
+        )
 
     async def get_departures(
         self,
@@ -243,31 +1172,19 @@ class TrafikLabApiClient:
     ) -> dict[str, Any]:
         """Get departures for an area."""
         if time:
-            url = f"{API_BASE_URL}{DEPARTURES_ENDPOINT}/{area_id}/{time}"
+            url = f"{get_realtime_base_url()}{DEPARTURES_ENDPOINT}/{area_id}/{time}"
         else:
-            url = f"{API_BASE_URL}{DEPARTURES_ENDPOINT}/{area_id}"
+            url = f"{get_realtime_base_url()}{DEPARTURES_ENDPOINT}/{area_id}"
         
         params = {"key": self.api_key}
 
-        try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-
-                response_text = await response.text()
-                json_body: dict | None = None
-                try:
-                    json_body = await response.json(content_type=None)
-                except Exception:
-                    pass
-                _raise_realtime_error(response.status, response_text, json_body)
-
-        except asyncio.TimeoutError as err:
-            raise TrafikLabApiError("Request timed out") from err
-        except TrafikLabApiError:
-            raise
-        except aiohttp.ClientError as err:
-            raise TrafikLabApiError(f"Request failed: {err}") from err
+        return await self._get_json(
+            ENDPOINT_DEPARTURES,
+            url,
+            params,
+            api_key=self.api_key,
+            raise_error=_raise_realtime_error,
+        )
 
     async def get_arrivals(
         self,
@@ -276,52 +1193,32 @@ class TrafikLabApiClient:
     ) -> dict[str, Any]:
         """Get arrivals for an area."""
         if time:
-            url = f"{API_BASE_URL}{ARRIVALS_ENDPOINT}/{area_id}/{time}"
+            url = f"{get_realtime_base_url()}{ARRIVALS_ENDPOINT}/{area_id}/{time}"
         else:
-            url = f"{API_BASE_URL}{ARRIVALS_ENDPOINT}/{area_id}"
+            url = f"{get_realtime_base_url()}{ARRIVALS_ENDPOINT}/{area_id}"
         
         params = {"key": self.api_key}
 
-        try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                response_text = await response.text()
-                json_body: dict | None = None
-                try:
-                    json_body = await response.json(content_type=None)
-                except Exception:
-                    pass
-                _raise_realtime_error(response.status, response_text, json_body)
-        except asyncio.TimeoutError as err:
-            raise TrafikLabApiError("Request timed out") from err
-        except TrafikLabApiError:
-            raise
-        except aiohttp.ClientError as err:
-            raise TrafikLabApiError(f"Request failed: {err}") from err
+        return await self._get_json(
+            ENDPOINT_ARRIVALS,
+            url,
+            params,
+            api_key=self.api_key,
+            raise_error=_raise_realtime_error,
+        )
 
     async def search_stops(self, search_value: str) -> dict[str, Any]:
         """Search for stops by name using the Realtime API (returns local stop IDs)."""
-        url = f"{API_BASE_URL}{STOP_LOOKUP_ENDPOINT}/{search_value}"
+        url = f"{get_realtime_base_url()}{STOP_LOOKUP_ENDPOINT}/{search_value}"
         params = {"key": self.api_key}
 
-        try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                response_text = await response.text()
-                json_body: dict | None = None
-                try:
-                    json_body = await response.json(content_type=None)
-                except Exception:
-                    pass
-                _raise_realtime_error(response.status, response_text, json_body)
-        except asyncio.TimeoutError as err:
-            raise TrafikLabApiError("Request timed out") from err
-        except TrafikLabApiError:
-            raise
-        except aiohttp.ClientError as err:
-            raise TrafikLabApiError(f"Request failed: {err}") from err
+        return await self._get_json(
+            ENDPOINT_STOP_LOOKUP,
+            url,
+            params,
+            api_key=self.api_key,
+            raise_error=_raise_realtime_error,
+        )
 
     async def search_resrobot_stops(self, search_value: str, api_key: str) -> dict[str, Any]:
         """Search for stops by name using Resrobot /location.name (returns national stop IDs).
@@ -330,31 +1227,22 @@ class TrafikLabApiClient:
         Returns a dict with a ``StopLocation`` list, each entry having an ``extId``
         field containing the national 9-digit stop ID (e.g. "740000001").
         """
-        url = f"{RESROBOT_BASE_URL}{RESROBOT_LOCATION_ENDPOINT}"
+        url = f"{get_resrobot_base_url()}{RESROBOT_LOCATION_ENDPOINT}"
         params = {
             "accessId": api_key,
             "input": search_value,
             "format": "json",
         }
-        try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    _LOGGER.debug("Resrobot location.name raw response for %r: %s", search_value, data)
-                    return data
-                response_text = await response.text()
-                json_body: dict | None = None
-                try:
-                    json_body = await response.json(content_type=None)
-                except Exception:
-                    pass
-                _raise_resrobot_error(response.status, response_text, json_body)
-        except asyncio.TimeoutError as err:
-            raise TrafikLabApiError("Resrobot location lookup timed out") from err
-        except TrafikLabApiError:
-            raise
-        except aiohttp.ClientError as err:
-            raise TrafikLabApiError(f"Resrobot location lookup failed: {err}") from err
+        data = await self._get_json(
+            ENDPOINT_RESROBOT_LOCATION,
+            url,
+            params,
+            api_key=api_key,
+            raise_error=_raise_resrobot_error,
+            label="Resrobot location lookup",
+        )
+        _LOGGER.debug("Resrobot location.name raw response for %r: %s", search_value, data)
+        return data
 
     async def validate_api_key(self, area_id: str = "740098000") -> bool:
         """Validate the API key by making a test request to Stockholm."""
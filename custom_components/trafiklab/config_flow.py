@@ -18,12 +18,14 @@ from homeassistant.helpers.selector import (
     SelectSelectorMode,
 )
 
+from .schedule import RefreshSchedule, ScheduleError
 from .api import (
     TrafikLabApiClient,
     TrafikLabApiError,
     TrafikLabAuthError,
     TrafikLabQuotaError,
     TrafikLabNotFoundError,
+    async_get_api_session,
 )
 
 from .const import (
@@ -38,6 +40,25 @@ from .const import (
     CONF_TIME_WINDOW,
     CONF_REFRESH_INTERVAL,
     CONF_UPDATE_CONDITION,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_SCHEDULE,
+    CONF_MONTHLY_QUOTA,
+    CONF_MINUTE_QUOTA,
+    CONF_POLL_PRIORITY,
+    CONF_SERVE_STALE,
+    CONF_MAX_STALENESS,
+    CONF_PREFETCH_WINDOWS,
+    CONF_MAX_UPCOMING,
+    CONF_MAX_TRIPS,
+    CONF_MAX_LEGS,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_MATERIAL_ATTRIBUTES,
+    MAX_PREFETCH_WINDOWS,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MAX_UPCOMING,
+    MAX_ATTRIBUTE_ITEMS,
+    DEFAULT_POLL_PRIORITY,
+    POLL_PRIORITIES,
     DEFAULT_TIME_WINDOW,
     DEFAULT_SCAN_INTERVAL,
     MINIMUM_SCAN_INTERVAL,
@@ -81,6 +102,15 @@ _SENSOR_TYPE_SELECTOR = SelectSelector(
     )
 )
 
+_POLL_PRIORITY_SELECTOR = SelectSelector(
+    SelectSelectorConfig(
+        options=list(POLL_PRIORITIES),
+        multiple=False,
+        mode=SelectSelectorMode.DROPDOWN,
+        translation_key="poll_priority",
+    )
+)
+
 _SENSOR_TYPE_DEP_ARR_SELECTOR = SelectSelector(
     SelectSelectorConfig(
         options=[SENSOR_TYPE_DEPARTURE, SENSOR_TYPE_ARRIVAL],
@@ -310,9 +340,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             if not errors:
                 # Probe Resrobot API to validate the key before saving
-                from homeassistant.helpers.aiohttp_client import async_get_clientsession
                 _probe_client = TrafikLabApiClient(
-                    self._api_key, session=async_get_clientsession(self.hass)
+                    self._api_key, session=async_get_api_session(self.hass)
                 )
                 try:
                     await _probe_client.search_resrobot_stops("Stockholm", self._api_key)
@@ -489,9 +518,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             if not errors:
                 # Probe Resrobot API to validate the key before saving
-                from homeassistant.helpers.aiohttp_client import async_get_clientsession
                 _probe_client = TrafikLabApiClient(
-                    user_input[CONF_API_KEY], session=async_get_clientsession(self.hass)
+                    user_input[CONF_API_KEY], session=async_get_api_session(self.hass)
                 )
                 try:
                     await _probe_client.search_resrobot_stops("Stockholm", user_input[CONF_API_KEY])
@@ -545,8 +573,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if is_resrobot:
             return await self.async_step_init_resrobot(user_input)
 
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            if _schedule_is_valid(user_input, errors):
+                return self.async_create_entry(title="", data=user_input)
 
         schema = vol.Schema({
             vol.Optional(CONF_LINE_FILTER, default=""): str,
@@ -559,6 +589,27 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Coerce(int), vol.Range(min=MINIMUM_SCAN_INTERVAL, max=3600)
             ),
             vol.Optional(CONF_UPDATE_CONDITION, default=""): str,
+            vol.Optional(CONF_ADAPTIVE_INTERVAL, default=False): bool,
+            vol.Optional(CONF_SCHEDULE, default=""): str,
+            vol.Optional(CONF_PREFETCH_WINDOWS, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=MAX_PREFETCH_WINDOWS)
+            ),
+            vol.Optional(CONF_MONTHLY_QUOTA, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_MINUTE_QUOTA, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_POLL_PRIORITY, default=DEFAULT_POLL_PRIORITY): _POLL_PRIORITY_SELECTOR,
+            vol.Optional(CONF_SERVE_STALE, default=False): bool,
+            vol.Optional(CONF_MAX_STALENESS, default=DEFAULT_MAX_STALENESS): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=1440)
+            ),
+            vol.Optional(CONF_MAX_UPCOMING, default=DEFAULT_MAX_UPCOMING): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=MAX_ATTRIBUTE_ITEMS)
+            ),
+            vol.Optional(CONF_COMPACT_ATTRIBUTES, default=False): bool,
+            vol.Optional(CONF_MATERIAL_ATTRIBUTES, default=""): str,
         })
         current_values = {**self._entry.data, **self._entry.options}
         # Normalize transport_modes: old entries may lack the key, have None stored,
@@ -572,12 +623,15 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         return self.async_show_form(
             step_id="init",
             data_schema=self.add_suggested_values_to_schema(schema, current_values),
+            errors=errors,
         )
 
     async def async_step_init_resrobot(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Options step for Resrobot Travel Search sensors."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            if _schedule_is_valid(user_input, errors):
+                return self.async_create_entry(title="", data=user_input)
 
         schema = vol.Schema({
             vol.Optional(CONF_VIA, default=""): str,
@@ -596,6 +650,26 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Coerce(int), vol.Range(min=1, max=1440)
             ),
             vol.Optional(CONF_INCLUDE_PLATFORM, default=False): bool,
+            vol.Optional(CONF_SCHEDULE, default=""): str,
+            vol.Optional(CONF_MONTHLY_QUOTA, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_MINUTE_QUOTA, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0)
+            ),
+            vol.Optional(CONF_POLL_PRIORITY, default=DEFAULT_POLL_PRIORITY): _POLL_PRIORITY_SELECTOR,
+            vol.Optional(CONF_SERVE_STALE, default=False): bool,
+            vol.Optional(CONF_MAX_STALENESS, default=DEFAULT_MAX_STALENESS): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=1440)
+            ),
+            vol.Optional(CONF_MAX_TRIPS, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=MAX_ATTRIBUTE_ITEMS)
+            ),
+            vol.Optional(CONF_MAX_LEGS, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=MAX_ATTRIBUTE_ITEMS)
+            ),
+            vol.Optional(CONF_COMPACT_ATTRIBUTES, default=False): bool,
+            vol.Optional(CONF_MATERIAL_ATTRIBUTES, default=""): str,
         })
         current_values = {**self._entry.data, **self._entry.options}
         # Normalize transport_modes: old entries may lack the key, have None stored,
@@ -609,12 +683,24 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         return self.async_show_form(
             step_id="init_resrobot",
             data_schema=self.add_suggested_values_to_schema(schema, current_values),
+            errors=errors,
         )
 
 
 # ---------------------------------------------------------------------------
 # Validation helpers & custom exceptions (expected by tests)
 # ---------------------------------------------------------------------------
+def _schedule_is_valid(user_input: dict[str, Any], errors: dict[str, str]) -> bool:
+    """Validate the refresh schedule option, recording a form error if invalid."""
+    try:
+        RefreshSchedule.parse(user_input.get(CONF_SCHEDULE) or "")
+    except ScheduleError as err:
+        _LOGGER.debug("Invalid refresh schedule: %s", err)
+        errors[CONF_SCHEDULE] = "invalid_schedule"
+        return False
+    return True
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -640,8 +726,7 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     api_key = data[CONF_API_KEY]
     stop_id = data[CONF_STOP_ID]
 
-    from homeassistant.helpers.aiohttp_client import async_get_clientsession
-    client = TrafikLabApiClient(api_key, session=async_get_clientsession(hass))
+    client = TrafikLabApiClient(api_key, session=async_get_api_session(hass))
     try:
         # Attempt a lightweight departures fetch to validate both key & stop.
         await client.get_departures(stop_id)
@@ -15,6 +15,19 @@ CONF_SENSOR_TYPE: Final = "sensor_type"
 CONF_TIME_WINDOW: Final = "time_window"
 CONF_REFRESH_INTERVAL: Final = "refresh_interval"
 CONF_UPDATE_CONDITION: Final = "update_condition"
+CONF_ADAPTIVE_INTERVAL: Final = "adaptive_interval"
+CONF_SCHEDULE: Final = "refresh_schedule"
+CONF_MONTHLY_QUOTA: Final = "monthly_quota"
+CONF_MINUTE_QUOTA: Final = "minute_quota"
+CONF_POLL_PRIORITY: Final = "poll_priority"
+CONF_SERVE_STALE: Final = "serve_stale"
+CONF_MAX_STALENESS: Final = "max_staleness"
+CONF_PREFETCH_WINDOWS: Final = "prefetch_windows"
+CONF_MAX_UPCOMING: Final = "max_upcoming"
+CONF_MAX_TRIPS: Final = "max_trips"
+CONF_MAX_LEGS: Final = "max_legs"
+CONF_COMPACT_ATTRIBUTES: Final = "compact_attributes"
+CONF_MATERIAL_ATTRIBUTES: Final = "material_attributes"
 CONF_NAME: Final = "name"
 # Resrobot-specific config keys
 CONF_ORIGIN_TYPE: Final = "origin_type"
@@ -28,6 +41,11 @@ CONF_MAX_TRIP_DURATION: Final = "max_trip_duration"
 CONF_TRANSPORT_MODES: Final = "transport_modes"
 CONF_INCLUDE_PLATFORM: Final = "include_platform"
 CONF_REALTIME_API_KEY: Final = "realtime_api_key"
+# Integration-wide (YAML) settings
+CONF_RATE_LIMIT: Final = "rate_limit"
+CONF_RATE_BURST: Final = "rate_burst"
+CONF_REALTIME_BASE_URL: Final = "realtime_base_url"
+CONF_RESROBOT_BASE_URL: Final = "resrobot_base_url"
 
 
 # Sensor types
@@ -41,6 +59,39 @@ MINIMUM_SCAN_INTERVAL: Final = 60   # 1 minute minimum
 DEFAULT_NAME: Final = "Trafiklab"
 DEFAULT_TIME_WINDOW: Final = 60  # minutes
 DEFAULT_UPDATE_CONDITION: Final = ""  # empty means always update
+FIRST_REFRESH_SPACING: Final = 1.5  # seconds between entries' first refreshes at startup
+# Adaptive polling backs off to this when nothing is due within the time window
+ADAPTIVE_MAX_SCAN_INTERVAL: Final = 1800  # 30 minutes in seconds
+# Prefetching: a Realtime response covers the hour from the requested time.
+# Windows after the first are fetched ahead and only refreshed this often.
+PREFETCH_WINDOW: Final = 3600  # seconds
+MAX_PREFETCH_WINDOWS: Final = 3
+PREFETCH_REFRESH_INTERVAL: Final = 1800  # 30 minutes in seconds
+# Serving the last good data through transient API failures: for at most
+# this long after the last successful update, retrying at a quarter of the
+# refresh interval (but not below MINIMUM_SCAN_INTERVAL)
+DEFAULT_MAX_STALENESS: Final = 30  # minutes
+STALE_RETRY_FRACTION: Final = 0.25
+# Attribute size: upcoming departures/arrivals exposed by default, and the
+# most upcoming items, trips or legs per trip that may be configured
+# (0 exposes every trip or leg)
+DEFAULT_MAX_UPCOMING: Final = 10
+MAX_ATTRIBUTE_ITEMS: Final = 50
+# Attributes that change without the data changing; a coordinator update
+# that differs from the last written state only in these is not written
+# unless material attributes are configured. data_age_seconds is not one:
+# it is only set while stale data is served, and then its change is the news
+VOLATILE_ATTRIBUTES: Final = frozenset({"last_update"})
+# Quota planning: share of a key's quota the planner may use, the slowest
+# interval it stretches an entry to, and the weight of each poll priority
+QUOTA_RESERVE: Final = 0.95
+MAXIMUM_BUDGET_INTERVAL: Final = 3600  # 1 hour in seconds
+POLL_PRIORITIES: Final = ("low", "normal", "high")
+DEFAULT_POLL_PRIORITY: Final = "normal"
+POLL_PRIORITY_WEIGHTS: Final = {"low": 1.0, "normal": 2.0, "high": 4.0}
+# Shared request budget per API key, across all entries and services
+DEFAULT_RATE_LIMIT: Final = 25  # requests per minute
+DEFAULT_RATE_BURST: Final = 5   # requests allowed back-to-back before pacing
 
 
 # API endpoints
@@ -2,11 +2,23 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
-from datetime import timedelta
+import time
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+from urllib.parse import urlsplit
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import (
+    TrackTemplate,
+    TrackTemplateResult,
+    async_track_point_in_time,
+    async_track_template_result,
+)
+from homeassistant.util import dt as dt_util
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers.template import Template
 from homeassistant.exceptions import TemplateError
@@ -16,7 +28,27 @@ from .const import (
     CONF_STOP_ID,
     CONF_SENSOR_TYPE,
     CONF_REFRESH_INTERVAL,
+    CONF_ADAPTIVE_INTERVAL,
+    CONF_SCHEDULE,
+    CONF_TIME_WINDOW,
+    CONF_MONTHLY_QUOTA,
+    CONF_MINUTE_QUOTA,
+    CONF_POLL_PRIORITY,
+    CONF_SERVE_STALE,
+    CONF_MAX_STALENESS,
+    CONF_PREFETCH_WINDOWS,
+    ADAPTIVE_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    STALE_RETRY_FRACTION,
+    DEFAULT_POLL_PRIORITY,
     DEFAULT_SCAN_INTERVAL,
+    MAXIMUM_BUDGET_INTERVAL,
+    MAX_PREFETCH_WINDOWS,
+    PREFETCH_REFRESH_INTERVAL,
+    PREFETCH_WINDOW,
+    POLL_PRIORITY_WEIGHTS,
+    DEFAULT_TIME_WINDOW,
+    MINIMUM_SCAN_INTERVAL,
     SENSOR_TYPE_ARRIVAL,
     SENSOR_TYPE_DEPARTURE,
     SENSOR_TYPE_RESROBOT,
@@ -32,59 +64,602 @@ from .api import (
     TrafikLabAuthError,
     TrafikLabQuotaError,
     TrafikLabServerError,
+    TrafikLabUnavailableError,
+    async_get_api_session,
+    get_circuit_breaker,
+    get_realtime_base_url,
+    get_resrobot_base_url,
+    is_host_failure,
+)
+from .schedule import RefreshSchedule, ScheduleError
+from .scheduler import async_get_poll_scheduler
+from .stop_feed import async_get_stop_feeds
+from .snapshot import SnapshotStore, async_get_snapshot_store, decode_snapshot, encode_snapshot
+from .models import (
+    KIND_ARRIVALS,
+    KIND_DEPARTURES,
+    TimetableBoard,
+    TimetableEntry,
+    build_entry_filter,
+    merge_timeline,
 )
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .parsing import parse_resrobot_datetime
 import homeassistant.helpers.issue_registry as ir
+from homeassistant.helpers.json import json_bytes_sorted
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _payload_fingerprint(data: dict) -> bytes | None:
+    """Return a digest of the trips in a Resrobot response, or None if it cannot be serialized.
+
+    Only ``Trip`` is hashed: envelope fields such as the server version or
+    technical messages can change between polls without changing the trips.
+    """
+    try:
+        return hashlib.blake2b(json_bytes_sorted(data.get("Trip")), digest_size=16).digest()
+    except (TypeError, ValueError):  # pragma: no cover - API payloads are plain JSON
+        return None
+
+
+def adaptive_interval(
+    entries: Iterable[TimetableEntry], now: float, base: int, window: int
+) -> int:
+    """Return the seconds until the next refresh in adaptive mode.
+
+    *entries* are the departures/arrivals the sensors show, *base* the
+    configured refresh interval and *window* the time window, both in seconds.
+    With nothing upcoming the poll backs off to ADAPTIVE_MAX_SCAN_INTERVAL.
+    When the first entry is outside the window the next poll is when it enters
+    it. Inside the window the interval is half the remaining lead time, kept
+    between MINIMUM_SCAN_INTERVAL and *base*.
+    """
+    ceiling = max(base, ADAPTIVE_MAX_SCAN_INTERVAL)
+    lead = min(
+        (e.timestamp - now for e in entries if e.timestamp is not None and e.timestamp > now),
+        default=None,
+    )
+    if lead is None:
+        return ceiling
+    if lead > window:
+        return int(min(max(lead - window, base), ceiling))
+    return int(min(base, max(MINIMUM_SCAN_INTERVAL, lead / 2)))
+
+
+# Prior for the update condition's duty cycle: one hour, true half the time
+_CONDITION_PRIOR = 3600.0
+
+
+def _condition_is_true(result: Any) -> bool:
+    """Interpret a rendered update condition; only 'true' (any case) is true for strings."""
+    if isinstance(result, str):
+        return result.strip().lower() == "true"
+    return bool(result)
+
+
 class TrafikLabCoordinator(DataUpdateCoordinator):
     """Data update coordinator for Trafiklab."""
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the coordinator."""
         self.entry = entry
-        # Use HA shared aiohttp session
-        session = async_get_clientsession(hass)
+        # Shared integration session (HA connection pool + request tracing)
+        session = async_get_api_session(hass)
         self.api_client = TrafikLabApiClient(entry.data[CONF_API_KEY], session=session)
         # Track last successful update (UTC ISO8601)
         self.last_successful_update: str | None = None
         # Track last API error (None when healthy)
         self.last_api_error: dict | None = None
+        # Fingerprint of the last raw Resrobot response that was normalized
+        self._payload_fingerprint: bytes | None = None
+        # Persisted copy of the last successful data (see snapshot.py)
+        self._snapshots: SnapshotStore | None = None
+        self.restored_from_snapshot = False
+        # Set once a refresh or a shared board delivered data; restored
+        # snapshot data does not count
+        self.received_since_setup = False
 
         # Options override data if present
-        refresh_interval = entry.options.get(
-            CONF_REFRESH_INTERVAL,
-            entry.data.get(CONF_REFRESH_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        config = {**entry.data, **entry.options}
+        refresh_interval = config.get(CONF_REFRESH_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        self._default_interval = timedelta(seconds=refresh_interval)
+        # Time-of-day schedule overriding the refresh interval in its ranges
+        try:
+            self._schedule = RefreshSchedule.parse(config.get(CONF_SCHEDULE) or "")
+        except ScheduleError as err:
+            _LOGGER.warning("Ignoring invalid refresh schedule for %s: %s", entry.title, err)
+            self._schedule = RefreshSchedule(())
+        self._unsub_schedule = None
+        self._base_interval = self._scheduled_interval(dt_util.now())
+        # Adaptive mode derives each next refresh from the board (Realtime only)
+        self._adaptive = (
+            bool(config.get(CONF_ADAPTIVE_INTERVAL))
+            and config.get(CONF_SENSOR_TYPE) != SENSOR_TYPE_RESROBOT
+        )
+        self._time_window = int(config.get(CONF_TIME_WINDOW, DEFAULT_TIME_WINDOW)) * 60
+        self._entry_filter = build_entry_filter(config)
+        # Quota planning (see quota.py): the planner stretches the interval
+        # by this factor to keep the key within its monthly budget
+        self._budget_factor = 1.0
+        self.monthly_quota = int(config.get(CONF_MONTHLY_QUOTA) or 0)
+        self.minute_quota = int(config.get(CONF_MINUTE_QUOTA) or 0)
+        self.poll_priority = config.get(CONF_POLL_PRIORITY) or DEFAULT_POLL_PRIORITY
+        if self.poll_priority not in POLL_PRIORITY_WEIGHTS:
+            self.poll_priority = DEFAULT_POLL_PRIORITY
+        modes = [m for m in config.get(CONF_TRANSPORT_MODES) or [] if m in RESROBOT_PRODUCTS_MAP]
+        # Resrobot entries filtering on several modes make one request per mode
+        self._requests_per_refresh = (
+            max(len(modes), 1) if config.get(CONF_SENSOR_TYPE) == SENSOR_TYPE_RESROBOT else 1
+        )
+        # Stale-while-revalidate: on transient failures keep the last good
+        # data, up to max_staleness old, instead of failing the update
+        self._serve_stale = bool(config.get(CONF_SERVE_STALE))
+        self._max_staleness = timedelta(
+            minutes=int(config.get(CONF_MAX_STALENESS) or DEFAULT_MAX_STALENESS)
         )
+        self.serving_stale = False
+        # Hours after the coming one fetched ahead with a time parameter and
+        # merged into the board; refreshed only every PREFETCH_REFRESH_INTERVAL
+        self._prefetch_windows = 0
+        if config.get(CONF_SENSOR_TYPE) != SENSOR_TYPE_RESROBOT:
+            self._prefetch_windows = min(
+                int(config.get(CONF_PREFETCH_WINDOWS) or 0), MAX_PREFETCH_WINDOWS
+            )
+        self._prefetched: tuple[TimetableEntry, ...] = ()
+        self._prefetched_at: float | None = None
+        # Latest near board, and the prefetch started when it came from an
+        # entry sharing the stop (this entry's own refreshes are then skipped)
+        self._near: TimetableBoard | None = None
+        self._prefetch_task: asyncio.Task | None = None
 
         super().__init__(
             hass,
             _LOGGER,
             name="Trafiklab",
-            update_interval=timedelta(seconds=refresh_interval),
+            update_interval=self._base_interval,
+            # Only notify entities when the data actually changed; unchanged
+            # polls return the previous data object.
+            always_update=False,
+        )
+        # Refresh phase within the interval, spread across all entries
+        self._poll_scheduler = async_get_poll_scheduler(hass)
+        self._phase = self._poll_scheduler.register(entry.entry_id)
+        # Loop times of the next scheduled refresh and of the start of the
+        # previous one, which the next is kept at least an interval after
+        self._refresh_at: float | None = None
+        self._last_refresh_at: float | None = None
+        entry.async_on_unload(lambda: self._poll_scheduler.unregister(entry.entry_id))
+        # Entries watching the same stop share one fetch per interval
+        self._feed_key = None
+        if config.get(CONF_SENSOR_TYPE) != SENSOR_TYPE_RESROBOT:
+            self._feed_key = (
+                "realtime",
+                entry.data[CONF_API_KEY],
+                str(entry.data[CONF_STOP_ID]),
+                KIND_ARRIVALS if config.get(CONF_SENSOR_TYPE) == SENSOR_TYPE_ARRIVAL else KIND_DEPARTURES,
+            )
+            self._stop_feeds = async_get_stop_feeds(hass)
+            entry.async_on_unload(
+                self._stop_feeds.register(self._feed_key, self, self._async_receive_shared_board)
+            )
+        if self._schedule:
+            self._track_schedule_change(dt_util.now())
+            entry.async_on_unload(self._cancel_schedule)
+        # Optional update condition: polling is suspended while it is false.
+        # Time spent true/observed feeds the quota planner's demand estimate.
+        self._condition_met = True
+        self._condition_tracked = False
+        self._condition_since = time.monotonic()
+        self._condition_true_time = 0.0
+        self._condition_observed = 0.0
+        condition = (entry.options.get(CONF_UPDATE_CONDITION) or "").strip()
+        if condition:
+            self._track_update_condition(condition)
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the data saved before the last restart, if any.
+
+        Departed entries are dropped from a restored board. Returns True when
+        the snapshot is younger than the refresh interval, so the first
+        refresh can wait for the entry's normal schedule.
+        """
+        self._snapshots = await async_get_snapshot_store(self.hass)
+        snapshot = self._snapshots.get(self.entry.entry_id)
+        decoded = decode_snapshot(snapshot) if snapshot else None
+        if decoded is None:
+            return False
+        data, last_successful_update = decoded
+        if isinstance(data, TimetableBoard):
+            data = data.upcoming(time.time())
+        self.data = data
+        self.last_successful_update = last_successful_update
+        self.restored_from_snapshot = True
+        updated = dt_util.parse_datetime(last_successful_update or "")
+        if updated is None or self.update_interval is None:
+            return False
+        return dt_util.utcnow() - updated < self.update_interval
+
+    @callback
+    def _save_snapshot(self, data: dict | TimetableBoard) -> None:
+        if self._snapshots is None:
+            return
+        snapshot = encode_snapshot(data, self.last_successful_update)
+        if snapshot is not None:
+            self._snapshots.async_set(self.entry.entry_id, snapshot)
+
+    @property
+    def api_key(self) -> str:
+        return self.entry.data[CONF_API_KEY]
+
+    @property
+    def budget_group(self) -> Any:
+        """Entries in the same group share their requests (see stop_feed.py)."""
+        return self._feed_key or self.entry.entry_id
+
+    @property
+    def budget_factor(self) -> float:
+        return self._budget_factor
+
+    @property
+    def max_budget_factor(self) -> float:
+        """Largest stretch that keeps the slowest scheduled interval within an hour."""
+        slowest = max(
+            [self._default_interval.total_seconds(), *(r.interval for r in self._schedule.rules)]
+        )
+        return max(MAXIMUM_BUDGET_INTERVAL / slowest, 1.0)
+
+    @property
+    def _pace(self) -> timedelta:
+        """Scheduled interval stretched by the quota budget."""
+        return self._base_interval * self._budget_factor
+
+    def condition_duty(self) -> float:
+        """Estimated share of time the update condition is true (1.0 without one)."""
+        if not self._condition_tracked:
+            return 1.0
+        since = time.monotonic() - self._condition_since
+        true_time = self._condition_true_time + (since if self._condition_met else 0.0)
+        observed = self._condition_observed + since
+        return (true_time + _CONDITION_PRIOR / 2) / (observed + _CONDITION_PRIOR)
+
+    def estimated_request_rate(self) -> float:
+        """Requests per second this entry makes without budget stretching.
+
+        Averages the schedule over a week and scales by how often the update
+        condition lets it poll. Adaptive mode is counted at its fastest.
+        """
+        default = self._default_interval.total_seconds()
+        rate = self._schedule.mean_rate(default) if self._schedule else 1.0 / default
+        rate += self._prefetch_windows / PREFETCH_REFRESH_INTERVAL
+        return rate * self.condition_duty() * self._requests_per_refresh
+
+    @callback
+    def set_budget_factor(self, factor: float) -> None:
+        """Stretch the refresh interval by *factor* (from the quota planner)."""
+        factor = max(factor, 1.0)
+        if abs(factor - self._budget_factor) < 0.05 * self._budget_factor:
+            return
+        _LOGGER.debug(
+            "Quota budget for %s: interval x%.2f", self.entry.title, factor
+        )
+        self._budget_factor = factor
+        self.update_interval = self._pace
+        if self._listeners:
+            self._schedule_refresh()
+
+    @property
+    def data_age_seconds(self) -> int | None:
+        """Seconds since the last successful update, None before the first."""
+        updated = dt_util.parse_datetime(self.last_successful_update or "")
+        if updated is None:
+            return None
+        return max(int((dt_util.utcnow() - updated).total_seconds()), 0)
+
+    def _stale_data(self, err: TrafikLabApiError) -> dict | TimetableBoard | None:
+        """Return the last good data to serve through a transient *err*, if allowed.
+
+        Only quota errors, an open circuit and host failures (timeouts,
+        connection errors, 5xx) are served stale; errors such as a rejected
+        request or an unparsable response surface right away. Boards are
+        trimmed to the entries that have not yet departed. Retries come
+        sooner than the normal pace, except after quota errors. While stale
+        data is served every retry updates the entities, so the data age and
+        countdowns keep moving even when the data is the same.
+        """
+        if not self._serve_stale or not self.data:
+            return None
+        if not isinstance(
+            err, (TrafikLabQuotaError, TrafikLabUnavailableError)
+        ) and not is_host_failure(err):
+            return None
+        age = self.data_age_seconds
+        if age is None or age > self._max_staleness.total_seconds():
+            return None
+        if not self.serving_stale:
+            _LOGGER.info(
+                "Serving last good data for %s while the API is failing: %s",
+                self.entry.title,
+                err,
+            )
+        self.serving_stale = True
+        self.always_update = True
+        if not isinstance(err, TrafikLabQuotaError):
+            self.update_interval = max(
+                self._pace * STALE_RETRY_FRACTION, timedelta(seconds=MINIMUM_SCAN_INTERVAL)
+            )
+        if isinstance(self.data, TimetableBoard):
+            return self.data.upcoming(time.time())
+        return self.data
+
+    @callback
+    def _clear_stale(self) -> None:
+        """Back to fresh data: normal pace and change-only updates."""
+        if self.serving_stale:
+            self.serving_stale = False
+            self.always_update = False
+            self.update_interval = self._pace
+
+    @property
+    def circuit_state(self) -> str:
+        """State of the circuit breaker for the host this entry polls."""
+        if self.entry.data.get(CONF_SENSOR_TYPE) == SENSOR_TYPE_RESROBOT:
+            base_url = get_resrobot_base_url()
+        else:
+            base_url = get_realtime_base_url()
+        return get_circuit_breaker(urlsplit(base_url).hostname or base_url).state
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Schedule the next refresh on this entry's phase grid.
+
+        Replaces the base implementation, which schedules one interval after
+        the previous refresh and so keeps entries set up together in lockstep.
+        Intervals derived from the board (adaptive mode) or from a failing
+        API (stale retries) skip the grid, which could delay them by up to
+        an interval.
+        """
+        if (
+            self.update_interval is None
+            or self.entry.pref_disable_polling
+            or not self._condition_met
+        ):
+            return
+        self._async_unsub_refresh()
+        loop = self.hass.loop
+        now = loop.time()
+        interval = self.update_interval.total_seconds()
+        if self._adaptive or self.serving_stale:
+            last = now if self._last_refresh_at is None else self._last_refresh_at
+            when = max(now, last + interval)
+        else:
+            when = self._poll_scheduler.next_refresh(
+                now, interval, self._phase, self._last_refresh_at
+            )
+        self._refresh_at = when
+        self._unsub_refresh = loop.call_at(when, self._handle_scheduled_refresh).cancel
+
+    async def async_refresh(self) -> None:
+        """Refresh data now; the next scheduled refresh counts from this one."""
+        self._last_refresh_at = self.hass.loop.time()
+        await super().async_refresh()
+
+    @callback
+    def _handle_scheduled_refresh(self) -> None:
+        # Count from the grid point rather than the slightly later loop time
+        self._last_refresh_at = self._refresh_at
+        self.entry.async_create_background_task(
+            self.hass,
+            self._handle_refresh_interval(),
+            name=f"{self.name} - {self.entry.title} - refresh",
+            eager_start=True,
         )
 
-    async def _async_update_data(self) -> dict:
+    def _scheduled_interval(self, now: datetime) -> timedelta:
+        """Refresh interval the schedule gives for *now*."""
+        seconds = self._schedule.interval_at(now)
+        if seconds is None:
+            return self._default_interval
+        return timedelta(seconds=seconds)
+
+    @callback
+    def _track_schedule_change(self, now: datetime) -> None:
+        """Arm a timer for the first schedule boundary after *now*."""
+        self._unsub_schedule = None
+        boundary = self._schedule.next_change(now)
+        if boundary is not None:
+            self._unsub_schedule = async_track_point_in_time(
+                self.hass, self._handle_schedule_change, boundary
+            )
+
+    @callback
+    def _cancel_schedule(self) -> None:
+        if self._unsub_schedule is not None:
+            self._unsub_schedule()
+            self._unsub_schedule = None
+
+    @callback
+    def _handle_schedule_change(self, now: datetime) -> None:
+        """Switch to the interval of the schedule range that just began or ended."""
+        now = dt_util.as_local(now)
+        previous = self._base_interval
+        self._base_interval = self._scheduled_interval(now)
+        self._track_schedule_change(now)
+        if self._base_interval == previous:
+            return
+        _LOGGER.debug(
+            "Refresh interval for %s is now %ss",
+            self.entry.title,
+            int(self._base_interval.total_seconds()),
+        )
+        self.update_interval = self._pace
+        if self._base_interval < previous and self._listeners:
+            # A faster range just started: refresh now rather than at the end
+            # of the slower interval already scheduled.
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _track_update_condition(self, condition: str) -> None:
+        """Compile the update condition once and follow its result."""
+        template = Template(condition, self.hass)
+        try:
+            template.ensure_valid()
+        except TemplateError as err:
+            # Keep updating rather than stall the sensor
+            _LOGGER.warning("Invalid update condition template: %s", err)
+            return
+        try:
+            self._condition_met = _condition_is_true(template.async_render(None))
+        except TemplateError as err:
+            _LOGGER.warning("Update condition template error: %s", err)
+        self._condition_tracked = True
+        info = async_track_template_result(
+            self.hass, [TrackTemplate(template, None)], self._handle_condition_result
+        )
+        self.entry.async_on_unload(info.async_remove)
+
+    @callback
+    def _handle_condition_result(
+        self, event: Any, updates: list[TrackTemplateResult]
+    ) -> None:
+        result = updates.pop().result
+        if isinstance(result, TemplateError):
+            _LOGGER.warning("Update condition template error: %s", result)
+            # Keep updating rather than stall the sensor
+            met = True
+        else:
+            met = _condition_is_true(result)
+        if met == self._condition_met:
+            return
+        now = time.monotonic()
+        if self._condition_met:
+            self._condition_true_time += now - self._condition_since
+        self._condition_observed += now - self._condition_since
+        self._condition_since = now
+        self._condition_met = met
+        if not met:
+            _LOGGER.debug("Update condition for %s turned false; pausing polling", self.entry.title)
+            self._async_unsub_refresh()
+            return
+        _LOGGER.debug("Update condition for %s turned true; refreshing", self.entry.title)
+        self.entry.async_create_background_task(
+            self.hass,
+            self.async_refresh(),
+            name=f"{self.name} - {self.entry.title} - condition refresh",
+        )
+
+    @property
+    def shared_feed_members(self) -> int | None:
+        """Number of entries sharing this entry's stop board, None for Resrobot."""
+        if self._feed_key is None:
+            return None
+        return self._stop_feeds.group_size(self._feed_key)
+
+    @callback
+    def _async_receive_shared_board(self, board: TimetableBoard) -> None:
+        """Take a board another entry for the same stop just fetched."""
+        if self._prefetch_windows:
+            self._near = board
+            if self._prefetch_due() and self._prefetch_task is None:
+                self._prefetch_task = self.entry.async_create_background_task(
+                    self.hass,
+                    self._async_prefetch_shared(),
+                    name=f"{self.name} - {self.entry.title} - prefetch",
+                )
+            board = self._merge_prefetched(board)
+        if self._adaptive:
+            self._apply_adaptive_interval(board)
+        self.last_successful_update = dt_util.utcnow().replace(microsecond=0).isoformat()
+        self.received_since_setup = True
+        self.last_api_error = None
+        # The board is as fresh as a refresh of our own would have made it
+        self._last_refresh_at = self.hass.loop.time()
+        self._clear_stale()
+        self._save_snapshot(board)
+        if board != self.data or not self.last_update_success:
+            # Also resets the refresh timer
+            self.async_set_updated_data(board)
+        elif self._listeners:
+            self._schedule_refresh()
+
+    async def _async_prefetch(self, stop_id: str, sensor_type: str) -> None:
+        """Fetch the windows after the coming hour, if not done recently.
+
+        If any window fails, the previously fetched windows are kept and the
+        prefetch is retried on the next refresh; the update itself does not
+        fail.
+        """
+        now = time.time()
+        if not self._prefetch_due():
+            return
+        if sensor_type == SENSOR_TYPE_ARRIVAL:
+            fetch, kind = self.api_client.get_arrivals, KIND_ARRIVALS
+        else:
+            fetch, kind = self.api_client.get_departures, KIND_DEPARTURES
+        start = dt_util.as_local(dt_util.utcnow())
+        times = [
+            (start + timedelta(seconds=PREFETCH_WINDOW * n)).strftime("%Y-%m-%dT%H:%M")
+            for n in range(1, self._prefetch_windows + 1)
+        ]
+        results = await asyncio.gather(
+            *(fetch(stop_id, when) for when in times), return_exceptions=True
+        )
+        entries: list[TimetableEntry] = []
+        for when, result in zip(times, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, Exception):
+                _LOGGER.debug("Prefetching %s from %s failed: %s", kind, when, result)
+                return
+            if isinstance(result, dict):
+                entries.extend(TimetableBoard.from_api(result, kind).entries)
+        self._prefetched = tuple(entries)
+        self._prefetched_at = now
+
+    def _prefetch_due(self) -> bool:
+        return (
+            self._prefetched_at is None
+            or time.time() - self._prefetched_at >= PREFETCH_REFRESH_INTERVAL
+        )
+
+    async def _async_prefetch_shared(self) -> None:
+        """Prefetch for a shared stop and merge into the latest shared board."""
+        try:
+            await self._async_prefetch(
+                str(self.entry.data[CONF_STOP_ID]),
+                self.entry.data.get(CONF_SENSOR_TYPE, SENSOR_TYPE_DEPARTURE),
+            )
+        finally:
+            self._prefetch_task = None
+        if self._near is None:
+            return
+        board = self._merge_prefetched(self._near)
+        if board != self.data:
+            self._save_snapshot(board)
+            self.async_set_updated_data(board)
+
+    def _merge_prefetched(self, near: TimetableBoard) -> TimetableBoard:
+        """Extend the coming hour's board with the prefetched windows."""
+        return merge_timeline(near, self._prefetched, time.time() + PREFETCH_WINDOW)
+
+    def _apply_adaptive_interval(self, board: TimetableBoard) -> None:
+        """Set the next refresh from the entries this entry's sensors show."""
+        seconds = adaptive_interval(
+            self._entry_filter.select(board),
+            time.time(),
+            int(self._pace.total_seconds()),
+            self._time_window,
+        )
+        _LOGGER.debug("Adaptive refresh for %s in %ss", self.entry.title, seconds)
+        self.update_interval = timedelta(seconds=seconds)
+
+    async def _async_update_data(self) -> dict | TimetableBoard:
         """Fetch data from Trafiklab API."""
         try:
-            # Optional: evaluate update condition template from options
-            update_condition_tmpl = (self.entry.options.get(CONF_UPDATE_CONDITION) or "").strip()
-            if update_condition_tmpl:
-                try:
-                    rendered = Template(update_condition_tmpl, self.hass).async_render(None)
-                    if isinstance(rendered, str):
-                        cond = rendered.strip().lower() == "true"
-                    else:
-                        cond = bool(rendered)
-                    if not cond:
-                        _LOGGER.debug("Update condition evaluated to false; skipping API call")
-                        # Return the last known data (do not mark update as failed)
-                        return self.data or {}
-                except TemplateError as terr:
-                    _LOGGER.warning("Update condition template error: %s", terr)
-                    # Proceed with update to avoid stalling sensor
+            # Optional update condition, tracked by _handle_condition_result
+            if not self._condition_met:
+                _LOGGER.debug("Update condition is false; skipping API call")
+                # Return the last known data (do not mark update as failed)
+                return self.data or {}
             # Merge data + options (options override)
             # Base immutable data lives in entry.data (api key, stop id, sensor_type, name)
             # Mutable settings now live in options (migration safe fallback to data)
@@ -164,27 +739,40 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
                     )
                     data = await _fetch_for_products(products)
 
-                # Normalize and sort trips/legs for consistent downstream usage
-                try:
-                    data = self._normalize_resrobot_response(data)
-                except Exception as nerr:  # pragma: no cover - defensive
-                    _LOGGER.debug("Resrobot normalize failed: %s", nerr)
-
-                # Platform enrichment — opt-in via include_platform option
-                if opts.get(CONF_INCLUDE_PLATFORM):
+                fingerprint = _payload_fingerprint(data)
+                if self.data is not None and fingerprint == self._payload_fingerprint:
+                    # Same trips as last time: keep the already normalized (and
+                    # enriched) object so listeners see no change.
+                    _LOGGER.debug("Resrobot response unchanged; keeping previous data")
+                    data = self.data
+                else:
+                    # Normalize and sort trips/legs for consistent downstream usage
                     try:
-                        data = await self._enrich_platform(data)
-                    except Exception as perr:
-                        _LOGGER.warning("Platform enrichment failed: %s", perr)
+                        data = self._normalize_resrobot_response(data)
+                    except Exception as nerr:  # pragma: no cover - defensive
+                        _LOGGER.debug("Resrobot normalize failed: %s", nerr)
+
+                    # Platform enrichment — opt-in via include_platform option
+                    if opts.get(CONF_INCLUDE_PLATFORM):
+                        try:
+                            data = await self._enrich_platform(data)
+                        except Exception as perr:
+                            _LOGGER.warning("Platform enrichment failed: %s", perr)
+                    self._payload_fingerprint = fingerprint
+                self._clear_stale()
                 # Mark successful update time
                 from datetime import datetime, timezone
                 self.last_successful_update = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+                self.received_since_setup = True
                 self.last_api_error = None
                 ir.async_delete_issue(self.hass, DOMAIN, f"invalid_api_key_{self.entry.entry_id}")
+                self._save_snapshot(data)
                 return data
             else:
                 stop_id = self.entry.data[CONF_STOP_ID]
                 _LOGGER.debug("Fetching %s for stop %s", sensor_type, stop_id)
+                # Failed polls retry at the configured interval
+                self.update_interval = self._pace
                 if sensor_type == SENSOR_TYPE_ARRIVAL:
                     data = await self.api_client.get_arrivals(stop_id)
                 else:
@@ -203,11 +791,33 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
                     _LOGGER.debug("Found %d departures", len(data["departures"]))
                 else:
                     _LOGGER.warning("No departure/arrival data at top level: %s", list(data.keys()))
+                # Keep only the compact projection the sensors read; the raw
+                # payload is released once this update completes.
+                near = TimetableBoard.from_api(
+                    data,
+                    KIND_ARRIVALS if sensor_type == SENSOR_TYPE_ARRIVAL else KIND_DEPARTURES,
+                )
+                data = self._near = near
+                if self._prefetch_windows:
+                    await self._async_prefetch(stop_id, sensor_type)
+                    data = self._merge_prefetched(near)
+                if data == self.data:
+                    # Board unchanged since the last poll: return the previous
+                    # object so listeners are not called (always_update=False).
+                    _LOGGER.debug("%s board unchanged; keeping previous data", sensor_type)
+                    data = self.data
+                self._clear_stale()
+                if self._adaptive:
+                    self._apply_adaptive_interval(data)
+                # Entries sharing the stop merge their own prefetched windows
+                self._stop_feeds.publish(self._feed_key, near, self)
                 # Mark successful update time (UTC ISO8601 without microseconds)
                 from datetime import datetime, timezone
                 self.last_successful_update = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+                self.received_since_setup = True
                 self.last_api_error = None
                 ir.async_delete_issue(self.hass, DOMAIN, f"invalid_api_key_{self.entry.entry_id}")
+                self._save_snapshot(data)
                 return data
             
         except TrafikLabAuthError as err:
@@ -215,6 +825,7 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
                 "code": err.error_code or "auth_error",
                 "message": str(err),
                 "http_status": err.http_status,
+                "circuit_state": self.circuit_state,
             }
             _LOGGER.error(
                 "Authentication error for %s — API key is invalid or unauthorized: %s",
@@ -236,34 +847,57 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
                 "code": err.error_code or "quota_exceeded",
                 "message": str(err),
                 "http_status": err.http_status,
+                "circuit_state": self.circuit_state,
             }
             _LOGGER.warning(
                 "Quota or rate-limit exceeded for %s: %s", self.entry.title, err
             )
+            if (stale := self._stale_data(err)) is not None:
+                return stale
             raise UpdateFailed(f"Quota exceeded: {err}") from err
         except TrafikLabServerError as err:
             self.last_api_error = {
                 "code": err.error_code or "server_error",
                 "message": str(err),
                 "http_status": err.http_status,
+                "circuit_state": self.circuit_state,
             }
             _LOGGER.warning(
                 "Trafiklab server error for %s: %s", self.entry.title, err
             )
+            if (stale := self._stale_data(err)) is not None:
+                return stale
             raise UpdateFailed(f"Server error: {err}") from err
+        except TrafikLabUnavailableError as err:
+            self.last_api_error = {
+                "code": err.error_code or "circuit_open",
+                "message": str(err),
+                "http_status": err.http_status,
+                "circuit_state": self.circuit_state,
+            }
+            # Already logged once when the circuit opened
+            _LOGGER.debug("Skipping update for %s: %s", self.entry.title, err)
+            if (stale := self._stale_data(err)) is not None:
+                return stale
+            raise UpdateFailed(f"Service unavailable: {err}") from err
         except TrafikLabApiError as err:
             self.last_api_error = {
                 "code": err.error_code or "api_error",
                 "message": str(err),
                 "http_status": err.http_status,
+                "circuit_state": self.circuit_state,
             }
             _LOGGER.error("Error communicating with API: %s", err)
+            # Timeouts and connection errors
+            if (stale := self._stale_data(err)) is not None:
+                return stale
             raise UpdateFailed(f"Error communicating with API: {err}") from err
         except Exception as err:
             self.last_api_error = {
                 "code": "unexpected_error",
                 "message": str(err),
                 "http_status": None,
+                "circuit_state": self.circuit_state,
             }
             _LOGGER.error("Unexpected error communicating with API: %s", err)
             raise UpdateFailed(f"Error communicating with API: {err}") from err
@@ -275,12 +909,16 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
         - Ensures each trip's LegList.Leg is a list.
         - Sorts trips by first leg origin datetime (ascending).
         - Sorts legs within each trip by origin datetime (ascending).
+
+        The response may be shared with other callers (coalesced requests), so
+        the envelope, trips and legs are copied rather than modified in place.
         """
         from datetime import datetime
 
         if not isinstance(data, dict):
             return data
 
+        data = dict(data)
         trips = data.get("Trip")
         if trips is None:
             data["Trip"] = []
@@ -292,14 +930,8 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
             org = leg.get("Origin", {}) or {}
             d = org.get("date") or org.get("rtDate") or "9999-12-31"
             t = org.get("time") or org.get("rtTime") or "23:59:59"
-            # Try with seconds, fallback without
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                try:
-                    return (datetime.strptime(f"{d} {t}", fmt),)
-                except Exception:
-                    continue
             # Unparsable -> push to end, include secondary sort key to keep stability
-            return (datetime.max,)
+            return (parse_resrobot_datetime(d, t) or datetime.max,)
 
         normalized_trips: list[dict] = []
         for trip in trips:
@@ -307,9 +939,9 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
             if legs is None:
                 legs_list: list[dict] = []
             elif isinstance(legs, dict):
-                legs_list = [legs]
+                legs_list = [dict(legs)]
             else:
-                legs_list = list(legs)
+                legs_list = [dict(lg) for lg in legs]
             # Sort legs by origin datetime
             legs_list.sort(key=lambda lg: (parse_dt(lg)[0], lg.get("idx", 0)))
             # Write back sorted list
@@ -328,12 +960,7 @@ class TrafikLabCoordinator(DataUpdateCoordinator):
             org = (tp or {}).get("Origin", {}) or {}
             d = org.get("date") or "9999-12-31"
             t = org.get("time") or "23:59:59"
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                try:
-                    return datetime.strptime(f"{d} {t}", fmt)
-                except Exception:
-                    continue
-            return datetime.max
+            return parse_resrobot_datetime(d, t) or datetime.max
 
         normalized_trips.sort(key=trip_key)
         data["Trip"] = normalized_trips
@@ -416,16 +1043,7 @@ async def enrich_platform_for_trips(
             ext_id = origin.get("extId", "").strip()
             if not ext_id:
                 continue
-            date_str = origin.get("date", "")
-            time_str = origin.get("time", "")
-            if not date_str or not time_str:
-                continue
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                try:
-                    dep_dt = datetime.strptime(f"{date_str} {time_str[:8]}", fmt)
-                    break
-                except ValueError:
-                    dep_dt = None
+            dep_dt = parse_resrobot_datetime(origin.get("date", ""), origin.get("time", "")[:8])
             if dep_dt is None:
                 continue
             if ext_id not in stop_earliest or dep_dt < stop_earliest[ext_id]:
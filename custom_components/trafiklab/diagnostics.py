@@ -16,8 +16,19 @@ from homeassistant.core import HomeAssistant
 from homeassistant.const import __version__ as HA_VERSION
 from homeassistant.loader import async_get_integration
 
-from .api import TrafikLabApiClient, TrafikLabApiError
+from .api import (
+    ENDPOINT_DEPARTURES,
+    RetryPolicy,
+    TrafikLabApiClient,
+    TrafikLabApiError,
+    circuit_breaker_states,
+    get_rate_limiter,
+    get_request_stats,
+    get_response_cache,
+)
 from .const import CONF_API_KEY, CONF_STOP_ID, DOMAIN
+from .models import TimetableBoard, TimetableEntry
+from .quota import async_get_quota_planner
 
 # Keys to redact from diagnostics data for privacy
 TO_REDACT = {
@@ -59,7 +70,21 @@ async def async_get_config_entry_diagnostics(
             "last_exception": str(coordinator.last_exception) if coordinator.last_exception else None,
             "update_interval": str(coordinator.update_interval),
             "data_available": coordinator.data is not None,
+            "last_api_error": coordinator.last_api_error,
+            "shared_feed_members": coordinator.shared_feed_members,
+            "restored_from_snapshot": coordinator.restored_from_snapshot,
+            "budget_factor": coordinator.budget_factor,
+            "estimated_requests_per_hour": round(coordinator.estimated_request_rate() * 3600, 1),
         },
+        "api_cache": get_response_cache().stats(),
+        "rate_limit": (
+            get_rate_limiter(entry.data[CONF_API_KEY]).stats()
+            if entry.data.get(CONF_API_KEY)
+            else None
+        ),
+        "circuit_breakers": circuit_breaker_states(),
+        "api_requests": get_request_stats().stats(),
+        "quota_plan": (await async_get_quota_planner(hass)).plan_for(coordinator.api_key),
         "entities": {},
         "api_test": {},
     }
@@ -77,6 +102,11 @@ async def async_get_config_entry_diagnostics(
                     sample_departure = departures[0]
                     if isinstance(sample_departure, dict):
                         diagnostics_data["coordinator"]["sample_departure_structure"] = list(sample_departure.keys())
+        elif isinstance(coordinator_data, TimetableBoard):
+            diagnostics_data["coordinator"]["data_type"] = "TimetableBoard"
+            diagnostics_data["coordinator"]["board_kind"] = coordinator_data.kind
+            diagnostics_data["coordinator"]["entry_count"] = len(coordinator_data.entries)
+            diagnostics_data["coordinator"]["entry_fields"] = list(TimetableEntry.__slots__)
         else:
             diagnostics_data["coordinator"]["data_type"] = type(coordinator_data).__name__
     
@@ -101,7 +131,11 @@ async def async_get_config_entry_diagnostics(
         stop_id = entry.data[CONF_STOP_ID]
         
         try:
-            async with TrafikLabApiClient(api_key) as client:
+            # Single attempt: report connectivity as-is rather than retrying
+            async with TrafikLabApiClient(
+                api_key,
+                retry_policies={ENDPOINT_DEPARTURES: RetryPolicy(max_attempts=1)},
+            ) as client:
                 # Test API connectivity
                 start_time = asyncio.get_event_loop().time()
                 result = await client.get_departures(stop_id)
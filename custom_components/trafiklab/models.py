@@ -0,0 +1,330 @@
+"""Compact in-memory records for Realtime API timetables.
+
+The Realtime API returns a large payload per stop (``stops``, ``query`` and a
+nested ``route``/``trip``/``agency``/platform dict per departure) while the
+sensors read only a dozen fields. Coordinators project each response into a
+TimetableBoard of slotted TimetableEntry records once per update and drop the
+raw payload, so memory held between updates stays proportional to what is
+actually exposed.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from .const import CONF_DIRECTION, CONF_LINE_FILTER, CONF_TRANSPORT_MODES
+
+KIND_DEPARTURES = "departures"
+KIND_ARRIVALS = "arrivals"
+
+
+def _parse_time(value: str) -> tuple[float | None, str]:
+    """Return (epoch seconds, "HH:MM") for an ISO 8601 time, or (None, "").
+
+    Naive times are interpreted as local time, as the sensors always did.
+    """
+    if not value:
+        return None, ""
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None, ""
+    return dt.timestamp(), dt.strftime("%H:%M")
+
+
+class TimetableEntry:
+    """One departure or arrival, reduced to the fields the sensors use."""
+
+    __slots__ = (
+        "line",
+        "destination",
+        "transport_mode",
+        "route_name",
+        "agency",
+        "trip_id",
+        "scheduled",
+        "expected",
+        "timestamp",
+        "time_formatted",
+        "is_realtime",
+        "delay",
+        "canceled",
+        "realtime_platform",
+        "scheduled_platform",
+    )
+
+    def __init__(
+        self,
+        *,
+        line: str = "",
+        destination: str = "",
+        transport_mode: str = "",
+        route_name: str = "",
+        agency: str = "",
+        trip_id: str = "",
+        scheduled: str = "",
+        expected: str = "",
+        is_realtime: bool = False,
+        delay: int = 0,
+        canceled: bool | None = None,
+        realtime_platform: str = "",
+        scheduled_platform: str = "",
+    ) -> None:
+        self.line = line
+        self.destination = destination
+        self.transport_mode = transport_mode
+        self.route_name = route_name
+        self.agency = agency
+        self.trip_id = trip_id
+        self.scheduled = scheduled
+        self.expected = expected
+        # Epoch seconds and "HH:MM" of the expected time, falling back to the
+        # scheduled time when there is no realtime estimate.
+        self.timestamp, self.time_formatted = _parse_time(expected or scheduled)
+        self.is_realtime = is_realtime
+        self.delay = delay
+        self.canceled = canceled
+        self.realtime_platform = realtime_platform
+        self.scheduled_platform = scheduled_platform
+
+    @classmethod
+    def from_api(cls, item: dict[str, Any]) -> TimetableEntry:
+        """Project one Realtime API departure/arrival dict."""
+        route = item.get("route") or {}
+        return cls(
+            line=route.get("designation") or "",
+            destination=route.get("direction") or "",
+            transport_mode=route.get("transport_mode") or "",
+            route_name=route.get("name") or "",
+            agency=(item.get("agency") or {}).get("name") or "",
+            trip_id=(item.get("trip") or {}).get("trip_id") or "",
+            scheduled=item.get("scheduled") or "",
+            expected=item.get("realtime") or "",
+            is_realtime=bool(item.get("is_realtime", False)),
+            delay=int(item.get("delay") or 0),
+            canceled=item.get("canceled"),
+            realtime_platform=(item.get("realtime_platform") or {}).get("designation") or "",
+            scheduled_platform=(item.get("scheduled_platform") or {}).get("designation") or "",
+        )
+
+    @property
+    def platform(self) -> str:
+        """Realtime platform, falling back to the scheduled one."""
+        return self.realtime_platform or self.scheduled_platform
+
+    def minutes_until(self, now: float) -> int | None:
+        """Whole minutes from *now* (epoch seconds) until this entry, if known."""
+        if self.timestamp is None:
+            return None
+        return int((self.timestamp - now) / 60)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the constructor arguments, for storage."""
+        return {name: getattr(self, name) for name in _ENTRY_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TimetableEntry:
+        """Rebuild an entry stored with as_dict; unknown keys are ignored."""
+        return cls(**{name: data[name] for name in _ENTRY_FIELDS if name in data})
+
+    def _key(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TimetableEntry):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"<TimetableEntry {self.line} {self.destination!r} {self.expected or self.scheduled}>"
+
+
+# Stored fields; timestamp and time_formatted are derived in __init__
+_ENTRY_FIELDS = tuple(
+    name for name in TimetableEntry.__slots__ if name not in ("timestamp", "time_formatted")
+)
+
+
+class TimetableBoard:
+    """Projected departures or arrivals for one stop.
+
+    Entry positions are indexed by line designation and (upper case)
+    transport mode when the board is built, so filters on those are lookups
+    rather than scans; busy stops list hundreds of entries.
+    """
+
+    __slots__ = ("kind", "entries", "timestamp", "by_line", "by_mode")
+
+    def __init__(
+        self, kind: str, entries: tuple[TimetableEntry, ...], timestamp: str = ""
+    ) -> None:
+        self.kind = kind
+        self.entries = entries
+        # Server timestamp of the response the board was projected from
+        self.timestamp = timestamp
+        self.by_line: dict[str, list[int]] = {}
+        self.by_mode: dict[str, list[int]] = {}
+        for pos, entry in enumerate(entries):
+            self.by_line.setdefault(entry.line, []).append(pos)
+            self.by_mode.setdefault(entry.transport_mode.upper(), []).append(pos)
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any], kind: str) -> TimetableBoard:
+        """Project a Realtime API departures/arrivals response."""
+        items = data.get(kind)
+        if not isinstance(items, list):
+            items = []
+        return cls(
+            kind,
+            tuple(TimetableEntry.from_api(it) for it in items if isinstance(it, dict)),
+            data.get("timestamp") or "",
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TimetableBoard:
+        """Rebuild a board stored with as_dict."""
+        return cls(
+            data["kind"],
+            tuple(TimetableEntry.from_dict(it) for it in data.get("entries") or ()),
+            data.get("timestamp") or "",
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable form, for storage."""
+        return {
+            "kind": self.kind,
+            "entries": [entry.as_dict() for entry in self.entries],
+            "timestamp": self.timestamp,
+        }
+
+    def upcoming(self, now: float) -> TimetableBoard:
+        """Return the board without entries whose time is before *now*."""
+        entries = tuple(e for e in self.entries if e.timestamp is None or e.timestamp >= now)
+        if len(entries) == len(self.entries):
+            return self
+        return TimetableBoard(self.kind, entries, self.timestamp)
+
+    def __eq__(self, other: object) -> bool:
+        """Boards are equal when they list the same entries.
+
+        The response timestamp is ignored; it changes on every poll.
+        """
+        if not isinstance(other, TimetableBoard):
+            return NotImplemented
+        return self.kind == other.kind and self.entries == other.entries
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"<TimetableBoard {self.kind}: {len(self.entries)} entries>"
+
+
+def _identity(entry: TimetableEntry) -> tuple:
+    """Key identifying the same vehicle run across responses."""
+    if entry.trip_id:
+        return (entry.trip_id,)
+    return (entry.line, entry.destination, entry.scheduled)
+
+
+def merge_timeline(
+    near: TimetableBoard, prefetched: Iterable[TimetableEntry], horizon: float
+) -> TimetableBoard:
+    """Extend *near* with prefetched entries later than *horizon* (epoch seconds).
+
+    *near* is the latest response for the coming window and authoritative up
+    to *horizon*; prefetched entries before it are dropped, as are entries
+    for trips *near* already lists. The result is ordered by time.
+    """
+    seen = {_identity(e) for e in near.entries}
+    later: list[TimetableEntry] = []
+    for entry in prefetched:
+        if entry.timestamp is None or entry.timestamp <= horizon:
+            continue
+        key = _identity(entry)
+        if key not in seen:
+            seen.add(key)
+            later.append(entry)
+    if not later:
+        return near
+    entries = sorted(
+        (*near.entries, *later),
+        key=lambda e: e.timestamp if e.timestamp is not None else float("inf"),
+    )
+    return TimetableBoard(near.kind, tuple(entries), near.timestamp)
+
+
+def as_timetable_board(data: Any, kind: str) -> TimetableBoard | None:
+    """Return *data* as a TimetableBoard, projecting a raw API dict if needed."""
+    if isinstance(data, TimetableBoard):
+        return data
+    if isinstance(data, dict):
+        return TimetableBoard.from_api(data, kind)
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class EntryFilter:
+    """Line, destination and transport mode filters of one entry, compiled.
+
+    Empty filters match all. Call it on a single entry, or use select() to
+    filter a whole board through its indexes.
+    """
+
+    lines: frozenset[str] = frozenset()
+    direction_tokens: tuple[str, ...] = ()
+    transport_modes: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> EntryFilter:
+        """Compile the filters of *config*, the merged entry data and options."""
+        line_filter = config.get(CONF_LINE_FILTER) or ""
+        return cls(
+            frozenset(ln.strip() for ln in line_filter.split(",") if ln.strip()),
+            tuple(
+                t.strip().lower()
+                for t in (config.get(CONF_DIRECTION) or "").split(",")
+                if t.strip()
+            ),
+            frozenset(m.upper() for m in (config.get(CONF_TRANSPORT_MODES) or []) if m),
+        )
+
+    def __call__(self, entry: TimetableEntry) -> bool:
+        if self.lines and entry.line not in self.lines:
+            return False
+        if self.transport_modes and entry.transport_mode.upper() not in self.transport_modes:
+            return False
+        return self._destination_matches(entry)
+
+    def _destination_matches(self, entry: TimetableEntry) -> bool:
+        if not self.direction_tokens:
+            return True
+        dest_lower = entry.destination.lower()
+        return any(tok in dest_lower for tok in self.direction_tokens)
+
+    def select(self, board: TimetableBoard) -> list[TimetableEntry]:
+        """Return the matching entries of *board*, in board order."""
+        if not self.lines and not self.transport_modes:
+            return [e for e in board.entries if self._destination_matches(e)]
+        positions: set[int] | None = None
+        if self.lines:
+            positions = {p for ln in self.lines for p in board.by_line.get(ln, ())}
+        if self.transport_modes:
+            by_mode = {p for m in self.transport_modes for p in board.by_mode.get(m, ())}
+            positions = by_mode if positions is None else positions & by_mode
+        return [
+            entry
+            for entry in (board.entries[p] for p in sorted(positions or ()))
+            if self._destination_matches(entry)
+        ]
+
+
+def build_entry_filter(config: Mapping[str, Any]) -> EntryFilter:
+    """Return the compiled line, destination and mode filters of an entry.
+
+    *config* is the merged entry data and options. Empty filters match all.
+    """
+    return EntryFilter.from_config(config)
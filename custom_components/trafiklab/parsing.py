@@ -0,0 +1,84 @@
+"""Parsing of Resrobot dates, times and durations.
+
+Resrobot gives every origin and destination a local ``date`` (``YYYY-MM-DD``)
+and ``time`` (``HH:MM:SS``, sometimes ``HH:MM``) without an offset, and leg
+durations as ISO 8601 durations (``PT1H5M``). A 50-trip response is parsed
+several times over (normalizing, enriching platforms, building attributes),
+so the fixed layouts are matched with precompiled patterns instead of trying
+``strptime`` formats, and dates, which repeat for nearly every leg, are
+memoized. Anything the fast path does not recognise falls back to
+``strptime`` with the formats used before.
+
+Datetimes are naive and in local time, as the sensors always compared them
+against ``datetime.now()``.
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+_DATE_RE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+_TIME_RE = re.compile(r"(\d{2}):(\d{2})(?::(\d{2}))?")
+_ISO_DURATION_RE = re.compile(
+    r"^P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$",
+    re.IGNORECASE,
+)
+_FALLBACK_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+
+
+@lru_cache(maxsize=32)
+def _parse_date(value: str) -> tuple[int, int, int] | None:
+    match = _DATE_RE.fullmatch(value)
+    if match is None:
+        return None
+    return int(match[1]), int(match[2]), int(match[3])
+
+
+def _strptime(value: str) -> datetime | None:
+    for fmt in _FALLBACK_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_resrobot_datetime(date_str: str | None, time_str: str | None) -> datetime | None:
+    """Combine a Resrobot ``date`` and ``time`` into a naive local datetime.
+
+    Returns None when either part is missing or invalid.
+    """
+    if not date_str or not time_str:
+        return None
+    ymd = _parse_date(date_str)
+    match = _TIME_RE.fullmatch(time_str)
+    if ymd is not None and match is not None:
+        try:
+            return datetime(*ymd, int(match[1]), int(match[2]), int(match[3] or 0))
+        except ValueError:
+            return None
+    return _strptime(f"{date_str} {time_str}")
+
+
+def parse_resrobot_timestamp(value: str | None) -> datetime | None:
+    """Parse a ``"YYYY-MM-DD HH:MM[:SS]"`` string as built for leg attributes."""
+    if not value:
+        return None
+    date_str, sep, time_str = value.partition(" ")
+    if not sep:
+        return None
+    return parse_resrobot_datetime(date_str, time_str)
+
+
+def parse_iso_duration_minutes(value: Any) -> int | None:
+    """Parse an ISO 8601 duration (e.g. PT1H30M, P1DT2H, PT45S) into whole minutes."""
+    if not isinstance(value, str) or not value:
+        return None
+    match = _ISO_DURATION_RE.match(value)
+    if match is None:
+        return None
+    weeks, days, hours, minutes, seconds = (int(v or 0) for v in match.groups())
+    return ((weeks * 7 + days) * 24 + hours) * 60 + minutes + seconds // 60
@@ -0,0 +1,286 @@
+"""Monthly quota planning across all Trafiklab coordinators.
+
+Trafiklab keys come with a monthly request quota (and a per-minute one) that
+depends on the key's tier. Entries can state the quotas of their key; the
+planner then counts every request made with the key, persists the counts
+for the current month and, every few minutes, spreads what is left of the
+budget over the rest of the month.
+
+Each coordinator reports the request rate it would make unthrottled, from
+its refresh interval, time-of-day schedule and how often its update
+condition has been true. Entries sharing a stop board (see stop_feed.py)
+make one request per interval between them and are planned as one. When
+the demand of all entries using a key exceeds the allowance, intervals are
+stretched by weighted water-filling: with priority weights ``w`` each group
+is slowed by ``max(1, level / w)``, with the level chosen so the stretched
+demand fits. Low priority entries slow down first and the most.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from calendar import monthrange
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .api import RequestHook, RequestInfo, configure_key_rate_limit, register_request_hook
+from .const import DOMAIN, POLL_PRIORITY_WEIGHTS, QUOTA_RESERVE
+from .storage import DelayedStore, async_get_loaded
+
+if TYPE_CHECKING:
+    from .coordinator import TrafikLabCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.quota_usage"
+SAVE_DELAY = 60  # seconds
+REPLAN_INTERVAL = timedelta(minutes=15)
+
+SIGNAL_QUOTA_PLAN_UPDATED = f"{DOMAIN}_quota_plan_updated"
+
+_DATA_QUOTA_PLANNER = f"{DOMAIN}_quota_planner"
+
+
+def key_id(api_key: str) -> str:
+    """Short, non-reversible identifier of an API key for storage and logs."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def month_of(now: datetime) -> str:
+    return f"{now.year:04d}-{now.month:02d}"
+
+
+def seconds_to_month_end(now: datetime) -> float:
+    """Seconds from *now* until the start of the next month (same time zone)."""
+    days = monthrange(now.year, now.month)[1]
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return max(((start + timedelta(days=days)) - now).total_seconds(), 1.0)
+
+
+def budget_factors(
+    groups: Iterable[tuple[float, float, float]], allowance: float
+) -> list[float]:
+    """Return the interval stretch factor of each ``(rate, weight, max_factor)`` group.
+
+    *rate* is the group's unthrottled requests per second and *allowance*
+    the rate all groups together may use. Factors are ``max(1, level /
+    weight)``, capped at *max_factor*, for the lowest level that brings the
+    total within the allowance (or the caps, if even they cannot).
+    """
+    groups = list(groups)
+    if sum(rate for rate, _, _ in groups) <= allowance:
+        return [1.0] * len(groups)
+
+    def _factors(level: float) -> list[float]:
+        return [min(max(1.0, level / weight), cap) for _, weight, cap in groups]
+
+    def _total(level: float) -> float:
+        return sum(rate / f for (rate, _, _), f in zip(groups, _factors(level)))
+
+    low = 0.0
+    high = max((weight * cap for _, weight, cap in groups), default=1.0)
+    for _ in range(60):
+        mid = (low + high) / 2
+        if _total(mid) > allowance:
+            low = mid
+        else:
+            high = mid
+    return _factors(high)
+
+
+class QuotaPlanner(RequestHook):
+    """Counts requests per API key and paces coordinators to the monthly quota."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._store = DelayedStore(
+            hass, STORAGE_VERSION, STORAGE_KEY, SAVE_DELAY, self._data_to_save
+        )
+        self._month = month_of(dt_util.now())
+        self._counts: dict[str, int] = {}
+        self._coordinators: dict[str, TrafikLabCoordinator] = {}
+        self._plans: dict[str, dict[str, Any]] = {}
+        # Keys whose rate limiter was set from a per-minute quota
+        self._minute_limited: set[str] = set()
+        self._unsub_hook: CALLBACK_TYPE | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._plan_pending = False
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if (
+            isinstance(stored, dict)
+            and stored.get("month") == self._month
+            and isinstance(stored.get("counts"), dict)
+        ):
+            self._counts = {k: int(v) for k, v in stored["counts"].items()}
+
+    # -- request counting ---------------------------------------------------
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        if not info.api_key:
+            return
+        self._roll_month(dt_util.now())
+        key = key_id(info.api_key)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._store.async_schedule_save()
+
+    def used(self, api_key: str) -> int:
+        """Requests made with *api_key* so far this month."""
+        return self._counts.get(key_id(api_key), 0)
+
+    def _roll_month(self, now: datetime) -> None:
+        month = month_of(now)
+        if month != self._month:
+            self._month = month
+            self._counts = {}
+            self._store.async_schedule_save()
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"month": self._month, "counts": self._counts}
+
+    # -- planning -----------------------------------------------------------
+
+    @callback
+    def async_register(self, coordinator: TrafikLabCoordinator) -> CALLBACK_TYPE:
+        """Plan *coordinator* together with the rest; returns a function removing it."""
+        entry_id = coordinator.entry.entry_id
+        self._coordinators[entry_id] = coordinator
+        if self._unsub_hook is None:
+            self._unsub_hook = register_request_hook(self)
+            self._unsub_timer = async_track_time_interval(
+                self._hass, self._handle_replan, REPLAN_INTERVAL
+            )
+        self._async_schedule_plan()
+
+        @callback
+        def _unregister() -> None:
+            if self._coordinators.get(entry_id) is coordinator:
+                del self._coordinators[entry_id]
+            if not self._coordinators:
+                self._stop()
+            self._async_schedule_plan()
+
+        return _unregister
+
+    @callback
+    def _stop(self) -> None:
+        if self._unsub_hook is not None:
+            self._unsub_hook()
+            self._unsub_hook = None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _async_schedule_plan(self) -> None:
+        """Plan once the current loop iteration is done.
+
+        Entries set up together register one after another; planning after
+        each would be quadratic in the number of entries.
+        """
+        if not self._plan_pending:
+            self._plan_pending = True
+            self._hass.loop.call_soon(self._run_scheduled_plan)
+
+    @callback
+    def _run_scheduled_plan(self) -> None:
+        self._plan_pending = False
+        self.async_plan()
+
+    @callback
+    def _handle_replan(self, _now: datetime) -> None:
+        self.async_plan()
+
+    @callback
+    def async_plan(self) -> None:
+        """Recompute the budget of every API key and apply it to its coordinators."""
+        now = dt_util.now()
+        self._roll_month(now)
+        seconds_left = seconds_to_month_end(now)
+        by_key: dict[str, list[TrafikLabCoordinator]] = {}
+        for coordinator in self._coordinators.values():
+            by_key.setdefault(coordinator.api_key, []).append(coordinator)
+
+        plans: dict[str, dict[str, Any]] = {}
+        minute_limited: set[str] = set()
+        for api_key, coordinators in by_key.items():
+            monthly = max(c.monthly_quota for c in coordinators)
+            per_minute = min((c.minute_quota for c in coordinators if c.minute_quota), default=0)
+            if per_minute:
+                configure_key_rate_limit(api_key, per_minute)
+                minute_limited.add(api_key)
+            if not monthly and not per_minute:
+                for coordinator in coordinators:
+                    coordinator.set_budget_factor(1.0)
+                continue
+            plans[api_key] = self._plan_key(
+                api_key, coordinators, monthly, per_minute, seconds_left
+            )
+        for api_key in self._minute_limited - minute_limited:
+            configure_key_rate_limit(api_key, None)
+        self._minute_limited = minute_limited
+        self._plans = plans
+        async_dispatcher_send(self._hass, SIGNAL_QUOTA_PLAN_UPDATED)
+
+    def _plan_key(
+        self,
+        api_key: str,
+        coordinators: list[TrafikLabCoordinator],
+        monthly: int,
+        per_minute: int,
+        seconds_left: float,
+    ) -> dict[str, Any]:
+        used = self.used(api_key)
+        allowances = []
+        if monthly:
+            allowances.append(max(monthly * QUOTA_RESERVE - used, 0) / seconds_left)
+        if per_minute:
+            allowances.append(per_minute * QUOTA_RESERVE / 60)
+        allowance = min(allowances)
+
+        # Entries sharing a stop board make one request per interval together
+        groups: dict[Any, list[TrafikLabCoordinator]] = {}
+        for coordinator in coordinators:
+            groups.setdefault(coordinator.budget_group, []).append(coordinator)
+        demand = [
+            (
+                max(c.estimated_request_rate() for c in members),
+                max(POLL_PRIORITY_WEIGHTS[c.poll_priority] for c in members),
+                min(c.max_budget_factor for c in members),
+            )
+            for members in groups.values()
+        ]
+        factors = budget_factors(demand, allowance)
+        for members, factor in zip(groups.values(), factors):
+            for coordinator in members:
+                coordinator.set_budget_factor(factor)
+
+        planned_rate = sum(rate / f for (rate, _, _), f in zip(demand, factors))
+        plan = {
+            "monthly_quota": monthly or None,
+            "minute_quota": per_minute or None,
+            "used": used,
+            "allowed_per_hour": round(allowance * 3600, 1),
+            "planned_per_hour": round(planned_rate * 3600, 1),
+            "projected": int(used + planned_rate * seconds_left),
+            "month": self._month,
+        }
+        _LOGGER.debug("Quota plan for key %s: %s", key_id(api_key), plan)
+        return plan
+
+    def plan_for(self, api_key: str) -> dict[str, Any] | None:
+        """Latest plan of *api_key*, None when it has no quota configured."""
+        return self._plans.get(api_key)
+
+
+async def async_get_quota_planner(hass: HomeAssistant) -> QuotaPlanner:
+    """Return the loaded planner shared by all Trafiklab entries."""
+    return await async_get_loaded(hass, _DATA_QUOTA_PLANNER, QuotaPlanner)
@@ -0,0 +1,146 @@
+"""Time-of-day refresh schedules.
+
+A schedule is a list of rules, separated by ``;`` or new lines::
+
+    mon-fri 06:30-09:00=60; mon-fri 15:30-18:00=120; sat,sun 09:00-12:00=300
+
+Each rule is ``[days] HH:MM-HH:MM=SECONDS``. Days are ``mon``..``sun``, ranges
+(``mon-fri``) and comma separated lists, or ``daily``; without days the rule
+applies every day. The time range is local time, end exclusive, and may end
+at ``24:00`` but not wrap past midnight. The first matching rule wins; outside
+all rules the entry's refresh interval applies.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from .const import MINIMUM_SCAN_INTERVAL
+
+MAXIMUM_SCHEDULE_INTERVAL = 3600
+
+_DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_RULE_RE = re.compile(
+    r"^(?:(?P<days>[a-z,\-]+)\s+)?"
+    r"(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})\s*=\s*(?P<interval>\d+)$"
+)
+
+
+class ScheduleError(ValueError):
+    """Raised for a schedule string that cannot be parsed."""
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleRule:
+    """One ``days start-end=interval`` rule; times are minutes after midnight."""
+
+    weekdays: frozenset[int]
+    start: int
+    end: int
+    interval: int
+
+    def matches(self, when: datetime) -> bool:
+        minute = when.hour * 60 + when.minute
+        return when.weekday() in self.weekdays and self.start <= minute < self.end
+
+
+def _parse_days(text: str | None) -> frozenset[int]:
+    if not text or text == "daily":
+        return frozenset(range(7))
+    days: set[int] = set()
+    for part in text.split(","):
+        first, sep, last = part.partition("-")
+        if first not in _DAYS or (sep and last not in _DAYS):
+            raise ScheduleError(f"Unknown day '{part}'")
+        lo = _DAYS.index(first)
+        hi = _DAYS.index(last) if sep else lo
+        if hi < lo:
+            raise ScheduleError(f"Day range '{part}' runs backwards")
+        days.update(range(lo, hi + 1))
+    return frozenset(days)
+
+
+def _parse_minutes(text: str) -> int:
+    hours, minutes = (int(v) for v in text.split(":"))
+    if minutes > 59 or hours > 24 or (hours == 24 and minutes):
+        raise ScheduleError(f"Invalid time '{text}'")
+    return hours * 60 + minutes
+
+
+def _parse_rule(text: str) -> ScheduleRule:
+    match = _RULE_RE.match(text.lower())
+    if not match:
+        raise ScheduleError(f"Cannot parse rule '{text}', expected e.g. 'mon-fri 06:30-09:00=60'")
+    start = _parse_minutes(match["start"])
+    end = _parse_minutes(match["end"])
+    if end <= start:
+        raise ScheduleError(f"Time range in '{text}' must end after it starts")
+    interval = int(match["interval"])
+    if not MINIMUM_SCAN_INTERVAL <= interval <= MAXIMUM_SCHEDULE_INTERVAL:
+        raise ScheduleError(
+            f"Interval in '{text}' must be between {MINIMUM_SCAN_INTERVAL} "
+            f"and {MAXIMUM_SCHEDULE_INTERVAL} seconds"
+        )
+    return ScheduleRule(_parse_days(match["days"]), start, end, interval)
+
+
+class RefreshSchedule:
+    """Parsed refresh schedule."""
+
+    def __init__(self, rules: tuple[ScheduleRule, ...]) -> None:
+        self.rules = rules
+        # Weekly refreshes made inside the rules and minutes outside them, so
+        # mean_rate does not walk the week on every call
+        self._covered_refreshes = 0.0
+        self._uncovered_minutes = 0
+        for weekday in range(7):
+            day_rules = [rule for rule in rules if weekday in rule.weekdays]
+            bounds = sorted({0, 24 * 60, *(m for rule in day_rules for m in (rule.start, rule.end))})
+            # No rule starts or ends inside a segment, so one rule covers it all
+            for start, end in zip(bounds, bounds[1:]):
+                rule = next((r for r in day_rules if r.start <= start < r.end), None)
+                if rule is None:
+                    self._uncovered_minutes += end - start
+                else:
+                    self._covered_refreshes += (end - start) * 60 / rule.interval
+
+    @classmethod
+    def parse(cls, text: str) -> RefreshSchedule:
+        """Parse a schedule string; an empty string gives an empty schedule."""
+        parts = (p.strip() for p in re.split(r"[;\n]", text or ""))
+        return cls(tuple(_parse_rule(p) for p in parts if p))
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def interval_at(self, when: datetime) -> int | None:
+        """Interval of the first rule covering *when*, or None outside all rules."""
+        for rule in self.rules:
+            if rule.matches(when):
+                return rule.interval
+        return None
+
+    def mean_rate(self, default: float) -> float:
+        """Average refreshes per second over a week, *default* seconds outside the rules."""
+        refreshes = self._covered_refreshes + self._uncovered_minutes * 60 / default
+        return refreshes / (7 * 24 * 60 * 60)
+
+    def next_change(self, when: datetime) -> datetime | None:
+        """First rule start or end after *when* (within a week), if any."""
+        midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+        for offset in range(8):
+            day = midnight + timedelta(days=offset)
+            minutes = sorted(
+                {
+                    m
+                    for rule in self.rules
+                    if day.weekday() in rule.weekdays
+                    for m in (rule.start, rule.end)
+                }
+            )
+            for minute in minutes:
+                boundary = day + timedelta(minutes=minute)
+                if boundary > when:
+                    return boundary
+        return None
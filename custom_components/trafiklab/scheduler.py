@@ -0,0 +1,111 @@
+"""Domain-wide poll scheduling for Trafiklab coordinators.
+
+Without coordination every entry does its first refresh the moment it is set
+up, and entries with equal refresh intervals then stay in lockstep: N entries
+mean N simultaneous requests at boot and again on every tick. The scheduler
+spaces out first refreshes and gives each coordinator a phase, a fixed
+fraction of its interval, so refreshes land on a per-entry grid instead.
+Phases are spread with the golden ratio, which keeps them evenly distributed
+however many entries there are.
+"""
+from __future__ import annotations
+
+import itertools
+import math
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN, FIRST_REFRESH_SPACING, MINIMUM_SCAN_INTERVAL
+
+_GOLDEN_RATIO_FRACTION = (math.sqrt(5) - 1) / 2
+
+_DATA_POLL_SCHEDULER = f"{DOMAIN}_poll_scheduler"
+
+
+class PollScheduler:
+    """Assigns refresh phases and first-refresh slots to config entries."""
+
+    def __init__(self, hass: HomeAssistant, spacing: float = FIRST_REFRESH_SPACING) -> None:
+        self._hass = hass
+        self._spacing = spacing
+        self._slots: dict[str, int] = {}
+        # Loop time of the next free first-refresh slot
+        self._next_start = 0.0
+
+    @callback
+    def register(self, entry_id: str) -> float:
+        """Reserve a phase for *entry_id* and return it as a fraction of the interval.
+
+        Slots freed by unloaded entries are reused, so reloading an entry keeps
+        the phases spread.
+        """
+        slot = self._slots.get(entry_id)
+        if slot is None:
+            used = set(self._slots.values())
+            slot = next(i for i in itertools.count() if i not in used)
+            self._slots[entry_id] = slot
+        return (slot * _GOLDEN_RATIO_FRACTION) % 1.0
+
+    @callback
+    def unregister(self, entry_id: str) -> None:
+        self._slots.pop(entry_id, None)
+
+    @staticmethod
+    def next_refresh(
+        now: float, interval: float, phase: float, last: float | None = None
+    ) -> float:
+        """Return the first point on the grid ``(phase + k) * interval`` due.
+
+        The point is at least ``max(interval, MINIMUM_SCAN_INTERVAL)`` after
+        *last*, the start of the previous refresh (*now* when unknown), and
+        not before *now*. A refresh that ran off the grid, after a manual
+        refresh or an interval change, therefore never follows the previous
+        one sooner than a full interval.
+        """
+        offset = phase * interval
+        if last is None:
+            last = now
+        earliest = max(now, last + max(interval, MINIMUM_SCAN_INTERVAL))
+        # The tolerance keeps a refresh that ran on the grid on it despite
+        # float rounding
+        return offset + math.ceil((earliest - offset) / interval - 1e-9) * interval
+
+    @callback
+    def startup_delay(self) -> float:
+        """Reserve the next first-refresh slot and return the seconds until it."""
+        now = self._hass.loop.time()
+        start = max(now, self._next_start)
+        self._next_start = start + self._spacing
+        return start - now
+
+    @callback
+    def async_schedule_first_refresh(
+        self, entry: ConfigEntry, coordinator: DataUpdateCoordinator
+    ) -> None:
+        """Run the coordinator's first refresh in the next free startup slot."""
+        delay = self.startup_delay()
+        if delay <= 0:
+            entry.async_create_task(self._hass, coordinator.async_refresh())
+            return
+
+        @callback
+        def _refresh(_now) -> None:
+            if getattr(coordinator, "received_since_setup", False):
+                # Already filled by an entry sharing the same stop; data
+                # restored from a snapshot still needs the refresh
+                return
+            entry.async_create_task(self._hass, coordinator.async_refresh())
+
+        entry.async_on_unload(async_call_later(self._hass, delay, HassJob(_refresh)))
+
+
+@callback
+def async_get_poll_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Return the scheduler shared by all Trafiklab entries."""
+    scheduler: PollScheduler | None = hass.data.get(_DATA_POLL_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[_DATA_POLL_SCHEDULER] = PollScheduler(hass)
+    return scheduler
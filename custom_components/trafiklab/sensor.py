@@ -1,7 +1,10 @@
 """Sensor platform for Trafiklab integration."""
 from __future__ import annotations
 
+import hashlib
 import logging
+import time
+from datetime import datetime
 from typing import Any
 
 from homeassistant.components.sensor import (
@@ -10,26 +13,59 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME, UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_NAME, EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_utc_time_change
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.json import json_bytes_sorted
 
 from .const import (
     DOMAIN,
     CONF_SENSOR_TYPE,
+    CONF_COMPACT_ATTRIBUTES,
     CONF_DIRECTION,
-    CONF_LINE_FILTER,
+    CONF_MAX_LEGS,
     CONF_MAX_TRIP_DURATION,
-    CONF_TRANSPORT_MODES,
+    CONF_MAX_TRIPS,
+    CONF_MAX_UPCOMING,
+    CONF_MATERIAL_ATTRIBUTES,
+    CONF_MONTHLY_QUOTA,
+    DEFAULT_MAX_UPCOMING,
+    VOLATILE_ATTRIBUTES,
     SENSOR_TYPE_ARRIVAL,
     SENSOR_TYPE_RESROBOT,
 )
 from .coordinator import TrafikLabCoordinator
+from .quota import SIGNAL_QUOTA_PLAN_UPDATED, QuotaPlanner, async_get_quota_planner
+from .models import (
+    KIND_ARRIVALS,
+    KIND_DEPARTURES,
+    TimetableEntry,
+    as_timetable_board,
+    build_entry_filter,
+)
+from .parsing import (
+    parse_iso_duration_minutes,
+    parse_resrobot_datetime,
+    parse_resrobot_timestamp,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Fields kept per trip leg with compact attributes
+_COMPACT_LEG_KEYS = (
+    "origin_name",
+    "origin_time",
+    "dest_name",
+    "dest_time",
+    "line_number",
+    "category",
+    "platform",
+)
+
 
 def _slugify(value: str) -> str:
     """Simple slugify helper for entity_id parts: lowercase, underscores, safe chars only."""
@@ -78,12 +114,19 @@ async def async_setup_entry(
         description = SENSOR_DESCRIPTIONS[1]
     else:
         description = SENSOR_DESCRIPTIONS[0]
-    async_add_entities([TrafikLabSensor(coordinator, entry, description)], True)
+    entities: list[SensorEntity] = [TrafikLabSensor(coordinator, entry, description)]
+    if {**entry.data, **entry.options}.get(CONF_MONTHLY_QUOTA):
+        planner = await async_get_quota_planner(hass)
+        entities.append(TrafikLabQuotaSensor(coordinator, entry, planner))
+    async_add_entities(entities)
 
 
 class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
     """Representation of a Trafiklab sensor."""
 
+    # Several KB per state change; kept in the state machine but not recorded
+    _unrecorded_attributes = frozenset({"upcoming", "trips"})
+
     def __init__(
         self,
         coordinator: TrafikLabCoordinator,
@@ -106,6 +149,80 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         else:
             entity_id_base = f"trafiklab_departure_{name_slug}"
         self._attr_suggested_object_id = entity_id_base
+        # State last written, compared by the minute ticker, and a digest of
+        # it with the material attributes, compared on coordinator updates
+        self._written_value: int | None = None
+        self._written_digest: bytes | None = None
+        # Attributes built for the digest, returned for the write that follows
+        self._digested_attributes: dict[str, Any] | None = None
+        # Normalized trips (Resrobot) or filtered entries, derived once per
+        # coordinator update; coordinator.data is a new object on every change
+        self._view_source: Any = None
+        self._view: list = []
+        # Options changes reload the entry, so the filters compile once
+        merged = {**entry.data, **entry.options}
+        self._entry_filter = build_entry_filter(merged)
+        self._max_upcoming = int(merged.get(CONF_MAX_UPCOMING, DEFAULT_MAX_UPCOMING))
+        self._max_trips = int(merged.get(CONF_MAX_TRIPS) or 0)
+        self._max_legs = int(merged.get(CONF_MAX_LEGS) or 0)
+        self._compact = bool(merged.get(CONF_COMPACT_ATTRIBUTES, False))
+        material = {
+            name.strip()
+            for name in str(merged.get(CONF_MATERIAL_ATTRIBUTES) or "").split(",")
+            if name.strip()
+        }
+        self._material_attributes: frozenset[str] | None = frozenset(material) or None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Count down locally between refreshes, on every wall-clock minute
+        self.async_on_remove(
+            async_track_utc_time_change(self.hass, self._handle_minute_tick, second=0)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the value or a material attribute changed."""
+        value = self.native_value
+        attrs = self._build_attributes()
+        digest = self._state_digest(value, attrs)
+        if digest is not None and digest == self._written_digest:
+            return
+        self._write_digested(value, attrs, digest)
+
+    @callback
+    def _write_digested(
+        self, value: int | None, attrs: dict[str, Any], digest: bytes | None
+    ) -> None:
+        self._written_value = value
+        self._written_digest = digest
+        self._digested_attributes = attrs
+        try:
+            self.async_write_ha_state()
+        finally:
+            self._digested_attributes = None
+
+    def _state_digest(self, value: int | None, attrs: dict[str, Any]) -> bytes | None:
+        """Digest of availability, *value* and the material attributes in *attrs*."""
+        if self._material_attributes is not None:
+            material = {k: v for k, v in attrs.items() if k in self._material_attributes}
+        else:
+            material = {k: v for k, v in attrs.items() if k not in VOLATILE_ATTRIBUTES}
+        try:
+            encoded = json_bytes_sorted([self.available, value, material])
+        except (TypeError, ValueError):
+            return None
+        return hashlib.blake2b(encoded, digest_size=16).digest()
+
+    @callback
+    def _handle_minute_tick(self, _now: datetime) -> None:
+        """Recompute the countdown from the cached data; write only if it changed."""
+        if not self.coordinator.data or not self.available:
+            return
+        value = self.native_value
+        if value != self._written_value:
+            attrs = self._build_attributes()
+            self._write_digested(value, attrs, self._state_digest(value, attrs))
 
     @property
     def device_info(self) -> dict[str, Any]:
@@ -123,13 +240,10 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         sensor_type = self._entry.data.get(CONF_SENSOR_TYPE, "departure")
         if sensor_type == "resrobot_travel_search":
             # Parse Resrobot response and filter by time window
-            trips_raw = self.coordinator.data.get("Trip", [])
-            if not trips_raw:
+            trips_sorted = self._derived_view()
+            if not trips_sorted:
                 return None
-            # Normalize + sort trips/legs locally as well (in case coordinator didn't)
             options = {**self._entry.options, **self._entry.data}
-            max_trip_duration: int | None = options.get(CONF_MAX_TRIP_DURATION)
-            trips_sorted = self._normalize_resrobot_trips(trips_raw, max_trip_duration)
             time_window = int(options.get("time_window", 60))
             from datetime import datetime
             now = datetime.now()
@@ -140,12 +254,7 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
                     if not origin_time:
                         continue
                     try:
-                        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                            try:
-                                dt = datetime.strptime(origin_time, fmt)
-                                break
-                            except ValueError:
-                                dt = None
+                        dt = parse_resrobot_timestamp(origin_time)
                         if not dt:
                             continue
                         minutes_until = int((dt - now).total_seconds() / 60)
@@ -158,27 +267,15 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         items = self._get_data_items()
         if not items:
             return None
-        first_item = items[0]
-        scheduled_time = first_item.get("scheduled", "")
-        realtime_time = first_item.get("realtime", "")
-        departure_time = realtime_time or scheduled_time
-        if not departure_time:
-            return None
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(departure_time)
-            # Handle timezone-aware vs naive datetimes safely
-            if dt.tzinfo is not None:
-                now = datetime.now(dt.tzinfo)
-            else:
-                now = datetime.now()
-            return int((dt - now).total_seconds() / 60)
-        except Exception as err:  # pragma: no cover
-            _LOGGER.debug("Time parse error: %s", err)
-            return None
+        return items[0].minutes_until(time.time())
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
+        if self._digested_attributes is not None:
+            return self._digested_attributes
+        return self._build_attributes()
+
+    def _build_attributes(self) -> dict[str, Any]:
         api_error = getattr(self.coordinator, "last_api_error", None)
         if not self.coordinator.data:
             attrs: dict[str, Any] = {}
@@ -187,17 +284,14 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         sensor_type = self._entry.data.get(CONF_SENSOR_TYPE, "departure")
         if sensor_type == "resrobot_travel_search":
             # Build a sorted top-level trips array and per-trip sorted legs array
-            trips_raw = self.coordinator.data.get("Trip", [])
-            if not trips_raw:
+            if not self.coordinator.data.get("Trip"):
                 attrs = {}
                 self._inject_api_error(attrs)
                 return attrs
-            options_merged = {**self._entry.options, **self._entry.data}
-            max_trip_duration: int | None = options_merged.get(CONF_MAX_TRIP_DURATION)
-            trips_sorted = self._normalize_resrobot_trips(trips_raw, max_trip_duration)
+            trips = self._trips_attribute(self._derived_view())
             attrs: dict[str, Any] = {
-                "num_trips": len(trips_sorted),
-                "trips": trips_sorted,
+                "num_trips": len(trips),
+                "trips": trips,
                 "attribution": "Data from Resrobot/Trafiklab.se",
                 "last_update": getattr(self.coordinator, "last_successful_update", None),
                 "integration": DOMAIN,
@@ -212,17 +306,19 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         merged_cfg = {**self._entry.data, **self._entry.options}
         configured_direction = merged_cfg.get(CONF_DIRECTION, "")
         attrs = {
-            "line": (first_item.get("route") or {}).get("designation", ""),
-            "destination": (first_item.get("route") or {}).get("direction", ""),
+            "line": first_item.line,
+            "destination": first_item.destination,
             "direction": configured_direction,
-            "scheduled_time": first_item.get("scheduled", ""),
-            "expected_time": first_item.get("realtime", ""),
-            "transport_mode": (first_item.get("route") or {}).get("transport_mode", ""),
-            "real_time": first_item.get("is_realtime", False),
-            "delay": first_item.get("delay", 0),
-            "canceled": first_item.get("canceled"),
-            "platform": (first_item.get("realtime_platform") or {}).get("designation", ""),
-            "upcoming": self._build_upcoming_array(items[:10], configured_direction),
+            "scheduled_time": first_item.scheduled,
+            "expected_time": first_item.expected,
+            "transport_mode": first_item.transport_mode,
+            "real_time": first_item.is_realtime,
+            "delay": first_item.delay,
+            "canceled": first_item.canceled,
+            "platform": first_item.realtime_platform,
+            "upcoming": self._build_upcoming_array(
+                items[: self._max_upcoming], configured_direction
+            ),
             "attribution": "Data from Trafiklab.se",
             "last_update": getattr(self.coordinator, "last_successful_update", None),
             "integration": DOMAIN,
@@ -231,64 +327,68 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         return attrs
 
     def _inject_api_error(self, attrs: dict[str, Any]) -> None:
-        """Inject api_error_code/api_error_message into attrs when coordinator has an error."""
+        """Inject api_error_code/api_error_message (and data_age_seconds while stale) into attrs."""
         api_error = getattr(self.coordinator, "last_api_error", None)
         if api_error:
             attrs["api_error_code"] = api_error.get("code")
             attrs["api_error_message"] = api_error.get("message")
+        if getattr(self.coordinator, "serving_stale", False):
+            # Last good data kept through an API failure
+            attrs["data_age_seconds"] = self.coordinator.data_age_seconds
+
+    def _trips_attribute(self, trips: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Trips as exposed: capped to max_trips/max_legs, legs reduced when compact."""
+        if self._max_trips:
+            trips = trips[: self._max_trips]
+        if not self._max_legs and not self._compact:
+            return trips
+        exposed = []
+        for trip in trips:
+            legs = trip["legs"][: self._max_legs] if self._max_legs else trip["legs"]
+            if self._compact:
+                legs = [{key: leg.get(key) for key in _COMPACT_LEG_KEYS} for leg in legs]
+            exposed.append({**trip, "legs": legs})
+        return exposed
 
     def _build_upcoming_array(
-        self, items: list[dict], configured_direction: str
+        self, items: list[TimetableEntry], configured_direction: str
     ) -> list[dict]:
-        from datetime import datetime
-
-        upcoming: list[dict] = []
-        for idx, item in enumerate(items):
-            scheduled_time = item.get("scheduled", "")
-            realtime_time = item.get("realtime", "")
-            departure_time = realtime_time or scheduled_time
-            minutes_until = None
-            time_formatted = ""
-            if departure_time:
-                try:
-                    dt = datetime.fromisoformat(departure_time)
-                    if dt.tzinfo is not None:
-                        now = datetime.now(dt.tzinfo)
-                    else:
-                        now = datetime.now()
-                    minutes_until = int((dt - now).total_seconds() / 60)
-                    time_formatted = dt.strftime("%H:%M")
-                except Exception:  # pragma: no cover
-                    pass
-            upcoming.append(
+        now = time.time()
+        if self._compact:
+            return [
                 {
-                    "index": idx,
-                    "line": (item.get("route") or {}).get("designation", "") or "Unknown",
-                    "destination": (item.get("route") or {}).get("direction", "")
-                    or "Unknown",
-                    "direction": configured_direction,
-                    "scheduled_time": scheduled_time,
-                    "expected_time": realtime_time,
-                    "time_formatted": time_formatted,
-                    "minutes_until": minutes_until,
-                    "transport_mode": (item.get("route") or {}).get("transport_mode", "")
-                    or "Unknown",
-                    "real_time": bool(item.get("is_realtime", False)),
-                    "delay": int(item.get("delay", 0)),
-                    "delay_minutes": int(item.get("delay", 0) / 60)
-                    if item.get("delay")
-                    else 0,
-                    "canceled": bool(item.get("canceled")),
-                    "platform": (item.get("realtime_platform") or {})
-                    .get("designation", "")
-                    or (item.get("scheduled_platform") or {})
-                    .get("designation", ""),
-                    "route_name": (item.get("route") or {}).get("name", "") or "",
-                    "agency": (item.get("agency") or {}).get("name", "") or "",
-                    "trip_id": (item.get("trip") or {}).get("trip_id", "") or "",
+                    "line": item.line or "Unknown",
+                    "destination": item.destination or "Unknown",
+                    "time_formatted": item.time_formatted,
+                    "minutes_until": item.minutes_until(now),
+                    "delay_minutes": int(item.delay / 60) if item.delay else 0,
+                    "canceled": bool(item.canceled),
+                    "platform": item.platform,
                 }
-            )
-        return upcoming
+                for item in items
+            ]
+        return [
+            {
+                "index": idx,
+                "line": item.line or "Unknown",
+                "destination": item.destination or "Unknown",
+                "direction": configured_direction,
+                "scheduled_time": item.scheduled,
+                "expected_time": item.expected,
+                "time_formatted": item.time_formatted,
+                "minutes_until": item.minutes_until(now),
+                "transport_mode": item.transport_mode or "Unknown",
+                "real_time": item.is_realtime,
+                "delay": item.delay,
+                "delay_minutes": int(item.delay / 60) if item.delay else 0,
+                "canceled": bool(item.canceled),
+                "platform": item.platform,
+                "route_name": item.route_name,
+                "agency": item.agency,
+                "trip_id": item.trip_id,
+            }
+            for idx, item in enumerate(items)
+        ]
 
     @staticmethod
     def _normalize_resrobot_trips(trips_raw: Any, max_trip_duration: int | None = None) -> list[dict[str, Any]]:
@@ -306,16 +406,6 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
         else:
             trips_iter = list(trips_raw or [])
 
-        def parse_dt(date_str: str, time_str: str) -> datetime | None:
-            if not date_str or not time_str:
-                return None
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                try:
-                    return datetime.strptime(f"{date_str} {time_str}", fmt)
-                except ValueError:
-                    continue
-            return None
-
         # Minimal fallback mapping; prefer Product-provided labels when available
         # Add as needed from list: https://www.trafiklab.se/api/our-apis/resrobot-v21/common/
         category_map = {
@@ -360,29 +450,6 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
             key = str(raw_type).upper()
             return type_map.get(key, str(raw_type))
 
-        def parse_iso_duration_minutes(dur: Any) -> int | None:
-            """Parse ISO8601 duration (e.g., PT1H30M, PT9M, PT45S) into integer minutes."""
-            if not isinstance(dur, str) or not dur:
-                return None
-            # Basic ISO8601 duration parser focusing on time part; supports days as well.
-            import re
-            # Split date and time components
-            # Example: P1DT2H3M4S, PT45M, PT1H, PT30S
-            pattern = re.compile(
-                r"^P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$",
-                re.IGNORECASE,
-            )
-            m = pattern.match(dur)
-            if not m:
-                return None
-            weeks = int(m.group("weeks") or 0)
-            days = int(m.group("days") or 0)
-            hours = int(m.group("hours") or 0)
-            minutes = int(m.group("minutes") or 0)
-            seconds = int(m.group("seconds") or 0)
-            total_minutes = weeks * 7 * 24 * 60 + days * 24 * 60 + hours * 60 + minutes + (seconds // 60)
-            return total_minutes
-
         trips_out: list[dict[str, Any]] = []
         for idx, trip in enumerate(trips_iter):
             leg_container = (trip or {}).get("LegList", {}) or {}
@@ -431,7 +498,7 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
                     "platform": leg.get("_realtime_platform", ""),
                 }
                 # attach parsed dt for sorting
-                leg_dt = parse_dt(origin.get("date", ""), origin.get("time", ""))
+                leg_dt = parse_resrobot_datetime(origin.get("date", ""), origin.get("time", ""))
                 leg_dict["_dt"] = leg_dt
                 leg_dict["_idx"] = leg.get("idx", 0)
                 simplified_legs.append(leg_dict)
@@ -447,35 +514,22 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
             first_leg_dt = None
             if simplified_legs:
                 # Reparse origin_time to dt for trip key
-                ot = simplified_legs[0].get("origin_time", "")
-                for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                    try:
-                        first_leg_dt = datetime.strptime(ot, fmt)
-                        break
-                    except ValueError:
-                        continue
+                first_leg_dt = parse_resrobot_timestamp(simplified_legs[0].get("origin_time", ""))
             if first_leg_dt is None:
                 # fallback to trip.Origin
                 torg = (trip or {}).get("Origin", {}) or {}
-                first_leg_dt = parse_dt(torg.get("date", ""), torg.get("time", "")) or datetime.max
+                first_leg_dt = (
+                    parse_resrobot_datetime(torg.get("date", ""), torg.get("time", ""))
+                    or datetime.max
+                )
 
             # Compute total trip duration: first leg origin_time → last leg dest_time
             duration_total: int | None = None
             if simplified_legs:
                 first_leg = simplified_legs[0]
                 last_leg = simplified_legs[-1]
-                origin_dt = parse_dt(
-                    *first_leg.get("origin_time", " ").split(" ", 1)
-                ) if " " in first_leg.get("origin_time", "") else None
-                dest_str = last_leg.get("dest_time", "")
-                dest_dt: datetime | None = None
-                if dest_str:
-                    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
-                        try:
-                            dest_dt = datetime.strptime(dest_str, fmt)
-                            break
-                        except ValueError:
-                            continue
+                origin_dt = parse_resrobot_timestamp(first_leg.get("origin_time", ""))
+                dest_dt = parse_resrobot_timestamp(last_leg.get("dest_time", ""))
                 if origin_dt is not None and dest_dt is not None:
                     duration_total = max(0, int((dest_dt - origin_dt).total_seconds() / 60))
 
@@ -501,62 +555,108 @@ class TrafikLabSensor(CoordinatorEntity[TrafikLabCoordinator], SensorEntity):
             tp["index"] = out_idx
         return trips_out
 
-    def _get_data_items(self) -> list[dict]:
+    def _derived_view(self) -> list:
+        """Return the trips or entries derived from the current coordinator data.
+
+        Built on the first access after each update and shared by the state
+        and the attributes until the next one.
+        """
         data = self.coordinator.data
-        if not data:
+        if data is not self._view_source:
+            self._view_source = data
+            if not data:
+                self._view = []
+            elif self._entry.data.get(CONF_SENSOR_TYPE) == SENSOR_TYPE_RESROBOT:
+                # Normalize + sort trips/legs locally as well (in case coordinator didn't)
+                options = {**self._entry.options, **self._entry.data}
+                self._view = self._normalize_resrobot_trips(
+                    data.get("Trip") or [], options.get(CONF_MAX_TRIP_DURATION)
+                )
+            else:
+                self._view = self._filter_data_items()
+        return self._view
+
+    def _get_data_items(self) -> list[TimetableEntry]:
+        """Filtered entries that have not left yet.
+
+        Between refreshes the minute ticker reuses the cached view, so
+        departed entries are cut here, as TimetableBoard.upcoming does.
+        """
+        now = time.time()
+        return [e for e in self._derived_view() if e.timestamp is None or e.timestamp >= now]
+
+    def _filter_data_items(self) -> list[TimetableEntry]:
+        kind = KIND_ARRIVALS if self.entity_description.key == "next_arrival" else KIND_DEPARTURES
+        board = as_timetable_board(self.coordinator.data, kind)
+        if board is None or board.kind != kind:
             return []
-        raw_items: list[dict] = []
-        if self.entity_description.key == "next_arrival":
-            if isinstance(data.get("arrivals"), list):
-                raw_items = data["arrivals"]
-        else:
-            if isinstance(data.get("departures"), list):
-                raw_items = data["departures"]
+        raw_items = board.entries
         if not raw_items:
             return []
-        merged_cfg = {**self._entry.data, **self._entry.options}
-        line_filter = (merged_cfg.get(CONF_LINE_FILTER) or "").strip()
-        _direction_raw = (merged_cfg.get(CONF_DIRECTION) or "")
-        direction_tokens = [t.strip().lower() for t in _direction_raw.split(",") if t.strip()]
-        line_set = (
-            {ln.strip() for ln in line_filter.split(",") if ln.strip()}
-            if line_filter
-            else None
-        )
-        transport_mode_filter = {
-            m.upper()
-            for m in (merged_cfg.get(CONF_TRANSPORT_MODES) or [])
-            if m
-        }
-
-        def match_line(item: dict) -> bool:
-            if not line_set:
-                return True
-            designation = item.get("route", {}).get("designation", "")
-            return designation in line_set
-
-        def match_direction(item: dict) -> bool:
-            if not direction_tokens:
-                return True
-            destination = item.get("route", {}).get("direction", "")
-            dest_lower = destination.lower()
-            return any(tok in dest_lower for tok in direction_tokens)
-
-        def match_transport_mode(item: dict) -> bool:
-            if not transport_mode_filter:
-                return True
-            mode = (item.get("route") or {}).get("transport_mode", "").upper()
-            return mode in transport_mode_filter
-
-        filtered = [it for it in raw_items if match_line(it) and match_direction(it) and match_transport_mode(it)]
+        filtered = self._entry_filter.select(board)
         _LOGGER.debug(
             "Filtered %d -> %d items (lines=%s direction_substr='%s')",
             len(raw_items),
             len(filtered),
-            line_filter or "*",
-            ",".join(direction_tokens) if direction_tokens else "*",
+            ",".join(sorted(self._entry_filter.lines)) or "*",
+            ",".join(self._entry_filter.direction_tokens) or "*",
         )
         return filtered
 
 
 normalize_resrobot_trips = TrafikLabSensor._normalize_resrobot_trips
+
+
+class TrafikLabQuotaSensor(SensorEntity):
+    """Projected month-end request count of the entry's API key."""
+
+    _attr_has_entity_name = True
+    _attr_translation_key = "projected_api_usage"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_icon = "mdi:counter"
+    _attr_native_unit_of_measurement = "requests"
+    _attr_should_poll = False
+
+    def __init__(
+        self, coordinator: TrafikLabCoordinator, entry: ConfigEntry, planner: QuotaPlanner
+    ) -> None:
+        self._coordinator = coordinator
+        self._entry = entry
+        self._planner = planner
+        self._attr_unique_id = f"{entry.entry_id}_projected_api_usage"
+
+    @property
+    def device_info(self) -> dict[str, Any]:
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+            "name": self._entry.data.get(CONF_NAME),
+            "manufacturer": "Trafiklab",
+            "model": "Public Transport",
+        }
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_QUOTA_PLAN_UPDATED, self._handle_plan)
+        )
+
+    @callback
+    def _handle_plan(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> int | None:
+        plan = self._planner.plan_for(self._coordinator.api_key)
+        return plan["projected"] if plan else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        plan = self._planner.plan_for(self._coordinator.api_key)
+        if plan is None:
+            return None
+        return {
+            **{k: v for k, v in plan.items() if k != "projected"},
+            "interval_factor": round(self._coordinator.budget_factor, 2),
+            "refresh_interval": int(self._coordinator.update_interval.total_seconds())
+            if self._coordinator.update_interval
+            else None,
+        }
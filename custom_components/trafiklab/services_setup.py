@@ -1,6 +1,7 @@
 """Services for Trafiklab integration."""
 from __future__ import annotations
 
+import copy
 import logging
 import re
 from typing import Any
@@ -9,9 +10,8 @@ import voluptuous as vol
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .api import TrafikLabApiClient
+from .api import TrafikLabApiClient, async_get_api_session
 from .const import (
     DOMAIN,
     SERVICE_STOP_LOOKUP,
@@ -278,7 +278,7 @@ def async_setup_services(hass: HomeAssistant) -> None:
                 ),
             }
 
-        session = async_get_clientsession(hass)
+        session = async_get_api_session(hass)
         async with TrafikLabApiClient(api_key, session=session) as client:
             try:
                 result = await client.search_stops(search_query)
@@ -387,7 +387,7 @@ def async_setup_services(hass: HomeAssistant) -> None:
             include_platform: bool = bool(call.data.get(CONF_INCLUDE_PLATFORM, False))
 
             response: dict[str, Any] = {}
-            session = async_get_clientsession(hass)
+            session = async_get_api_session(hass)
             # Name resolution uses the Resrobot /location.name endpoint (same key,
             # same client) so the returned extId is already a national stop ID.
             async with TrafikLabApiClient(api_key, session=session) as client:
@@ -525,6 +525,9 @@ def async_setup_services(hass: HomeAssistant) -> None:
                             or _find_realtime_key_from_entries(hass)
                         )
                         if realtime_key:
+                            # Enrichment annotates legs in place; work on a copy so
+                            # cached API responses stay untouched.
+                            trips_raw = copy.deepcopy(trips_raw)
                             try:
                                 await enrich_platform_for_trips(
                                     trips_raw, realtime_key, session
@@ -0,0 +1,137 @@
+"""Persisted coordinator snapshots.
+
+After a restart every sensor would be unknown until its first refresh, which
+with many entries and a shared rate limit can take a while. Each coordinator
+keeps its last successful data (the projected board, or the trip and leg
+fields of the normalized Resrobot response that the travel search sensor
+reads) and the time of that update in one shared Store. The data is restored
+before the first refresh, so departure countdowns are shown, extrapolated
+from the stored times, right away.
+
+Saves are delayed by several minutes and at most one is pending at a time,
+so the file is rewritten rarely however many entries update; Home
+Assistant writes the pending data when it stops.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .models import TimetableBoard
+from .storage import DelayedStore, async_get_loaded
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.snapshots"
+SAVE_DELAY = 900  # seconds
+
+_DATA_SNAPSHOTS = f"{DOMAIN}_snapshots"
+
+_TYPE_BOARD = "board"
+_TYPE_RAW = "raw"
+
+# Fields of Resrobot trips and legs read by the travel search sensor
+_STOP_KEYS = ("name", "date", "time")
+_LEG_KEYS = (
+    "idx", "type", "category", "direction", "dist", "number", "duration", "_realtime_platform"
+)
+_PRODUCT_KEYS = ("name", "num", "displayNumber")
+
+
+def _project(obj: dict[str, Any], keys: tuple[str, ...]) -> dict[str, Any]:
+    return {key: obj[key] for key in keys if key in obj}
+
+
+def _project_leg(leg: dict[str, Any]) -> dict[str, Any]:
+    projected = _project(leg, _LEG_KEYS)
+    for key in ("Origin", "Destination"):
+        if isinstance(leg.get(key), dict):
+            projected[key] = _project(leg[key], _STOP_KEYS)
+    product = leg.get("Product")
+    if isinstance(product, list):
+        product = product[0] if product else None
+    if isinstance(product, dict):
+        projected["Product"] = _project(product, _PRODUCT_KEYS)
+    gis_route = leg.get("GisRoute")
+    if isinstance(gis_route, dict) and "durS" in gis_route:
+        projected["GisRoute"] = {"durS": gis_route["durS"]}
+    return projected
+
+
+def _project_resrobot_response(data: dict[str, Any]) -> dict[str, Any]:
+    """Return the trips of a normalized Resrobot response with only the read fields."""
+    trips = []
+    for trip in data.get("Trip") or []:
+        if not isinstance(trip, dict):
+            continue
+        legs = (trip.get("LegList") or {}).get("Leg") or []
+        projected: dict[str, Any] = {
+            "LegList": {"Leg": [_project_leg(leg) for leg in legs if isinstance(leg, dict)]}
+        }
+        if isinstance(trip.get("Origin"), dict):
+            projected["Origin"] = _project(trip["Origin"], _STOP_KEYS)
+        trips.append(projected)
+    return {"Trip": trips}
+
+
+def encode_snapshot(data: Any, last_successful_update: str | None) -> dict[str, Any] | None:
+    """Return the stored form of coordinator data, or None if it is not stored."""
+    if isinstance(data, TimetableBoard):
+        payload: dict[str, Any] = {"type": _TYPE_BOARD, "data": data.as_dict()}
+    elif isinstance(data, dict) and data:
+        payload = {"type": _TYPE_RAW, "data": _project_resrobot_response(data)}
+    else:
+        return None
+    payload["last_successful_update"] = last_successful_update
+    return payload
+
+
+def decode_snapshot(snapshot: dict[str, Any]) -> tuple[Any, str | None] | None:
+    """Return (data, last_successful_update) from a stored snapshot, if valid."""
+    try:
+        if snapshot["type"] == _TYPE_BOARD:
+            data: Any = TimetableBoard.from_dict(snapshot["data"])
+        elif snapshot["type"] == _TYPE_RAW:
+            data = snapshot["data"]
+        else:
+            return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return data, snapshot.get("last_successful_update")
+
+
+class SnapshotStore:
+    """Last successful data per config entry, persisted across restarts."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store = DelayedStore(
+            hass, STORAGE_VERSION, STORAGE_KEY, SAVE_DELAY, self._data_to_save
+        )
+        self._snapshots: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load()
+        if isinstance(stored, dict) and isinstance(stored.get("entries"), dict):
+            self._snapshots = stored["entries"]
+
+    def get(self, entry_id: str) -> dict[str, Any] | None:
+        return self._snapshots.get(entry_id)
+
+    @callback
+    def async_set(self, entry_id: str, snapshot: dict[str, Any]) -> None:
+        self._snapshots[entry_id] = snapshot
+        self._store.async_schedule_save()
+
+    @callback
+    def async_remove(self, entry_id: str) -> None:
+        if self._snapshots.pop(entry_id, None) is not None:
+            self._store.async_schedule_save()
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"entries": self._snapshots}
+
+
+async def async_get_snapshot_store(hass: HomeAssistant) -> SnapshotStore:
+    """Return the loaded snapshot store shared by all Trafiklab entries."""
+    return await async_get_loaded(hass, _DATA_SNAPSHOTS, SnapshotStore)
@@ -0,0 +1,69 @@
+"""Shared departure/arrival boards for entries watching the same stop.
+
+Entries that differ only in their filters (line, destination, transport mode)
+need the same API response. Their coordinators join a group keyed by
+(API family, API key, stop id, board kind). Whichever coordinator refreshes
+first publishes the board to the rest, which take it as their own update and
+reset their refresh timers. One request per interval then serves the whole
+group, and each entry applies its filters locally.
+
+The API key is part of the key so that an invalid key keeps failing, and
+raising its repair issue, on the entries that use it.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .models import TimetableBoard
+
+FeedKey = tuple[str, str, str, str]
+
+_DATA_STOP_FEEDS = f"{DOMAIN}_stop_feeds"
+
+
+class SharedStopFeeds:
+    """Registry of coordinator groups sharing one stop's board."""
+
+    def __init__(self) -> None:
+        self._groups: dict[FeedKey, dict[Any, Callable[[TimetableBoard], None]]] = {}
+
+    @callback
+    def register(
+        self, key: FeedKey, member: Any, receive: Callable[[TimetableBoard], None]
+    ) -> CALLBACK_TYPE:
+        """Add *member* to the group for *key*; returns a function removing it."""
+        group = self._groups.setdefault(key, {})
+        group[member] = receive
+
+        @callback
+        def _unregister() -> None:
+            group.pop(member, None)
+            if not group:
+                self._groups.pop(key, None)
+
+        return _unregister
+
+    @callback
+    def publish(self, key: FeedKey, board: TimetableBoard, source: Any) -> None:
+        """Hand a freshly fetched *board* to every member except *source*."""
+        for member, receive in list(self._groups.get(key, {}).items()):
+            if member is not source:
+                receive(board)
+
+    def group_size(self, key: FeedKey) -> int:
+        return len(self._groups.get(key, ()))
+
+
+@callback
+def async_get_stop_feeds(hass: HomeAssistant) -> SharedStopFeeds:
+    """Return the registry shared by all Trafiklab entries."""
+    feeds: SharedStopFeeds | None = hass.data.get(_DATA_STOP_FEEDS)
+    if feeds is None:
+        feeds = hass.data[_DATA_STOP_FEEDS] = SharedStopFeeds()
+    return feeds
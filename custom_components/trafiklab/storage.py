@@ -0,0 +1,81 @@
+"""Persistence helpers shared by the integration's stores.
+
+Snapshots and quota usage are both kept in a Store that is written with a
+delay, and both are loaded once into a singleton in hass.data that every
+config entry uses.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from typing import Any, Protocol, TypeVar
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+
+class _Loadable(Protocol):
+    async def async_load(self) -> None: ...
+
+
+_LoadableT = TypeVar("_LoadableT", bound=_Loadable)
+
+
+class DelayedStore:
+    """A Store with at most one delayed save pending.
+
+    Store.async_delay_save restarts its timer on every call; only one save is
+    scheduled at a time so steady updates cannot postpone the write. The data
+    is taken from *data_func* when the save runs.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        version: int,
+        key: str,
+        delay: float,
+        data_func: Callable[[], dict[str, Any]],
+    ) -> None:
+        self._store: Store[dict[str, Any]] = Store(hass, version, key)
+        self._delay = delay
+        self._data_func = data_func
+        self._save_pending = False
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return await self._store.async_load()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, self._delay)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        return self._data_func()
+
+
+async def async_get_loaded(
+    hass: HomeAssistant, data_key: str, factory: Callable[[HomeAssistant], _LoadableT]
+) -> _LoadableT:
+    """Return the object in hass.data[*data_key*], created by *factory* and loaded once."""
+    loaded = hass.data.get(data_key)
+    if loaded is None:
+        # Entries are set up concurrently; load once and let them all await it.
+        loaded = hass.data[data_key] = hass.async_create_task(
+            _async_load(hass, data_key, factory), eager_start=True
+        )
+    if isinstance(loaded, asyncio.Task):
+        return await loaded
+    return loaded
+
+
+async def _async_load(
+    hass: HomeAssistant, data_key: str, factory: Callable[[HomeAssistant], _LoadableT]
+) -> _LoadableT:
+    loaded = factory(hass)
+    await loaded.async_load()
+    hass.data[data_key] = loaded
+    return loaded
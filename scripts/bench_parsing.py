@@ -0,0 +1,130 @@
+"""Micro-benchmark of Resrobot date/time and duration parsing.
+
+Builds a Resrobot response with the fake server's payload generator and
+times the per-leg parsing done while normalizing it, once with the previous
+inline helpers (``strptime`` format loop, regex compiled per call) and once
+with custom_components/trafiklab/parsing.py, followed by the full trip
+normalization used by the travel search sensor. Needs the dev requirements
+(Home Assistant) to import the integration. Example::
+
+    python scripts/bench_parsing.py --trips 50 --legs 3 --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from custom_components.trafiklab import parsing  # noqa: E402
+from custom_components.trafiklab.sensor import normalize_resrobot_trips  # noqa: E402
+from fake_trafiklab_server import FakeServerConfig, FakeTrafiklab  # noqa: E402
+
+
+def _legacy_parse_dt(date_str: str, time_str: str) -> datetime | None:
+    if not date_str or not time_str:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(f"{date_str} {time_str}", fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _legacy_parse_timestamp(value: str) -> datetime | None:
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _legacy_parse_duration(dur: Any) -> int | None:
+    if not isinstance(dur, str) or not dur:
+        return None
+    pattern = re.compile(
+        r"^P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$",
+        re.IGNORECASE,
+    )
+    m = pattern.match(dur)
+    if not m:
+        return None
+    return (
+        int(m.group("weeks") or 0) * 7 * 24 * 60
+        + int(m.group("days") or 0) * 24 * 60
+        + int(m.group("hours") or 0) * 60
+        + int(m.group("minutes") or 0)
+        + int(m.group("seconds") or 0) // 60
+    )
+
+
+def _parse_legs(
+    legs: list[dict[str, Any]],
+    parse_dt: Callable[[str, str], datetime | None],
+    parse_timestamp: Callable[[str], datetime | None],
+    parse_duration: Callable[[Any], int | None],
+) -> None:
+    # The parses made per leg while normalizing and building attributes
+    for leg in legs:
+        origin = leg["Origin"]
+        dest = leg["Destination"]
+        parse_dt(origin["date"], origin["time"])
+        parse_timestamp(f"{origin['date']} {origin['time']}")
+        parse_timestamp(f"{dest['date']} {dest['time']}")
+        parse_duration(leg.get("duration"))
+
+
+def _timeit(func: Callable[[], Any], repeat: int) -> float:
+    func()
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trips", type=int, default=50, help="trips per Resrobot response")
+    parser.add_argument("--legs", type=int, default=3, help="legs per trip")
+    parser.add_argument("--repeat", type=int, default=200, help="parses of the response per timing run")
+    args = parser.parse_args()
+
+    server = FakeTrafiklab(FakeServerConfig(trips=args.trips, legs=args.legs, seed=1))
+    response = server._trips("740000001", "740000002")
+    legs = [leg for trip in response["Trip"] for leg in trip["LegList"]["Leg"]]
+
+    legacy = _timeit(
+        lambda: _parse_legs(legs, _legacy_parse_dt, _legacy_parse_timestamp, _legacy_parse_duration),
+        args.repeat,
+    )
+    current = _timeit(
+        lambda: _parse_legs(
+            legs,
+            parsing.parse_resrobot_datetime,
+            parsing.parse_resrobot_timestamp,
+            parsing.parse_iso_duration_minutes,
+        ),
+        args.repeat,
+    )
+    normalize = _timeit(lambda: normalize_resrobot_trips(response["Trip"]), args.repeat)
+
+    print(f"{args.trips} trips, {len(legs)} legs per response")
+    print(f"  legacy parsing   {legacy * 1e3:8.3f} ms/response")
+    print(f"  parsing.py       {current * 1e3:8.3f} ms/response  ({legacy / current:.1f}x)")
+    print(f"  normalize trips  {normalize * 1e3:8.3f} ms/response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Local stand-in for the Trafiklab Realtime and Resrobot APIs.
+
+Serves synthetic responses for the endpoints the integration uses, with
+configurable latency, error/429 injection, per-key quotas and payload sizes,
+so throughput and quota behaviour can be measured offline without spending
+real API calls.
+
+Run it::
+
+    python scripts/fake_trafiklab_server.py --port 8765 --latency lognormal:0.15:0.5 \\
+        --error-rate 0.02 --quota-per-minute 30
+
+and point Home Assistant at it in ``configuration.yaml``::
+
+    trafiklab:
+      realtime_base_url: http://127.0.0.1:8765/v1
+      resrobot_base_url: http://127.0.0.1:8765/v2.1
+
+``GET /_stats`` returns request counters; ``POST /_reset`` clears them.
+Only aiohttp is required; endpoint paths are read from the integration's
+const.py so the two cannot drift apart.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import random
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+_CONST_PATH = Path(__file__).resolve().parent.parent / "custom_components" / "trafiklab" / "const.py"
+_spec = importlib.util.spec_from_file_location("_trafiklab_const", _CONST_PATH)
+const = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(const)
+
+REALTIME_PREFIX = "/v1"
+RESROBOT_PREFIX = "/v2.1"
+
+_TRANSPORT_MODES = ("BUS", "METRO", "TRAIN", "TRAM", "SHIP")
+_DESTINATIONS = (
+    "Central Station", "Airport", "Harbour", "University", "Hospital",
+    "Stadium", "Old Town", "Industrial Park", "North Gate", "South Square",
+)
+
+
+def parse_latency(spec: str) -> tuple[str, tuple[float, ...]]:
+    """Parse a latency spec: ``0``, ``fixed:S``, ``uniform:LO:HI`` or ``lognormal:MEDIAN:SIGMA``."""
+    if spec in ("", "0", "none"):
+        return "fixed", (0.0,)
+    kind, _, rest = spec.partition(":")
+    values = tuple(float(v) for v in rest.split(":") if v)
+    expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise argparse.ArgumentTypeError(f"invalid latency spec: {spec!r}")
+    return kind, values
+
+
+@dataclass
+class FakeServerConfig:
+    """Behaviour of the stand-in server."""
+
+    latency: tuple[str, tuple[float, ...]] = ("fixed", (0.0,))
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_429: float = 0.0
+    retry_after: float | None = 1.0
+    quota_per_minute: int | None = None
+    departures: int = 40
+    trips: int = 5
+    legs: int = 3
+    seed: int | None = None
+
+
+@dataclass
+class FakeServerStats:
+    """Counters exposed on /_stats."""
+
+    started: float = field(default_factory=time.monotonic)
+    requests: Counter = field(default_factory=Counter)
+    statuses: Counter = field(default_factory=Counter)
+    bytes_sent: int = 0
+    key_windows: dict[str, deque] = field(default_factory=lambda: defaultdict(deque))
+
+    def as_dict(self) -> dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        total = sum(self.requests.values())
+        return {
+            "elapsed_seconds": round(elapsed, 1),
+            "requests": dict(self.requests),
+            "total_requests": total,
+            "requests_per_second": round(total / elapsed, 2),
+            "statuses": {str(k): v for k, v in self.statuses.items()},
+            "bytes_sent": self.bytes_sent,
+            "keys": len(self.key_windows),
+        }
+
+
+class FakeTrafiklab:
+    """Request handlers and synthetic payload generation."""
+
+    def __init__(self, config: FakeServerConfig) -> None:
+        self.config = config
+        self.stats = FakeServerStats()
+        self.random = random.Random(config.seed)
+
+    # -- behaviour ---------------------------------------------------------
+
+    def _latency(self) -> float:
+        kind, values = self.config.latency
+        if kind == "uniform":
+            return self.random.uniform(*values)
+        if kind == "lognormal":
+            median, sigma = values
+            return self.random.lognormvariate(0.0, sigma) * median
+        return values[0]
+
+    def _over_quota(self, key: str) -> float | None:
+        """Record a call for *key*; return seconds until a slot frees if over quota."""
+        limit = self.config.quota_per_minute
+        if not limit:
+            return None
+        now = time.monotonic()
+        window = self.stats.key_windows[key]
+        while window and now - window[0] >= 60:
+            window.popleft()
+        if len(window) >= limit:
+            return 60 - (now - window[0])
+        window.append(now)
+        return None
+
+    async def _respond(
+        self, request: web.Request, endpoint: str, key: str | None, body: Any, *, resrobot: bool
+    ) -> web.Response:
+        self.stats.requests[endpoint] += 1
+        await asyncio.sleep(self._latency())
+        if not key:
+            return self._error(401, resrobot, "API_AUTH" if resrobot else "error.key.missing", "No key")
+        wait = self._over_quota(key)
+        if wait is not None:
+            return self._error(
+                429, resrobot, "API_QUOTA" if resrobot else "error.quota", "Quota exceeded",
+                retry_after=wait,
+            )
+        roll = self.random.random()
+        if roll < self.config.rate_429:
+            return self._error(
+                429, resrobot, "API_TOO_MANY_REQUESTS" if resrobot else "error.rate_limit",
+                "Too many requests", retry_after=self.config.retry_after,
+            )
+        if roll < self.config.rate_429 + self.config.error_rate:
+            return self._error(
+                self.config.error_status, resrobot, "INT_ERR" if resrobot else "error.internal",
+                "Injected server error",
+            )
+        return self._json(200, body)
+
+    def _error(
+        self, status: int, resrobot: bool, code: str, text: str, retry_after: float | None = None
+    ) -> web.Response:
+        body = {"errorCode": code, "errorText" if resrobot else "errorDetail": text}
+        headers = {"Retry-After": str(max(1, round(retry_after)))} if retry_after is not None else None
+        return self._json(status, body, headers)
+
+    def _json(self, status: int, body: Any, headers: dict[str, str] | None = None) -> web.Response:
+        response = web.json_response(body, status=status, headers=headers)
+        self.stats.statuses[status] += 1
+        self.stats.bytes_sent += len(response.body or b"")
+        return response
+
+    # -- payloads ----------------------------------------------------------
+
+    def _board(self, kind: str, area_id: str, start: datetime) -> dict[str, Any]:
+        rnd = self.random
+        items = []
+        for idx in range(self.config.departures):
+            scheduled = start + timedelta(minutes=idx * 2 + rnd.randint(0, 1))
+            delay = rnd.choice((0, 0, 0, 30, 60, 120, 300))
+            mode = rnd.choice(_TRANSPORT_MODES)
+            line = str(rnd.randint(1, 199))
+            items.append(
+                {
+                    "scheduled": scheduled.isoformat(timespec="seconds"),
+                    "realtime": (scheduled + timedelta(seconds=delay)).isoformat(timespec="seconds"),
+                    "delay": delay,
+                    "canceled": rnd.random() < 0.01,
+                    "route": {
+                        "name": f"{mode.title()} {line}",
+                        "designation": line,
+                        "transport_mode_code": 700,
+                        "transport_mode": mode,
+                        "direction": rnd.choice(_DESTINATIONS),
+                        "origin": {"id": area_id, "name": f"Stop {area_id}"},
+                        "destination": {"id": "740000001", "name": rnd.choice(_DESTINATIONS)},
+                    },
+                    "trip": {
+                        "trip_id": f"{area_id}-{start:%Y%m%d}-{idx}",
+                        "start_date": f"{start:%Y-%m-%d}",
+                        "technical_number": idx,
+                    },
+                    "agency": {"id": "505000000000000001", "name": "Fake Transit", "operator": "Fake Ops"},
+                    "stop": {"id": area_id, "name": f"Stop {area_id}", "lat": 59.33, "lon": 18.06},
+                    "scheduled_platform": {"id": f"{area_id}1", "designation": str(rnd.randint(1, 8))},
+                    "realtime_platform": {"id": f"{area_id}1", "designation": str(rnd.randint(1, 8))},
+                    "alerts": [],
+                    "is_realtime": delay > 0 or rnd.random() < 0.5,
+                }
+            )
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "query": {"queryTime": start.isoformat(timespec="seconds"), "query": area_id},
+            "stops": [{"id": area_id, "name": f"Stop {area_id}", "lat": 59.33, "lon": 18.06, "alerts": []}],
+            kind: items,
+        }
+
+    def _trips(self, origin: str, destination: str) -> dict[str, Any]:
+        rnd = self.random
+        now = datetime.now().replace(second=0, microsecond=0)
+        trips = []
+        for t_idx in range(self.config.trips):
+            at = now + timedelta(minutes=5 + t_idx * 10)
+            legs = []
+            for l_idx in range(self.config.legs):
+                arrive = at + timedelta(minutes=rnd.randint(3, 20))
+                line = str(rnd.randint(1, 199))
+                legs.append(
+                    {
+                        "Origin": {"name": f"Stop {origin}-{l_idx}", "extId": origin, "date": f"{at:%Y-%m-%d}", "time": f"{at:%H:%M:%S}"},
+                        "Destination": {"name": f"Stop {destination}-{l_idx}", "extId": destination, "date": f"{arrive:%Y-%m-%d}", "time": f"{arrive:%H:%M:%S}"},
+                        "Product": [{"name": f"Bus {line}", "num": line, "catOutL": "Bus", "catCode": "7"}],
+                        "direction": rnd.choice(_DESTINATIONS),
+                        "category": "BLT",
+                        "type": "JNY",
+                        "idx": l_idx,
+                        "duration": f"PT{int((arrive - at).total_seconds() // 60)}M",
+                    }
+                )
+                at = arrive + timedelta(minutes=rnd.randint(1, 5))
+            trips.append({"LegList": {"Leg": legs}, "idx": t_idx, "duration": "PT45M"})
+        return {"Trip": trips, "scrB": "fake", "scrF": "fake"}
+
+    # -- handlers ----------------------------------------------------------
+
+    async def board(self, request: web.Request) -> web.Response:
+        kind = request.match_info["kind"]
+        area_id = request.match_info["area_id"]
+        start = datetime.now().replace(microsecond=0)
+        if when := request.match_info.get("time"):
+            try:
+                start = datetime.fromisoformat(when)
+            except ValueError:
+                return self._error(400, False, "error.time.invalid", f"Invalid time {when}")
+        return await self._respond(
+            request, kind, request.query.get("key"), self._board(kind, area_id, start), resrobot=False
+        )
+
+    async def stop_lookup(self, request: web.Request) -> web.Response:
+        name = request.match_info["name"]
+        body = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "query": {"queryTime": datetime.now().isoformat(timespec="seconds"), "query": name},
+            "stop_groups": [
+                {
+                    "id": f"74000{idx:04d}",
+                    "name": f"{name.title()} {idx}",
+                    "area_type": "RIKSHALLPLATS",
+                    "average_daily_stop_times": 100 * (idx + 1),
+                    "transport_modes": list(_TRANSPORT_MODES[: idx % 5 + 1]),
+                    "stops": [{"id": f"9022{idx:04d}", "name": f"{name.title()} {idx}", "lat": 59.3, "lon": 18.0}],
+                }
+                for idx in range(5)
+            ],
+        }
+        return await self._respond(request, "stop_lookup", request.query.get("key"), body, resrobot=False)
+
+    async def trip(self, request: web.Request) -> web.Response:
+        q = request.query
+        origin = q.get("originId") or q.get("originCoordLat", "0")
+        destination = q.get("destId") or q.get("destCoordLat", "0")
+        return await self._respond(
+            request, "trip", q.get("accessId"), self._trips(origin, destination), resrobot=True
+        )
+
+    async def location(self, request: web.Request) -> web.Response:
+        text = request.query.get("input", "")
+        body = {
+            "stopLocationOrCoordLocation": [
+                {"StopLocation": {"extId": f"74000{idx:04d}", "name": f"{text.title()} {idx}", "lat": 59.3, "lon": 18.0}}
+                for idx in range(5)
+            ]
+        }
+        return await self._respond(request, "location", request.query.get("accessId"), body, resrobot=True)
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats.as_dict())
+
+    async def reset_stats(self, request: web.Request) -> web.Response:
+        self.stats = FakeServerStats()
+        return web.json_response({"reset": True})
+
+
+def create_app(config: FakeServerConfig | None = None) -> web.Application:
+    """Build the aiohttp application; ``app["fake"]`` is the FakeTrafiklab instance."""
+    fake = FakeTrafiklab(config or FakeServerConfig())
+    app = web.Application()
+    app["fake"] = fake
+    rt = REALTIME_PREFIX
+    rr = RESROBOT_PREFIX
+    for endpoint in (const.DEPARTURES_ENDPOINT, const.ARRIVALS_ENDPOINT):
+        kind = endpoint.strip("/")
+        app.router.add_get(f"{rt}/{{kind:{kind}}}/{{area_id}}", fake.board)
+        app.router.add_get(f"{rt}/{{kind:{kind}}}/{{area_id}}/{{time}}", fake.board)
+    app.router.add_get(f"{rt}{const.STOP_LOOKUP_ENDPOINT}/{{name}}", fake.stop_lookup)
+    app.router.add_get(f"{rr}{const.RESROBOT_TRAVEL_SEARCH_ENDPOINT}", fake.trip)
+    app.router.add_get(f"{rr}{const.RESROBOT_LOCATION_ENDPOINT}", fake.location)
+    app.router.add_get("/_stats", fake.get_stats)
+    app.router.add_post("/_reset", fake.reset_stats)
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=parse_latency, default=("fixed", (0.0,)),
+                        help="0 | fixed:S | uniform:LO:HI | lognormal:MEDIAN:SIGMA (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--quota-per-minute", type=int, default=None, help="per-key limit; excess requests get 429")
+    parser.add_argument("--departures", type=int, default=40, help="departures/arrivals per board")
+    parser.add_argument("--trips", type=int, default=5, help="trips per Resrobot response")
+    parser.add_argument("--legs", type=int, default=3, help="legs per trip")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def config_from_args(args: argparse.Namespace) -> FakeServerConfig:
+    return FakeServerConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        quota_per_minute=args.quota_per_minute,
+        departures=args.departures,
+        trips=args.trips,
+        legs=args.legs,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    _args = build_parser().parse_args()
+    web.run_app(create_app(config_from_args(_args)), host=_args.host, port=_args.port)
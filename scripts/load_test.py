@@ -0,0 +1,178 @@
+"""Drive many simulated entries through TrafikLabApiClient against the fake server.
+
+Each simulated entry polls departures for its own stop at ``--interval``,
+through the real client stack (coalescing, cache, rate limiter, retries,
+circuit breaker, hooks). The report shows request throughput, latency,
+outcomes and event-loop lag. Needs the dev requirements (Home Assistant) to
+import the client. Example::
+
+    python scripts/load_test.py --entries 300 --interval 60 --duration 180 \\
+        --latency lognormal:0.2:0.6 --quota-per-minute 30
+
+Without ``--base-url`` a fake server is started in-process using the
+latency/error options below; with it, an already running server (see
+scripts/fake_trafiklab_server.py) is used and those options are ignored.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from custom_components.trafiklab import api  # noqa: E402
+from fake_trafiklab_server import (  # noqa: E402
+    config_from_args,
+    create_app,
+    build_parser as build_server_parser,
+)
+
+
+class _LatencyHook(api.RequestHook):
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.connects: list[float] = []
+
+    def on_response(self, info: api.RequestInfo) -> None:
+        if info.elapsed is not None:
+            self.latencies.append(info.elapsed)
+        if info.connect_time is not None:
+            self.connects.append(info.connect_time)
+
+
+async def _measure_loop_lag(samples: list[float], stop: asyncio.Event, period: float = 0.05) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + period
+        await asyncio.sleep(period)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def _pct(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _entry(
+    client: api.TrafikLabApiClient,
+    stop_id: str,
+    interval: float,
+    phase: float,
+    deadline: float,
+    outcomes: Counter,
+) -> None:
+    await asyncio.sleep(phase)
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            await client.get_departures(stop_id)
+            outcomes["ok"] += 1
+        except api.TrafikLabApiError as err:
+            outcomes[type(err).__name__] += 1
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+async def run(args: argparse.Namespace) -> None:
+    runner: web.AppRunner | None = None
+    base_url = args.base_url
+    if not base_url:
+        runner = web.AppRunner(create_app(config_from_args(args)))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # noqa: SLF001
+        base_url = f"http://127.0.0.1:{port}"
+    api.configure_base_urls(f"{base_url}/v1", f"{base_url}/v2.1")
+    api.configure_rate_limits(args.rate_limit, args.rate_burst)
+
+    hook = _LatencyHook()
+    remove_hook = api.register_request_hook(hook)
+    session = aiohttp.ClientSession(trace_configs=[api._create_trace_config()])  # noqa: SLF001
+    keys = [f"key-{idx}" for idx in range(args.keys)]
+    outcomes: Counter = Counter()
+    lag: list[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(lag, stop))
+    deadline = time.monotonic() + args.duration
+    rnd = random.Random(args.seed)
+    started = time.monotonic()
+    try:
+        await asyncio.gather(
+            *(
+                _entry(
+                    api.TrafikLabApiClient(
+                        keys[idx % len(keys)], session=session, use_cache=not args.no_cache
+                    ),
+                    f"74{idx % args.stops:07d}",
+                    args.interval,
+                    0.0 if args.aligned else rnd.uniform(0, args.interval),
+                    deadline,
+                    outcomes,
+                )
+                for idx in range(args.entries)
+            )
+        )
+    finally:
+        stop.set()
+        await lag_task
+        remove_hook()
+        await session.close()
+        elapsed = time.monotonic() - started
+        server_stats = None
+        if runner is not None:
+            server_stats = runner.app["fake"].stats.as_dict()
+            await runner.cleanup()
+
+    total_calls = sum(outcomes.values())
+    print(f"entries={args.entries} keys={args.keys} stops={args.stops} "
+          f"interval={args.interval}s duration={elapsed:.1f}s")
+    print(f"calls: {total_calls} ({total_calls / elapsed:.1f}/s)  outcomes: {dict(outcomes)}")
+    if hook.latencies:
+        print(f"latency ms: p50={_pct(hook.latencies, 50) * 1000:.0f} "
+              f"p95={_pct(hook.latencies, 95) * 1000:.0f} "
+              f"max={max(hook.latencies) * 1000:.0f}  "
+              f"mean connect ms={statistics.fmean(hook.connects or [0]) * 1000:.1f}")
+    if lag:
+        print(f"event-loop lag ms: p50={_pct(lag, 50) * 1000:.1f} "
+              f"p99={_pct(lag, 99) * 1000:.1f} max={max(lag) * 1000:.1f}")
+    print(f"cache: {api.get_response_cache().stats()}")
+    for family, stats in api.get_request_stats().stats().items():
+        print(f"requests[{family}]: {stats}")
+    if server_stats:
+        print(f"server: {server_stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        parents=[build_server_parser()],
+        conflict_handler="resolve",
+    )
+    parser.add_argument("--base-url", default=None, help="use a running fake server, e.g. http://127.0.0.1:8765")
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--stops", type=int, default=50, help="distinct stop ids shared by the entries")
+    parser.add_argument("--keys", type=int, default=1, help="distinct API keys shared by the entries")
+    parser.add_argument("--interval", type=float, default=60.0)
+    parser.add_argument("--duration", type=float, default=120.0)
+    parser.add_argument("--no-cache", action="store_true", help="bypass the client response cache")
+    parser.add_argument("--aligned", action="store_true", help="start every entry at once (no phase spread)")
+    parser.add_argument("--rate-limit", type=float, default=api.DEFAULT_RATE_LIMIT)
+    parser.add_argument("--rate-burst", type=int, default=api.DEFAULT_RATE_BURST)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
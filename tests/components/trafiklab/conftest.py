@@ -7,9 +7,29 @@ from homeassistant.core import HomeAssistant
 from homeassistant.setup import async_setup_component
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.trafiklab import api
+from custom_components.trafiklab.api import get_response_cache
 from custom_components.trafiklab.const import DOMAIN
 
 
+@pytest.fixture(autouse=True)
+def reset_api_client_state():
+    """Reset process-wide API client state (cache, limiters, circuits, request stats)."""
+    get_response_cache().clear()
+    api._RATE_LIMITERS.clear()
+    api._CIRCUIT_BREAKERS.clear()
+    api.get_request_stats().clear()
+    yield
+    get_response_cache().clear()
+    api._RATE_LIMITERS.clear()
+    api._CIRCUIT_BREAKERS.clear()
+    api.get_request_stats().clear()
+    api._KEY_RATE_LIMITS.clear()
+    api._REQUEST_HOOKS[:] = [api._REQUEST_STATS]
+    api.configure_rate_limits(api.DEFAULT_RATE_LIMIT, api.DEFAULT_RATE_BURST)
+    api.configure_base_urls()
+
+
 @pytest.fixture
 async def setup_integration(hass: HomeAssistant, enable_custom_integrations: None) -> bool:
     """Ensure domain setup runs to register services."""
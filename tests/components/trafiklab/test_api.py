@@ -0,0 +1,514 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMockResponse,
+)
+from yarl import URL
+
+from custom_components.trafiklab.api import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    DEFAULT_FAILURE_THRESHOLD,
+    ENDPOINT_DEPARTURES,
+    CircuitBreaker,
+    RateLimiter,
+    RequestHook,
+    RequestInfo,
+    ResponseCache,
+    RetryPolicy,
+    TrafikLabApiClient,
+    TrafikLabApiError,
+    TrafikLabAuthError,
+    TrafikLabNotFoundError,
+    TrafikLabQuotaError,
+    TrafikLabServerError,
+    TrafikLabUnavailableError,
+    async_get_api_session,
+    circuit_breaker_states,
+    configure_rate_limits,
+    get_circuit_breaker,
+    get_rate_limiter,
+    get_request_stats,
+    get_response_cache,
+    register_request_hook,
+)
+from custom_components.trafiklab.const import API_BASE_URL, DEPARTURES_ENDPOINT
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+_DEPARTURES_URL = f"{API_BASE_URL}{DEPARTURES_ENDPOINT}/740098000"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced(hass: HomeAssistant) -> None:
+    """Identical calls made while one is in flight share a single HTTP request."""
+    fetch = AsyncMock(return_value={"departures": []})
+    client_a = TrafikLabApiClient("key")
+    client_b = TrafikLabApiClient("key")
+
+    with patch.object(TrafikLabApiClient, "_fetch_json", fetch):
+        result_a, result_b = await asyncio.gather(
+            client_a.get_departures("740098000"),
+            client_b.get_departures("740098000"),
+        )
+
+    assert fetch.call_count == 1
+    assert result_a is result_b
+    assert not TrafikLabApiClient._inflight
+
+
+@pytest.mark.asyncio
+async def test_different_requests_are_not_coalesced(hass: HomeAssistant) -> None:
+    """Different stops, time windows or API keys each get their own request."""
+    fetch = AsyncMock(return_value={"departures": []})
+
+    with patch.object(TrafikLabApiClient, "_fetch_json", fetch):
+        await asyncio.gather(
+            TrafikLabApiClient("key").get_departures("740098000"),
+            TrafikLabApiClient("key").get_departures("740000001"),
+            TrafikLabApiClient("key").get_departures("740098000", "2025-01-01T10:00"),
+            TrafikLabApiClient("other-key").get_departures("740098000"),
+        )
+
+    assert fetch.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_coalesced_request_error_reaches_every_caller(hass: HomeAssistant) -> None:
+    """A failure of the shared request is raised to all waiting callers."""
+    fetch = AsyncMock(side_effect=TrafikLabServerError("boom", http_status=503))
+    client = TrafikLabApiClient("key")
+
+    with patch.object(TrafikLabApiClient, "_fetch_json", fetch):
+        results = await asyncio.gather(
+            client.get_departures("740098000"),
+            client.get_departures("740098000"),
+            return_exceptions=True,
+        )
+
+    assert fetch.call_count == 1
+    assert all(isinstance(res, TrafikLabServerError) for res in results)
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_are_not_coalesced(hass: HomeAssistant) -> None:
+    """Once a request has completed the next identical call goes to the network."""
+    fetch = AsyncMock(return_value={"departures": []})
+    client = TrafikLabApiClient("key", use_cache=False)
+
+    with patch.object(TrafikLabApiClient, "_fetch_json", fetch):
+        await client.get_departures("740098000")
+        await client.get_departures("740098000")
+
+    assert fetch.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_http_error_is_mapped_to_api_exception(hass: HomeAssistant, aioclient_mock) -> None:
+    """A 403 from the Realtime API raises TrafikLabAuthError with the error detail."""
+    aioclient_mock.get(
+        _DEPARTURES_URL,
+        status=403,
+        json={"errorCode": "error.key.invalid", "errorDetail": "Key 'x' does not exist."},
+    )
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass))
+
+    with pytest.raises(TrafikLabAuthError) as excinfo:
+        await client.get_departures("740098000")
+
+    assert excinfo.value.http_status == 403
+    assert "does not exist" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_fresh_response_is_served_from_cache(hass: HomeAssistant) -> None:
+    """A second identical call within the TTL is answered without a request."""
+    fetch = AsyncMock(return_value={"departures": []})
+
+    with patch.object(TrafikLabApiClient, "_fetch_json", fetch):
+        first = await TrafikLabApiClient("key").get_departures("740098000")
+        second = await TrafikLabApiClient("key").get_departures("740098000")
+
+    assert fetch.call_count == 1
+    assert first is second
+    stats = get_response_cache().stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(hass: HomeAssistant) -> None:
+    """Failed requests are retried on the next call rather than served from cache."""
+    fetch = AsyncMock(
+        side_effect=[TrafikLabServerError("boom", http_status=503), {"departures": []}]
+    )
+    client = TrafikLabApiClient("key")
+
+    with patch.object(TrafikLabApiClient, "_fetch_json", fetch):
+        with pytest.raises(TrafikLabServerError):
+            await client.get_departures("740098000")
+        assert await client.get_departures("740098000") == {"departures": []}
+
+    assert fetch.call_count == 2
+
+
+def test_response_cache_expires_entries() -> None:
+    """Entries older than their family TTL are treated as misses."""
+    cache = ResponseCache(ttls={ENDPOINT_DEPARTURES: 20})
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=1000.0):
+        cache.set(ENDPOINT_DEPARTURES, ("a",), {"departures": []})
+        assert cache.get(("a",)) == {"departures": []}
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=1021.0):
+        assert cache.get(("a",)) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    """When full, the least recently used entry is evicted first."""
+    cache = ResponseCache(max_entries=2)
+    cache.set(ENDPOINT_DEPARTURES, ("a",), 1)
+    cache.set(ENDPOINT_DEPARTURES, ("b",), 2)
+    assert cache.get(("a",)) == 1  # "a" is now most recently used
+    cache.set(ENDPOINT_DEPARTURES, ("c",), 3)
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == 1
+    assert cache.get(("c",)) == 3
+    assert cache.evictions == 1
+
+
+def test_response_cache_zero_ttl_disables_family() -> None:
+    """A TTL of 0 turns caching off for that endpoint family."""
+    cache = ResponseCache(ttls={ENDPOINT_DEPARTURES: 0})
+    assert not cache.enabled_for(ENDPOINT_DEPARTURES)
+    cache.set(ENDPOINT_DEPARTURES, ("a",), 1)
+    assert cache.get(("a",)) is None
+
+
+def test_rate_limiter_allows_burst_then_paces() -> None:
+    """The first `burst` requests go out at once; later ones are spaced by the rate."""
+    limiter = RateLimiter(rate=60, burst=3)
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=100.0):
+        delays = [limiter.reserve() for _ in range(5)]
+
+    assert delays == [0.0, 0.0, 0.0, 1.0, 2.0]
+    assert limiter.stats()["delayed_requests"] == 2
+
+
+def test_rate_limiter_refills_over_time() -> None:
+    """After an idle period the full burst is available again."""
+    limiter = RateLimiter(rate=60, burst=2)
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=100.0):
+        assert [limiter.reserve() for _ in range(3)] == [0.0, 0.0, 1.0]
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=110.0):
+        assert [limiter.reserve() for _ in range(2)] == [0.0, 0.0]
+
+
+def test_rate_limiter_is_shared_per_api_key() -> None:
+    """Clients using the same key share one limiter; other keys get their own."""
+    assert get_rate_limiter("key") is get_rate_limiter("key")
+    assert get_rate_limiter("key") is not get_rate_limiter("other-key")
+
+    configure_rate_limits(10, 2)
+    assert get_rate_limiter("key").rate == 10
+    assert get_rate_limiter("third-key").burst == 2
+
+
+@pytest.mark.asyncio
+async def test_requests_wait_for_rate_limiter(hass: HomeAssistant, aioclient_mock) -> None:
+    """Each HTTP request acquires a slot from its API key's limiter."""
+    aioclient_mock.get(_DEPARTURES_URL, json={"departures": []})
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass), use_cache=False)
+
+    with patch.object(RateLimiter, "acquire", AsyncMock(return_value=0.0)) as acquire:
+        await client.get_departures("740098000")
+        await client.get_departures("740098000")
+
+    assert acquire.await_count == 2
+    assert aioclient_mock.call_count == 2
+
+
+_NO_WAIT = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0, deadline=30)
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_retried(hass: HomeAssistant) -> None:
+    """A 5xx followed by success returns the successful response."""
+    fetch = AsyncMock(
+        side_effect=[TrafikLabServerError("boom", http_status=503), {"departures": []}]
+    )
+    client = TrafikLabApiClient("key", retry_policies={ENDPOINT_DEPARTURES: _NO_WAIT})
+
+    with patch.object(TrafikLabApiClient, "_fetch_once", fetch):
+        assert await client.get_departures("740098000") == {"departures": []}
+
+    assert fetch.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_max_attempts(hass: HomeAssistant) -> None:
+    """Persistent failures are raised once the attempt budget is spent."""
+    fetch = AsyncMock(side_effect=TrafikLabServerError("boom", http_status=502))
+    client = TrafikLabApiClient("key", retry_policies={ENDPOINT_DEPARTURES: _NO_WAIT})
+
+    with patch.object(TrafikLabApiClient, "_fetch_once", fetch):
+        with pytest.raises(TrafikLabServerError):
+            await client.get_departures("740098000")
+
+    assert fetch.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_auth_and_plain_quota_errors_are_not_retried(hass: HomeAssistant) -> None:
+    """Auth errors and 429s without Retry-After fail immediately."""
+    client = TrafikLabApiClient("key", retry_policies={ENDPOINT_DEPARTURES: _NO_WAIT})
+    for err in (
+        TrafikLabAuthError("denied", http_status=403),
+        TrafikLabQuotaError("slow down", http_status=429),
+    ):
+        fetch = AsyncMock(side_effect=err)
+        with patch.object(TrafikLabApiClient, "_fetch_once", fetch):
+            with pytest.raises(type(err)):
+                await client.get_departures("740098000")
+        assert fetch.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_past_deadline_is_not_waited_for(hass: HomeAssistant) -> None:
+    """A Retry-After that would overrun the deadline fails fast instead of sleeping."""
+    fetch = AsyncMock(
+        side_effect=TrafikLabQuotaError("slow down", http_status=429, retry_after=120)
+    )
+    client = TrafikLabApiClient("key", retry_policies={ENDPOINT_DEPARTURES: _NO_WAIT})
+
+    with patch.object(TrafikLabApiClient, "_fetch_once", fetch):
+        with pytest.raises(TrafikLabQuotaError):
+            await client.get_departures("740098000")
+
+    assert fetch.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_header_is_honoured(hass: HomeAssistant, aioclient_mock) -> None:
+    """A 429 with Retry-After is retried after the requested delay."""
+    responses = iter(
+        [
+            AiohttpClientMockResponse(
+                "GET", URL(_DEPARTURES_URL), status=429, headers={"Retry-After": "0"}
+            ),
+            AiohttpClientMockResponse("GET", URL(_DEPARTURES_URL), json={"departures": []}),
+        ]
+    )
+
+    async def _next_response(method, url, data):
+        return next(responses)
+
+    aioclient_mock.get(_DEPARTURES_URL, side_effect=_next_response)
+    client = TrafikLabApiClient(
+        "key",
+        session=async_get_clientsession(hass),
+        retry_policies={ENDPOINT_DEPARTURES: _NO_WAIT},
+    )
+
+    assert await client.get_departures("740098000") == {"departures": []}
+    assert aioclient_mock.call_count == 2
+
+
+def test_retry_policy_delays_stay_within_bounds() -> None:
+    """Decorrelated jitter never drops below the base or exceeds the cap."""
+    policy = RetryPolicy(base_delay=1, max_delay=8)
+    delay = 0.0
+    for _ in range(50):
+        delay = policy.next_delay(delay)
+        assert 1 <= delay <= 8
+
+
+def test_circuit_opens_after_threshold_and_fails_fast() -> None:
+    """Consecutive host failures open the circuit; requests are then rejected."""
+    breaker = CircuitBreaker("example.test", failure_threshold=2, recovery_timeout=60)
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=100.0):
+        for _ in range(2):
+            breaker.before_request()
+            breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+        with pytest.raises(TrafikLabUnavailableError) as excinfo:
+            breaker.before_request()
+
+    assert excinfo.value.retry_after == 60
+    assert breaker.stats()["rejected_requests"] == 1
+
+
+def test_circuit_half_open_allows_single_probe() -> None:
+    """After the recovery timeout one probe goes through; its outcome decides the state."""
+    breaker = CircuitBreaker("example.test", failure_threshold=1, recovery_timeout=60)
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=100.0):
+        breaker.before_request()
+        breaker.record_failure()
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=161.0):
+        breaker.before_request()
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        with pytest.raises(TrafikLabUnavailableError):
+            breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=222.0):
+        breaker.before_request()
+        breaker.record_success()
+
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_network(hass: HomeAssistant, aioclient_mock) -> None:
+    """Server errors open the host's circuit; later calls fail without a request."""
+    aioclient_mock.get(_DEPARTURES_URL, status=503)
+    client = TrafikLabApiClient(
+        "key",
+        session=async_get_clientsession(hass),
+        use_cache=False,
+        retry_policies={ENDPOINT_DEPARTURES: RetryPolicy(max_attempts=1)},
+    )
+
+    for _ in range(DEFAULT_FAILURE_THRESHOLD):
+        with pytest.raises(TrafikLabServerError):
+            await client.get_departures("740098000")
+    with pytest.raises(TrafikLabUnavailableError):
+        await client.get_departures("740098000")
+
+    assert aioclient_mock.call_count == DEFAULT_FAILURE_THRESHOLD
+    states = circuit_breaker_states()
+    assert states["realtime-api.trafiklab.se"]["state"] == CIRCUIT_OPEN
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_open_circuit(hass: HomeAssistant, aioclient_mock) -> None:
+    """A 4xx means the host is up, so it resets the failure count."""
+    aioclient_mock.get(_DEPARTURES_URL, status=404, json={"errorCode": "stop.not_found"})
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass), use_cache=False)
+
+    for _ in range(DEFAULT_FAILURE_THRESHOLD + 1):
+        with pytest.raises(TrafikLabNotFoundError):
+            await client.get_departures("740098000")
+
+    assert get_circuit_breaker("realtime-api.trafiklab.se").state == CIRCUIT_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_response_body_is_decoded(hass: HomeAssistant, aioclient_mock) -> None:
+    """A 200 body is decoded into the response dict."""
+    aioclient_mock.get(_DEPARTURES_URL, json={"departures": [{"scheduled": "12:00"}]})
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass))
+
+    assert await client.get_departures("740098000") == {
+        "departures": [{"scheduled": "12:00"}]
+    }
+
+
+@pytest.mark.asyncio
+async def test_invalid_json_body_raises_api_error(hass: HomeAssistant, aioclient_mock) -> None:
+    """A 200 with a body that is not JSON raises TrafikLabApiError."""
+    aioclient_mock.get(_DEPARTURES_URL, text="<html>maintenance</html>")
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass))
+
+    with pytest.raises(TrafikLabApiError, match="invalid JSON"):
+        await client.get_departures("740098000")
+
+
+@pytest.mark.asyncio
+async def test_non_json_error_body_is_used_as_message(hass: HomeAssistant, aioclient_mock) -> None:
+    """Error bodies that are not JSON still reach the exception message."""
+    aioclient_mock.get(_DEPARTURES_URL, status=400, text="Bad request: missing key")
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass))
+
+    with pytest.raises(TrafikLabApiError, match="missing key") as excinfo:
+        await client.get_departures("740098000")
+
+    assert excinfo.value.http_status == 400
+
+
+class _RecordingHook(RequestHook):
+    def __init__(self) -> None:
+        self.events: list[tuple[str, RequestInfo]] = []
+
+    def on_request_start(self, info: RequestInfo) -> None:
+        self.events.append(("start", info))
+
+    def on_response(self, info: RequestInfo) -> None:
+        self.events.append(("response", info))
+
+    def on_error(self, info: RequestInfo, err: TrafikLabApiError) -> None:
+        self.events.append(("error", info))
+
+
+@pytest.mark.asyncio
+async def test_request_hooks_receive_lifecycle(hass: HomeAssistant, aioclient_mock) -> None:
+    """Hooks see the start and response of a request with its measurements."""
+    aioclient_mock.get(_DEPARTURES_URL, json={"departures": []})
+    hook = _RecordingHook()
+    client = TrafikLabApiClient("key", session=async_get_clientsession(hass), hooks=[hook])
+
+    await client.get_departures("740098000")
+
+    assert [name for name, _ in hook.events] == ["start", "response"]
+    info = hook.events[-1][1]
+    assert info.family == ENDPOINT_DEPARTURES
+    assert info.status == 200
+    assert info.bytes_received == len(b'{"departures":[]}')
+    assert info.decode_time is not None
+    assert info.elapsed is not None
+    stats = get_request_stats().stats()[ENDPOINT_DEPARTURES]
+    assert stats["requests"] == 1
+    assert stats["status_counts"] == {"200": 1}
+
+
+@pytest.mark.asyncio
+async def test_request_hooks_see_errors(hass: HomeAssistant, aioclient_mock) -> None:
+    """HTTP errors report both the response and the error; broken hooks are ignored."""
+    aioclient_mock.get(_DEPARTURES_URL, status=403, json={"errorCode": "error.key.invalid"})
+
+    class _BrokenHook(RequestHook):
+        def on_response(self, info: RequestInfo) -> None:
+            raise RuntimeError("hook bug")
+
+    hook = _RecordingHook()
+    remove = register_request_hook(hook)
+    try:
+        client = TrafikLabApiClient(
+            "key", session=async_get_clientsession(hass), hooks=[_BrokenHook()]
+        )
+        with pytest.raises(TrafikLabAuthError):
+            await client.get_departures("740098000")
+    finally:
+        remove()
+
+    assert [name for name, _ in hook.events] == ["start", "response", "error"]
+    assert hook.events[-1][1].status == 403
+    stats = get_request_stats().stats()[ENDPOINT_DEPARTURES]
+    assert stats["error_types"] == {"TrafikLabAuthError": 1}
+
+
+@pytest.mark.asyncio
+async def test_api_session_records_connect_timing(hass: HomeAssistant) -> None:
+    """The integration session traces connection setup into RequestInfo."""
+    session = async_get_api_session(hass)
+    assert async_get_api_session(hass) is session
+    trace = session.trace_configs[0]
+    info = RequestInfo(family=ENDPOINT_DEPARTURES, url=_DEPARTURES_URL)
+    ctx = SimpleNamespace(trace_request_ctx=info)
+
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=10.0):
+        await trace.on_connection_create_start[0](session, ctx, None)
+    with patch("custom_components.trafiklab.api.time.monotonic", return_value=10.25):
+        await trace.on_connection_create_end[0](session, ctx, None)
+
+    assert info.connect_time == 0.25
@@ -141,6 +141,32 @@ async def test_options_flow_departure(hass: HomeAssistant, enable_custom_integra
     assert result["data"]["line_filter"] == "52"
 
 
+@pytest.mark.asyncio
+async def test_options_flow_rejects_invalid_schedule(hass: HomeAssistant, enable_custom_integrations: None) -> None:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "k", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={},
+        unique_id="uid-schedule",
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={"refresh_interval": 900, "refresh_schedule": "mon-fri 06:30-09:00=5"},
+    )
+    assert result["type"] == "form"
+    assert result["errors"] == {"refresh_schedule": "invalid_schedule"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={"refresh_interval": 900, "refresh_schedule": "mon-fri 06:30-09:00=60"},
+    )
+    assert result["type"] == "create_entry"
+    assert result["data"]["refresh_schedule"] == "mon-fri 06:30-09:00=60"
+
+
 @pytest.mark.asyncio
 async def test_flow_departure_arrival_transport_modes_stored_in_options(hass: HomeAssistant, enable_custom_integrations: None) -> None:
     """transport_modes selected in departure_arrival step must land in entry.options."""
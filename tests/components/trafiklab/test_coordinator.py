@@ -8,10 +8,12 @@ pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
 from unittest.mock import patch
 
 import pytest
+from datetime import timedelta
 from homeassistant.core import HomeAssistant
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
 
-from custom_components.trafiklab.const import DOMAIN
+from custom_components.trafiklab.const import DOMAIN, FIRST_REFRESH_SPACING
 
 
 @pytest.mark.asyncio
@@ -159,6 +161,9 @@ async def test_coordinator_resrobot_platform_enriched(hass: HomeAssistant) -> No
     ):
         await hass.config_entries.async_setup(resrobot_entry.entry_id)
         await hass.async_block_till_done()
+        # The second entry's first refresh waits for its startup slot
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=FIRST_REFRESH_SPACING))
+        await hass.async_block_till_done()
 
     coordinator = hass.data[DOMAIN][resrobot_entry.entry_id]
     trips = coordinator.data.get("Trip", [])
@@ -341,3 +346,603 @@ async def test_coordinator_quota_error_sets_last_api_error_no_repair_issue(hass:
     issue_id = f"invalid_api_key_{entry.entry_id}"
     assert issue_reg.async_get_issue(DOMAIN, issue_id) is None
 
+
+
+@pytest.mark.asyncio
+async def test_coordinator_open_circuit_sets_last_api_error(hass: HomeAssistant) -> None:
+    """An open circuit breaker is reported through last_api_error."""
+    from custom_components.trafiklab.api import get_circuit_breaker
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={},
+        unique_id="coord-circuit-open",
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    breaker = get_circuit_breaker("realtime-api.trafiklab.se")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    with patch("custom_components.trafiklab.api.TrafikLabApiClient._request_json") as mocked:
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    assert not mocked.called
+    assert not coordinator.last_update_success
+    assert coordinator.last_api_error["code"] == "circuit_open"
+    assert coordinator.last_api_error["circuit_state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_coordinator_unchanged_board_keeps_previous_data(hass: HomeAssistant) -> None:
+    """An identical board (only the response timestamp differs) does not notify listeners."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={},
+        unique_id="coord-unchanged",
+    )
+    entry.add_to_hass(hass)
+    departure = {
+        "scheduled": "2025-01-01T12:05:00",
+        "realtime": "2025-01-01T12:06:00",
+        "route": {"designation": "52", "direction": "Central", "transport_mode": "BUS"},
+    }
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"timestamp": "2025-01-01T12:00:00", "departures": [departure]},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    previous = coordinator.data
+    updates: list[None] = []
+    coordinator.async_add_listener(lambda: updates.append(None))
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"timestamp": "2025-01-01T12:01:00", "departures": [copy.deepcopy(departure)]},
+    ):
+        await coordinator.async_refresh()
+    assert coordinator.data is previous
+    assert not updates
+
+    changed = {**departure, "realtime": "2025-01-01T12:07:00"}
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"timestamp": "2025-01-01T12:02:00", "departures": [changed]},
+    ):
+        await coordinator.async_refresh()
+    assert coordinator.data is not previous
+    assert len(updates) == 1
+
+
+@pytest.mark.asyncio
+async def test_coordinator_unchanged_resrobot_response_skips_normalization(
+    hass: HomeAssistant, mock_resrobot_response
+) -> None:
+    """An identical Resrobot response is not normalized again."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "k",
+            "name": "T",
+            "sensor_type": "resrobot_travel_search",
+            "origin_type": "stop_id",
+            "origin": "740000001",
+            "destination_type": "stop_id",
+            "destination": "740000002",
+        },
+        options={},
+        unique_id="coord-resrobot-unchanged",
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_resrobot_travel_search",
+        return_value=copy.deepcopy(mock_resrobot_response),
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    previous = coordinator.data
+    with (
+        patch(
+            "custom_components.trafiklab.api.TrafikLabApiClient.get_resrobot_travel_search",
+            return_value=copy.deepcopy(mock_resrobot_response),
+        ),
+        patch.object(
+            type(coordinator), "_normalize_resrobot_response", autospec=True
+        ) as normalize,
+    ):
+        await coordinator.async_refresh()
+
+    assert coordinator.data is previous
+    assert not normalize.called
+
+    # Only the envelope around the trips differs
+    changed_envelope = {
+        **copy.deepcopy(mock_resrobot_response),
+        "serverVersion": "2.1.0",
+        "requestId": "2",
+        "TechnicalMessages": {"TechnicalMessage": [{"key": "requestTime", "value": "12:01"}]},
+    }
+    with (
+        patch(
+            "custom_components.trafiklab.api.TrafikLabApiClient.get_resrobot_travel_search",
+            return_value=changed_envelope,
+        ),
+        patch.object(
+            type(coordinator), "_normalize_resrobot_response", autospec=True
+        ) as normalize,
+    ):
+        await coordinator.async_refresh()
+
+    assert coordinator.data is previous
+    assert not normalize.called
+
+
+def test_adaptive_interval_tracks_next_departure() -> None:
+    """Back off when idle, wake at the window edge, tighten as a departure nears."""
+    from custom_components.trafiklab.coordinator import adaptive_interval
+    from custom_components.trafiklab.models import TimetableEntry
+
+    def entry_in(seconds: float) -> TimetableEntry:
+        entry = TimetableEntry()
+        entry.timestamp = 1_000_000 + seconds
+        return entry
+
+    now = 1_000_000.0
+    assert adaptive_interval([], now, 300, 3600) == 1800
+    assert adaptive_interval([entry_in(-120)], now, 300, 3600) == 1800
+    # First departure 100 minutes out: wake when it enters the 60 minute window
+    assert adaptive_interval([entry_in(6000)], now, 300, 3600) == 1800
+    assert adaptive_interval([entry_in(4000)], now, 300, 3600) == 400
+    assert adaptive_interval([entry_in(3700)], now, 300, 3600) == 300
+    # Inside the window: half the lead, capped at the base and floored at 60 s
+    assert adaptive_interval([entry_in(1800), entry_in(400)], now, 300, 3600) == 200
+    assert adaptive_interval([entry_in(90)], now, 300, 3600) == 60
+    assert adaptive_interval([entry_in(3000)], now, 300, 3600) == 300
+
+
+@pytest.mark.asyncio
+async def test_coordinator_adaptive_interval_follows_filtered_board(hass: HomeAssistant) -> None:
+    """Adaptive mode schedules from the departures the sensor filters keep."""
+    from datetime import datetime, timedelta
+    from custom_components.trafiklab.api import TrafikLabServerError
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"adaptive_interval": True, "refresh_interval": 300, "line_filter": "52"},
+        unique_id="coord-adaptive",
+    )
+    entry.add_to_hass(hass)
+    soon = (datetime.now() + timedelta(minutes=4)).isoformat(timespec="seconds")
+    later = (datetime.now() + timedelta(minutes=20)).isoformat(timespec="seconds")
+    response = {
+        "departures": [
+            {"scheduled": soon, "route": {"designation": "4", "direction": "A"}},
+            {"scheduled": later, "route": {"designation": "52", "direction": "B"}},
+        ]
+    }
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value=response,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    # Line 4 is filtered out; line 52 leaves in ~20 minutes, so the base applies
+    assert coordinator.update_interval == timedelta(seconds=300)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=1800)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        side_effect=TrafikLabServerError("boom"),
+    ):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(seconds=300)
+
+
+@pytest.mark.asyncio
+async def test_coordinator_switches_interval_at_schedule_boundaries(hass: HomeAssistant, freezer) -> None:
+    """The schedule changes update_interval at range boundaries without a reload."""
+    from datetime import timedelta
+    from homeassistant.util import dt as dt_util
+    from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"refresh_interval": 900, "refresh_schedule": "06:30-09:00=60"},
+        unique_id="coord-schedule",
+    )
+    entry.add_to_hass(hass)
+    start = dt_util.now().replace(hour=6, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    freezer.move_to(start)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.update_interval == timedelta(seconds=900)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ) as mocked:
+        freezer.move_to(start.replace(minute=30))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        assert coordinator.update_interval == timedelta(seconds=60)
+        # Entering a faster range refreshes right away
+        assert mocked.called
+
+        freezer.move_to(start.replace(hour=9))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+    assert coordinator.update_interval == timedelta(seconds=900)
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    assert coordinator._unsub_schedule is None
+
+
+@pytest.mark.asyncio
+async def test_entries_for_same_stop_share_one_fetch(hass: HomeAssistant) -> None:
+    """One refresh serves every entry watching the stop; filters stay per entry."""
+    from datetime import datetime
+
+    when = (datetime.now() + timedelta(minutes=10)).isoformat(timespec="seconds")
+    response = {
+        "departures": [
+            {"scheduled": when, "route": {"designation": "4", "direction": "Radiohuset"}},
+            {"scheduled": when, "route": {"designation": "52", "direction": "Sickla"}},
+        ]
+    }
+    entries = []
+    for idx, line in enumerate(("4", "52")):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={"api_key": "key", "stop_id": "740098000", "name": f"Line {line}", "sensor_type": "departure"},
+            options={"line_filter": line},
+            unique_id=f"shared-{idx}",
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+    other = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "Arr", "sensor_type": "arrival"},
+        options={},
+        unique_id="shared-arrival",
+    )
+    other.add_to_hass(hass)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value=response,
+    ) as departures, patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_arrivals",
+        return_value={"arrivals": []},
+    ):
+        assert await hass.config_entries.async_setup(entries[0].entry_id)
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3 * FIRST_REFRESH_SPACING))
+        await hass.async_block_till_done()
+        # The second entry got the board from the first and skipped its own fetch
+        assert departures.call_count == 1
+
+        first, second = (hass.data[DOMAIN][e.entry_id] for e in entries)
+        assert first.shared_feed_members == 2
+        assert hass.data[DOMAIN][other.entry_id].shared_feed_members == 1
+        assert second.data is first.data
+
+        await second.async_refresh()
+        assert departures.call_count == 2
+        assert first.data is second.data
+
+    states = {s.attributes.get("line") for s in hass.states.async_all("sensor")}
+    assert {"4", "52"} <= states
+
+    for entry in (*entries, other):
+        await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_update_condition_suspends_and_resumes_polling(hass: HomeAssistant) -> None:
+    """Polling stops while the condition is false and refreshes as soon as it turns true."""
+    hass.states.async_set("input_boolean.commute", "off")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"update_condition": "{{ is_state('input_boolean.commute', 'on') }}"},
+        unique_id="coord-condition",
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ) as mocked:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert not mocked.called
+        # No timer while the condition is false
+        assert coordinator._unsub_refresh is None
+
+        with patch(
+            "custom_components.trafiklab.coordinator.Template.async_render",
+            side_effect=AssertionError("condition must not be rendered per poll"),
+        ):
+            await coordinator.async_refresh()
+        assert not mocked.called
+
+        hass.states.async_set("input_boolean.commute", "on")
+        await hass.async_block_till_done()
+        assert mocked.call_count == 1
+        assert coordinator._unsub_refresh is not None
+
+        hass.states.async_set("input_boolean.commute", "off")
+        await hass.async_block_till_done()
+        assert coordinator._unsub_refresh is None
+        assert mocked.call_count == 1
+
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.asyncio
+async def test_invalid_update_condition_keeps_polling(hass: HomeAssistant) -> None:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"update_condition": "{{ is_state('input_boolean.x', 'on' }}"},
+        unique_id="coord-condition-invalid",
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ) as mocked:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    assert mocked.called
+
+
+@pytest.mark.asyncio
+async def test_serve_stale_keeps_last_data_through_server_errors(hass: HomeAssistant, freezer) -> None:
+    """With serve_stale, transient errors keep the last data until max_staleness."""
+    from custom_components.trafiklab.api import TrafikLabServerError
+
+    freezer.move_to("2025-01-01 12:00:00+00:00")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"refresh_interval": 300, "serve_stale": True, "max_staleness": 10},
+        unique_id="coord-stale",
+    )
+    entry.add_to_hass(hass)
+    soon = (dt_util.now() + timedelta(minutes=20, seconds=15)).isoformat(timespec="seconds")
+    departure = {
+        "scheduled": soon,
+        "route": {"designation": "52", "direction": "Central", "transport_mode": "BUS"},
+    }
+    patch_departures = "custom_components.trafiklab.api.TrafikLabApiClient.get_departures"
+
+    with patch(patch_departures, return_value={"departures": [departure]}):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert hass.states.get("sensor.x_upcoming_departures").state == "20"
+
+    freezer.tick(timedelta(minutes=3))
+    with patch(patch_departures, side_effect=TrafikLabServerError("boom", http_status=503)):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert coordinator.last_update_success
+        assert coordinator.serving_stale
+        # Retries at a quarter of the refresh interval
+        assert coordinator.update_interval == timedelta(seconds=75)
+        state = hass.states.get("sensor.x_upcoming_departures")
+        assert state.state == "17"
+        assert state.attributes["data_age_seconds"] == 180
+        assert state.attributes["api_error_code"] == "server_error"
+
+        # A retry that leaves the countdown as it was still writes the new age
+        freezer.tick(timedelta(seconds=10))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.x_upcoming_departures")
+        assert state.state == "17"
+        assert state.attributes["data_age_seconds"] == 190
+
+        # Past max_staleness the update fails as before
+        freezer.tick(timedelta(minutes=8))
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+        assert not coordinator.last_update_success
+        assert hass.states.get("sensor.x_upcoming_departures").state == "unavailable"
+
+    with patch(patch_departures, return_value={"departures": [departure]}):
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+    assert not coordinator.serving_stale
+    assert coordinator.update_interval == timedelta(seconds=300)
+    assert "data_age_seconds" not in hass.states.get("sensor.x_upcoming_departures").attributes
+
+
+@pytest.mark.asyncio
+async def test_serve_stale_does_not_mask_auth_or_request_errors(hass: HomeAssistant) -> None:
+    """A bad key or a rejected request fails the update even with serve_stale."""
+    import asyncio
+
+    from custom_components.trafiklab.api import TrafikLabApiError, TrafikLabAuthError
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"refresh_interval": 300, "serve_stale": True},
+        unique_id="coord-stale-auth",
+    )
+    entry.add_to_hass(hass)
+    soon = (dt_util.now() + timedelta(minutes=20)).isoformat(timespec="seconds")
+    patch_departures = "custom_components.trafiklab.api.TrafikLabApiClient.get_departures"
+
+    with patch(patch_departures, return_value={"departures": [{"scheduled": soon}]}):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    for err in (
+        TrafikLabAuthError("Invalid key", http_status=401),
+        TrafikLabApiError("Bad request", http_status=400),
+    ):
+        with patch(patch_departures, side_effect=err):
+            await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+        assert not coordinator.serving_stale
+
+    with patch(patch_departures, return_value={"departures": [{"scheduled": soon}]}):
+        await coordinator.async_refresh()
+    # A timeout is transient and keeps the data
+    timeout = TrafikLabApiError("Timed out")
+    timeout.__cause__ = asyncio.TimeoutError()
+    with patch(patch_departures, side_effect=timeout):
+        await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.serving_stale
+
+
+@pytest.mark.asyncio
+async def test_prefetch_merges_later_windows_and_refreshes_them_rarely(hass: HomeAssistant, freezer) -> None:
+    """Prefetched hours are merged by trip id and only refetched every 30 minutes."""
+    freezer.move_to("2025-01-01 12:00:00+00:00")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "X", "sensor_type": "departure"},
+        options={"refresh_interval": 300, "prefetch_windows": 2},
+        unique_id="coord-prefetch",
+    )
+    entry.add_to_hass(hass)
+
+    def _departure(trip_id: str, when: str) -> dict:
+        return {"scheduled": when, "trip": {"trip_id": trip_id}, "route": {"designation": "52"}}
+
+    # The test time zone is US/Pacific: 12:00 UTC is 04:00 local
+    responses = {
+        None: [_departure("a", "2025-01-01T12:10:00+00:00")],
+        "2025-01-01T05:00": [
+            _departure("a", "2025-01-01T12:10:00+00:00"),
+            _departure("b", "2025-01-01T13:30:00+00:00"),
+        ],
+        "2025-01-01T06:00": [_departure("c", "2025-01-01T14:15:00+00:00")],
+    }
+    requested: list[str | None] = []
+
+    async def _get_departures(stop_id: str, time: str | None = None) -> dict:
+        requested.append(time)
+        return {"departures": responses[time]}
+
+    patch_departures = "custom_components.trafiklab.api.TrafikLabApiClient.get_departures"
+    with patch(patch_departures, side_effect=_get_departures):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert sorted(requested, key=str) == sorted([None, "2025-01-01T05:00", "2025-01-01T06:00"], key=str)
+        assert [e.trip_id for e in coordinator.data.entries] == ["a", "b", "c"]
+
+        requested.clear()
+        freezer.tick(timedelta(minutes=5))
+        await coordinator.async_refresh()
+        assert requested == [None]
+        assert [e.trip_id for e in coordinator.data.entries] == ["a", "b", "c"]
+
+        # Refetched after 30 minutes; failing windows keep the earlier ones
+        requested.clear()
+        freezer.tick(timedelta(minutes=30))
+        await coordinator.async_refresh()
+        assert len(requested) == 3
+        assert coordinator.last_update_success
+        # b (13:30) is now within the coming hour, where the near board rules
+        assert [e.trip_id for e in coordinator.data.entries] == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_runs_for_entry_fed_by_a_shared_stop(hass: HomeAssistant, freezer) -> None:
+    """An entry getting its near board from another entry still prefetches."""
+    freezer.move_to("2025-01-01 12:00:00+00:00")
+    plain = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "B", "sensor_type": "departure"},
+        options={"refresh_interval": 300},
+        unique_id="prefetch-shared-b",
+    )
+    prefetching = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "A", "sensor_type": "departure"},
+        options={"refresh_interval": 300, "prefetch_windows": 2},
+        unique_id="prefetch-shared-a",
+    )
+    plain.add_to_hass(hass)
+    prefetching.add_to_hass(hass)
+
+    def _departure(trip_id: str, when: str) -> dict:
+        return {"scheduled": when, "trip": {"trip_id": trip_id}, "route": {"designation": "52"}}
+
+    requested: list[str | None] = []
+
+    async def _get_departures(stop_id: str, time: str | None = None) -> dict:
+        requested.append(time)
+        if time is None:
+            return {"departures": [_departure("a", "2025-01-01T12:10:00+00:00")]}
+        return {"departures": [_departure(f"later-{time}", "2025-01-01T14:45:00+00:00")]}
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        side_effect=_get_departures,
+    ):
+        # Sets up both entries of the domain
+        assert await hass.config_entries.async_setup(plain.entry_id)
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3 * FIRST_REFRESH_SPACING))
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][prefetching.entry_id]
+
+        # Prefetch is due again; B refreshes the stop and shares the board
+        freezer.tick(timedelta(minutes=31))
+        requested.clear()
+        await hass.data[DOMAIN][plain.entry_id].async_refresh()
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    # B's near-board fetch and A's two prefetch windows
+    assert requested.count(None) == 1
+    assert set(requested) == {None, "2025-01-01T05:31", "2025-01-01T06:31"}
+    assert [e.trip_id for e in coordinator.data.entries] == [
+        "a", "later-2025-01-01T05:31", "later-2025-01-01T06:31"
+    ]
+    assert len(hass.data[DOMAIN][plain.entry_id].data.entries) == 1
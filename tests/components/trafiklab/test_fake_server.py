@@ -0,0 +1,85 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+"""The stand-in server in scripts/ must stay compatible with the API client."""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp.test_utils import TestServer
+from homeassistant.core import HomeAssistant
+
+from custom_components.trafiklab.api import (
+    RetryPolicy,
+    TrafikLabApiClient,
+    TrafikLabQuotaError,
+    ENDPOINT_DEPARTURES,
+    configure_base_urls,
+)
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+_SCRIPT = Path(__file__).resolve().parents[3] / "scripts" / "fake_trafiklab_server.py"
+_spec = importlib.util.spec_from_file_location("fake_trafiklab_server", _SCRIPT)
+fake_server = importlib.util.module_from_spec(_spec)
+sys.modules.setdefault(_spec.name, fake_server)
+_spec.loader.exec_module(fake_server)
+
+
+@pytest.fixture
+async def fake_base_url(socket_enabled):
+    """Start the fake server and point the client's base URLs at it."""
+
+    async def _start(config):
+        server = TestServer(fake_server.create_app(config))
+        await server.start_server()
+        servers.append(server)
+        base = str(server.make_url("")).rstrip("/")
+        configure_base_urls(f"{base}/v1", f"{base}/v2.1")
+        return server
+
+    servers: list[TestServer] = []
+    yield _start
+    for server in servers:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_client_reads_all_endpoints_from_fake_server(hass: HomeAssistant, fake_base_url) -> None:
+    """Every endpoint the integration uses is served in the shape it expects."""
+    await fake_base_url(fake_server.FakeServerConfig(departures=7, trips=2, seed=1))
+
+    async with TrafikLabApiClient("key") as client:
+        departures = await client.get_departures("740098000")
+        arrivals = await client.get_arrivals("740098000", "2025-01-01T10:00")
+        stops = await client.search_stops("central")
+        trips = await client.get_resrobot_travel_search(
+            "rkey", "stop_id", "740000001", "stop_id", "740000002"
+        )
+        locations = await client.search_resrobot_stops("central", "rkey")
+
+    assert len(departures["departures"]) == 7
+    assert departures["departures"][0]["route"]["designation"]
+    assert arrivals["arrivals"][0]["scheduled"].startswith("2025-01-01T10:")
+    assert stops["stop_groups"]
+    assert len(trips["Trip"]) == 2
+    assert locations["stopLocationOrCoordLocation"]
+
+
+@pytest.mark.asyncio
+async def test_fake_server_enforces_per_key_quota(hass: HomeAssistant, fake_base_url) -> None:
+    """Requests beyond the per-minute quota get a 429 with Retry-After."""
+    server = await fake_base_url(fake_server.FakeServerConfig(quota_per_minute=2, departures=1))
+
+    async with TrafikLabApiClient(
+        "key",
+        use_cache=False,
+        retry_policies={ENDPOINT_DEPARTURES: RetryPolicy(max_attempts=1)},
+    ) as client:
+        await client.get_departures("740098000")
+        await client.get_departures("740098000")
+        with pytest.raises(TrafikLabQuotaError) as excinfo:
+            await client.get_departures("740098000")
+
+    assert excinfo.value.retry_after is not None
+    assert server.app["fake"].stats.statuses[429] == 1
@@ -0,0 +1,136 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+from datetime import datetime, timedelta, timezone
+
+from custom_components.trafiklab.models import (
+    KIND_ARRIVALS,
+    KIND_DEPARTURES,
+    TimetableBoard,
+    TimetableEntry,
+    as_timetable_board,
+    build_entry_filter,
+    merge_timeline,
+)
+
+
+def _departure(**overrides) -> dict:
+    item = {
+        "scheduled": "2025-01-01T12:05:00+01:00",
+        "realtime": "2025-01-01T12:06:00+01:00",
+        "is_realtime": True,
+        "delay": 60,
+        "canceled": False,
+        "realtime_platform": {"designation": "B", "id": "x"},
+        "scheduled_platform": {"designation": "A", "id": "y"},
+        "route": {"designation": "52", "direction": "Central", "transport_mode": "BUS", "name": "Bus 52"},
+        "agency": {"id": "1", "name": "SL"},
+        "trip": {"trip_id": "t1", "start_date": "2025-01-01"},
+        "stop": {"id": "740098000", "name": "Somewhere"},
+    }
+    item.update(overrides)
+    return item
+
+
+def test_entry_projects_used_fields_and_parses_time() -> None:
+    """Only sensor fields are kept and the expected time is pre-parsed."""
+    entry = TimetableEntry.from_api(_departure())
+
+    assert entry.line == "52"
+    assert entry.destination == "Central"
+    assert entry.transport_mode == "BUS"
+    assert entry.agency == "SL"
+    assert entry.trip_id == "t1"
+    assert entry.platform == "B"
+    assert entry.delay == 60
+    assert entry.time_formatted == "12:06"
+    assert entry.timestamp == datetime(2025, 1, 1, 11, 6, tzinfo=timezone.utc).timestamp()
+    assert not hasattr(entry, "__dict__")
+
+
+def test_entry_falls_back_to_scheduled_values() -> None:
+    """Without realtime data the scheduled time and platform are used."""
+    entry = TimetableEntry.from_api(_departure(realtime=None, realtime_platform=None))
+
+    assert entry.expected == ""
+    assert entry.time_formatted == "12:05"
+    assert entry.platform == "A"
+
+
+def test_entry_minutes_until() -> None:
+    """minutes_until counts whole minutes from the given epoch time."""
+    soon = (datetime.now(timezone.utc) + timedelta(minutes=10, seconds=30)).isoformat()
+    entry = TimetableEntry.from_api(_departure(realtime=soon))
+    now = datetime.now(timezone.utc).timestamp()
+
+    assert entry.minutes_until(now) == 10
+    assert TimetableEntry.from_api(_departure(realtime="bad", scheduled="")).minutes_until(now) is None
+
+
+def test_board_from_api_and_coercion() -> None:
+    """Raw responses are projected; boards pass through unchanged."""
+    board = TimetableBoard.from_api(
+        {"timestamp": "2025-01-01T12:00:00", "query": {}, "stops": [], "departures": [_departure()]},
+        KIND_DEPARTURES,
+    )
+
+    assert board.kind == KIND_DEPARTURES
+    assert len(board.entries) == 1
+    assert as_timetable_board(board, KIND_DEPARTURES) is board
+    assert as_timetable_board({"arrivals": [_departure()]}, KIND_ARRIVALS).entries[0].line == "52"
+    assert as_timetable_board(None, KIND_DEPARTURES) is None
+
+
+def test_merge_timeline_dedupes_by_trip_and_respects_horizon() -> None:
+    def entry(trip_id: str, minute: int, line: str = "52") -> TimetableEntry:
+        return TimetableEntry(
+            line=line, trip_id=trip_id, scheduled=f"2025-01-01T13:{minute:02d}:00+00:00"
+        )
+
+    near = TimetableBoard(KIND_DEPARTURES, (entry("a", 10), entry("b", 50)))
+    horizon = datetime(2025, 1, 1, 13, 30, tzinfo=timezone.utc).timestamp()
+    prefetched = [
+        entry("x", 20),            # before the horizon: near is authoritative
+        entry("b", 55),            # already on the near board
+        entry("d", 58),
+        entry("", 45, line="7"),   # no trip id: keyed on line/destination/time
+        entry("", 45, line="7"),
+        entry("c", 40),
+    ]
+    merged = merge_timeline(near, prefetched, horizon)
+    assert [(e.trip_id, e.line) for e in merged.entries] == [
+        ("a", "52"), ("c", "52"), ("", "7"), ("b", "52"), ("d", "52")
+    ]
+    assert merge_timeline(near, [entry("x", 20)], horizon) is near
+
+
+def test_entry_filter_select_uses_board_index() -> None:
+    board = TimetableBoard(
+        KIND_DEPARTURES,
+        tuple(
+            TimetableEntry(line=line, destination=dest, transport_mode=mode)
+            for line, dest, mode in (
+                ("52", "Sickla", "BUS"),
+                ("14", "Mörby centrum", "METRO"),
+                ("52", "Karolinska", "BUS"),
+                ("7", "Sickla", "TRAM"),
+                ("14", "Fruängen", "METRO"),
+            )
+        ),
+    )
+    assert board.by_line["52"] == [0, 2]
+    assert board.by_mode["METRO"] == [1, 4]
+    configs = [
+        {},
+        {"line_filter": " 52, 14 "},
+        {"line_filter": "52", "direction": "sickla"},
+        {"transport_modes": ["metro", "tram"]},
+        {"line_filter": "52,7", "transport_modes": ["tram"]},
+        {"direction": "karolinska, fruängen"},
+        {"line_filter": "99"},
+    ]
+    for config in configs:
+        entry_filter = build_entry_filter(config)
+        # The indexed path agrees with testing each entry
+        assert entry_filter.select(board) == [e for e in board.entries if entry_filter(e)]
+    assert [e.line for e in build_entry_filter(configs[4]).select(board)] == ["7"]
+    assert build_entry_filter({"line_filter": "52"}) == build_entry_filter({"line_filter": "52 "})
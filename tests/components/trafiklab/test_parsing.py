@@ -0,0 +1,36 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+from datetime import datetime
+
+from custom_components.trafiklab.parsing import (
+    parse_iso_duration_minutes,
+    parse_resrobot_datetime,
+    parse_resrobot_timestamp,
+)
+
+
+def test_parse_resrobot_datetime() -> None:
+    assert parse_resrobot_datetime("2025-01-06", "08:15:30") == datetime(2025, 1, 6, 8, 15, 30)
+    assert parse_resrobot_datetime("2025-01-06", "08:15") == datetime(2025, 1, 6, 8, 15)
+    # Layouts outside the fast path still parse as strptime did
+    assert parse_resrobot_datetime("2025-1-6", "8:15") == datetime(2025, 1, 6, 8, 15)
+    assert parse_resrobot_datetime("2025-02-30", "08:15") is None
+    assert parse_resrobot_datetime("2025-01-06", "25:00") is None
+    assert parse_resrobot_datetime("2025-01-06", "") is None
+    assert parse_resrobot_datetime(None, "08:15") is None
+
+
+def test_parse_resrobot_timestamp() -> None:
+    assert parse_resrobot_timestamp("2025-01-06 23:59:59") == datetime(2025, 1, 6, 23, 59, 59)
+    assert parse_resrobot_timestamp("2025-01-06") is None
+    assert parse_resrobot_timestamp("") is None
+
+
+def test_parse_iso_duration_minutes() -> None:
+    assert parse_iso_duration_minutes("PT9M") == 9
+    assert parse_iso_duration_minutes("PT1H30M") == 90
+    assert parse_iso_duration_minutes("pt45s") == 0
+    assert parse_iso_duration_minutes("P1DT2H3M4S") == 24 * 60 + 123
+    assert parse_iso_duration_minutes("P1W") == 7 * 24 * 60
+    assert parse_iso_duration_minutes("90 minutes") is None
+    assert parse_iso_duration_minutes(None) is None
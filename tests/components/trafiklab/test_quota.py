@@ -0,0 +1,117 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.trafiklab import api
+from custom_components.trafiklab.api import RequestInfo
+from custom_components.trafiklab.const import DOMAIN
+from custom_components.trafiklab.quota import (
+    STORAGE_KEY,
+    QuotaPlanner,
+    async_get_quota_planner,
+    budget_factors,
+    key_id,
+    seconds_to_month_end,
+)
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+_PATCH_DEPARTURES = "custom_components.trafiklab.api.TrafikLabApiClient.get_departures"
+
+
+def _entry(entry_id: str, stop_id: str, **options) -> MockConfigEntry:
+    return MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": stop_id, "name": entry_id.title(), "sensor_type": "departure"},
+        options={"refresh_interval": 60, **options},
+        unique_id=entry_id,
+        entry_id=entry_id,
+    )
+
+
+def test_budget_factors() -> None:
+    # Within the allowance nothing is stretched
+    assert budget_factors([(0.01, 1.0, 60.0), (0.01, 4.0, 60.0)], 0.05) == [1.0, 1.0]
+    demand = [(1 / 60, 4.0, 60.0), (1 / 60, 1.0, 60.0)]
+    high, low = budget_factors(demand, 0.01)
+    assert 1.0 <= high < low
+    assert low / high == pytest.approx(4.0, rel=1e-3)
+    assert (1 / 60) / high + (1 / 60) / low == pytest.approx(0.01, rel=1e-3)
+    # An allowance the caps cannot reach leaves everyone at the cap
+    assert budget_factors([(1.0, 1.0, 10.0), (1.0, 2.0, 5.0)], 0.0) == [10.0, 5.0]
+
+
+def test_seconds_to_month_end() -> None:
+    now = datetime(2025, 2, 27, 12, 0, tzinfo=dt_util.UTC)
+    assert seconds_to_month_end(now) == 36 * 3600
+
+
+@pytest.mark.asyncio
+async def test_planner_stretches_intervals_by_priority(
+    hass: HomeAssistant, hass_storage, freezer
+) -> None:
+    freezer.move_to("2025-01-16 08:00:00+00:00")
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"month": "2025-01", "counts": {key_id("key"): 10000}},
+    }
+    high = _entry("high", "1", monthly_quota=30000, minute_quota=20, poll_priority="high")
+    low = _entry("low", "2", poll_priority="low")
+    high.add_to_hass(hass)
+    low.add_to_hass(hass)
+
+    with patch(_PATCH_DEPARTURES, AsyncMock(return_value={"departures": []})), patch.object(
+        QuotaPlanner, "async_plan", autospec=True, side_effect=QuotaPlanner.async_plan
+    ) as plan:
+        # Sets up both entries of the domain
+        assert await hass.config_entries.async_setup(high.entry_id)
+        await hass.async_block_till_done()
+        # The registrations of both entries are planned together
+        assert plan.call_count == 1
+
+        high_coordinator = hass.data[DOMAIN]["high"]
+        low_coordinator = hass.data[DOMAIN]["low"]
+        assert 1.0 < high_coordinator.budget_factor < low_coordinator.budget_factor
+        assert low_coordinator.update_interval.total_seconds() == pytest.approx(
+            60 * low_coordinator.budget_factor
+        )
+        # The per-minute quota of the key replaces the default rate limit
+        assert api.get_rate_limiter("key").stats()["rate_per_minute"] == 20
+
+        # Used plus the planned rate until the month ends stays within 95%
+        state = hass.states.get("sensor.high_projected_api_usage")
+        assert state is not None
+        assert int(state.state) == pytest.approx(28500, abs=2)
+        assert state.attributes["used"] == 10000
+        # Only entries with a monthly quota get the diagnostic sensor
+        assert hass.states.get("sensor.low_projected_api_usage") is None
+
+        planner = await async_get_quota_planner(hass)
+        planner.on_request_start(RequestInfo(family="departures", url="", attempt=1, api_key="key"))
+        assert planner.used("key") == 10001
+
+        assert await hass.config_entries.async_unload(high.entry_id)
+        assert await hass.config_entries.async_unload(low.entry_id)
+        await hass.async_block_till_done()
+    assert "key" not in api._KEY_RATE_LIMITS
+
+
+@pytest.mark.asyncio
+async def test_usage_from_a_previous_month_is_dropped(
+    hass: HomeAssistant, hass_storage, freezer
+) -> None:
+    freezer.move_to("2025-02-01 12:00:00+00:00")
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"month": "2025-01", "counts": {key_id("key"): 29000}},
+    }
+    planner = await async_get_quota_planner(hass)
+    assert planner.used("key") == 0
@@ -0,0 +1,70 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+from datetime import datetime
+
+import pytest
+
+from custom_components.trafiklab.schedule import RefreshSchedule, ScheduleError
+
+# 2025-01-06 is a Monday
+MONDAY = datetime(2025, 1, 6)
+
+
+def test_parse_and_match_rules() -> None:
+    schedule = RefreshSchedule.parse(
+        "mon-fri 06:30-09:00=60; Sat,Sun 10:00-14:00=300\ndaily 06:00-24:00=600"
+    )
+    assert len(schedule.rules) == 3
+    assert schedule.interval_at(MONDAY.replace(hour=6, minute=30)) == 60
+    assert schedule.interval_at(MONDAY.replace(hour=8, minute=59)) == 60
+    # End is exclusive; the next matching rule applies
+    assert schedule.interval_at(MONDAY.replace(hour=9)) == 600
+    assert schedule.interval_at(MONDAY.replace(hour=5)) is None
+    saturday = MONDAY.replace(day=11, hour=11)
+    assert schedule.interval_at(saturday) == 300
+
+
+def test_empty_schedule() -> None:
+    schedule = RefreshSchedule.parse("  ")
+    assert not schedule
+    assert schedule.interval_at(MONDAY) is None
+    assert schedule.next_change(MONDAY) is None
+
+
+def test_mean_rate_weights_rules_by_time_covered() -> None:
+    # 12 of 24 hours every day at 60s, the rest at the 600s default
+    schedule = RefreshSchedule.parse("06:00-18:00=60")
+    assert schedule.mean_rate(600) == pytest.approx((1 / 60 + 1 / 600) / 2)
+    assert RefreshSchedule.parse("").mean_rate(300) == pytest.approx(1 / 300)
+    # Overlapping rules: the first wins; weekdays make 5 * (180 + 30 + 120)
+    # refreshes, weekend days 2 * (60 + 132)
+    schedule = RefreshSchedule.parse("mon-fri 06:00-09:00=60; 08:00-10:00=120")
+    assert schedule.mean_rate(600) == pytest.approx(2034 / (7 * 24 * 3600))
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "mon-fri 06:30-09:00",
+        "funday 06:30-09:00=60",
+        "fri-mon 06:30-09:00=60",
+        "09:00-06:30=60",
+        "06:30-25:00=60",
+        "06:30-09:00=10",
+        "06:30-09:00=7200",
+    ],
+)
+def test_invalid_schedules_raise(text: str) -> None:
+    with pytest.raises(ScheduleError):
+        RefreshSchedule.parse(text)
+
+
+def test_next_change_finds_following_boundary() -> None:
+    schedule = RefreshSchedule.parse("mon-fri 06:30-09:00=60; 18:00-24:00=120")
+    assert schedule.next_change(MONDAY.replace(hour=5)) == MONDAY.replace(hour=6, minute=30)
+    assert schedule.next_change(MONDAY.replace(hour=6, minute=30)) == MONDAY.replace(hour=9)
+    assert schedule.next_change(MONDAY.replace(hour=20)) == MONDAY.replace(day=7)
+    # Friday evening to Saturday midnight, then the weekend only has 18:00
+    friday = MONDAY.replace(day=10, hour=19)
+    assert schedule.next_change(friday) == MONDAY.replace(day=11)
+    assert schedule.next_change(MONDAY.replace(day=11, hour=1)) == MONDAY.replace(day=11, hour=18)
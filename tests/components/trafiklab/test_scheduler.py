@@ -0,0 +1,122 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.trafiklab.const import DOMAIN, FIRST_REFRESH_SPACING, MINIMUM_SCAN_INTERVAL
+from custom_components.trafiklab.scheduler import PollScheduler, async_get_poll_scheduler
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+
+def test_next_refresh_stays_on_phase_grid() -> None:
+    # Grid for phase 0.25 of 60 s: 15, 75, 135, ...
+    assert PollScheduler.next_refresh(0.0, 60, 0.25) == 75
+    assert PollScheduler.next_refresh(15.2, 60, 0.25) == 135
+    # Refreshes that ran on the grid stay on it
+    assert PollScheduler.next_refresh(15.8, 60, 0.25, last=15.0) == 75
+    assert PollScheduler.next_refresh(75.4, 60, 0.25, last=75.0) == 135
+    # A manual refresh shortly before a grid point skips that point
+    assert PollScheduler.next_refresh(60.0, 60, 0.25) == 135
+    # A long refresh never schedules the next one in the past
+    assert PollScheduler.next_refresh(200.0, 60, 0.25, last=15.0) == 255
+
+
+def test_next_refresh_keeps_a_full_interval_across_interval_changes() -> None:
+    last = 0.0
+    for interval, delay in [
+        (60, 0.0), (300, 0.3), (60, 1.2), (120, 0.0), (90, 4.0), (600, 0.1), (60, 0.0), (75, 0.0)
+    ]:
+        when = PollScheduler.next_refresh(last + delay, interval, 0.37, last)
+        gap = when - last
+        assert gap >= max(interval, MINIMUM_SCAN_INTERVAL)
+        assert gap < 2 * interval
+        last = when
+
+
+@pytest.mark.asyncio
+async def test_phases_are_spread_and_slots_reused(hass: HomeAssistant) -> None:
+    scheduler = PollScheduler(hass)
+    phases = [scheduler.register(f"entry{i}") for i in range(10)]
+    assert len(set(phases)) == 10
+    # No two of ten phases are closer than 3% of the interval
+    ordered = sorted(phases)
+    assert min(b - a for a, b in zip(ordered, ordered[1:])) > 0.03
+    assert scheduler.register("entry3") == phases[3]
+
+    scheduler.unregister("entry3")
+    assert scheduler.register("new") == phases[3]
+
+
+@pytest.mark.asyncio
+async def test_startup_delays_are_spaced(hass: HomeAssistant) -> None:
+    scheduler = PollScheduler(hass)
+    with patch.object(hass.loop, "time", return_value=100.0):
+        delays = [scheduler.startup_delay() for _ in range(3)]
+    assert delays == [0.0, FIRST_REFRESH_SPACING, 2 * FIRST_REFRESH_SPACING]
+    with patch.object(hass.loop, "time", return_value=200.0):
+        assert scheduler.startup_delay() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_coordinators_with_equal_intervals_refresh_out_of_phase(hass: HomeAssistant) -> None:
+    """Entries set up together are scheduled at different points of their interval."""
+    entries = []
+    for idx in range(3):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={"api_key": "k", "stop_id": f"74000000{idx}", "name": f"S{idx}", "sensor_type": "departure"},
+            options={"refresh_interval": 300},
+            unique_id=f"phase-{idx}",
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ):
+        assert await hass.config_entries.async_setup(entries[0].entry_id)
+        await hass.async_block_till_done()
+        # Run the delayed first refreshes of the other two entries
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3 * FIRST_REFRESH_SPACING))
+        await hass.async_block_till_done()
+
+        coordinators = [hass.data[DOMAIN][e.entry_id] for e in entries]
+
+    scheduled: list[float] = []
+    real_call_at = hass.loop.call_at
+
+    def _record_call_at(when, callback, *args, **kwargs):
+        scheduled.append(when)
+        return real_call_at(when, callback, *args, **kwargs)
+
+    # Well after the first refreshes
+    now = hass.loop.time() + 1000.0
+    with patch.object(hass.loop, "time", return_value=now), patch.object(
+        hass.loop, "call_at", side_effect=_record_call_at
+    ):
+        for coordinator in coordinators:
+            coordinator._schedule_refresh()
+    assert len(scheduled) == 3
+    # The previous refreshes are long past, so the next grid point is due
+    assert all(now <= when < now + 300.0 for when in scheduled)
+    assert len({round(when) for when in scheduled}) == 3
+    # Stale retries are not moved onto the grid
+    coordinators[0].serving_stale = True
+    coordinators[0]._last_refresh_at = now - 10.0
+    with patch.object(hass.loop, "time", return_value=now), patch.object(
+        hass.loop, "call_at", side_effect=_record_call_at
+    ):
+        coordinators[0]._schedule_refresh()
+    assert scheduled[-1] == now + 290.0
+    coordinators[0].serving_stale = False
+    assert all(c._poll_scheduler is async_get_poll_scheduler(hass) for c in coordinators)
+    assert all(c.data is not None for c in coordinators)
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
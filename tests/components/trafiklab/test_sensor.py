@@ -14,7 +14,11 @@ from custom_components.trafiklab.const import DOMAIN
 
 
 @pytest.mark.asyncio
-async def test_sensor_setup_and_state_departure(hass: HomeAssistant, mock_departures_response) -> None:
+async def test_sensor_setup_and_state_departure(
+    hass: HomeAssistant, mock_departures_response, freezer
+) -> None:
+    # The fixture's departure is at 12:06; departed entries are not shown
+    freezer.move_to("2025-01-01 12:00:00+00:00")
     entry = MockConfigEntry(
         domain=DOMAIN,
         data={"api_key": "key", "stop_id": "740098000", "name": "Test Stop", "sensor_type": "departure"},
@@ -673,3 +677,247 @@ async def test_sensor_no_error_attributes_when_healthy(hass: HomeAssistant) -> N
     assert "api_error_code" not in attrs
     assert "api_error_message" not in attrs
 
+
+
+@pytest.mark.asyncio
+async def test_departure_countdown_ticks_every_minute_without_refresh(hass: HomeAssistant, freezer) -> None:
+    from datetime import timedelta
+    from homeassistant.util import dt as dt_util
+    from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+    freezer.move_to("2025-01-01 12:00:00+00:00")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "Tick", "sensor_type": "departure"},
+        options={"refresh_interval": 1800},
+        unique_id="tick",
+    )
+    entry.add_to_hass(hass)
+    response = {
+        "departures": [
+            {"scheduled": "2025-01-01T12:10:00+00:00", "route": {"designation": "52", "direction": "A"}}
+        ]
+    }
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures", return_value=response
+    ) as mocked:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.tick_upcoming_departures").state == "10"
+        calls = mocked.call_count
+
+        for expected in ("9", "8"):
+            freezer.tick(timedelta(minutes=1))
+            async_fire_time_changed(hass, dt_util.utcnow())
+            await hass.async_block_till_done()
+            assert hass.states.get("sensor.tick_upcoming_departures").state == expected
+
+        # Same minute again: nothing to write
+        written = hass.states.get("sensor.tick_upcoming_departures").last_updated
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.tick_upcoming_departures").last_updated == written
+        assert mocked.call_count == calls
+
+
+@pytest.mark.asyncio
+async def test_countdown_drops_departed_entries_between_refreshes(hass: HomeAssistant, freezer) -> None:
+    from datetime import timedelta
+    from homeassistant.util import dt as dt_util
+    from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+    freezer.move_to("2025-01-01 12:00:00+00:00")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "Gone", "sensor_type": "departure"},
+        options={"refresh_interval": 1800},
+        unique_id="gone",
+    )
+    entry.add_to_hass(hass)
+    response = {
+        "departures": [
+            {"scheduled": "2025-01-01T12:02:00+00:00", "route": {"designation": "52", "direction": "A"}},
+            {"scheduled": "2025-01-01T12:10:00+00:00", "route": {"designation": "53", "direction": "A"}},
+        ]
+    }
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures", return_value=response
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert hass.states.get("sensor.gone_upcoming_departures").state == "2"
+
+        freezer.tick(timedelta(minutes=3))
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.gone_upcoming_departures")
+    assert state.state == "7"
+    assert state.attributes["line"] == "53"
+    assert [item["line"] for item in state.attributes["upcoming"]] == ["53"]
+
+
+@pytest.mark.asyncio
+async def test_resrobot_trips_normalized_once_per_update(hass: HomeAssistant, mock_resrobot_response) -> None:
+    from custom_components.trafiklab.sensor import TrafikLabSensor
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "key",
+            "name": "Travel",
+            "sensor_type": "resrobot_travel_search",
+            "origin_type": "stop_id",
+            "origin": "740000001",
+            "destination_type": "stop_id",
+            "destination": "740000002",
+        },
+        options={"time_window": 120, "refresh_interval": 300},
+        unique_id="memo",
+    )
+    entry.add_to_hass(hass)
+    normalize = TrafikLabSensor._normalize_resrobot_trips
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_resrobot_travel_search",
+        return_value=mock_resrobot_response,
+    ), patch.object(
+        TrafikLabSensor, "_normalize_resrobot_trips", side_effect=normalize
+    ) as mocked:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        # State and attributes of the write share one normalization
+        assert mocked.call_count == 1
+        assert hass.states.get("sensor.travel_travel_search").attributes["num_trips"] == 1
+
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        changed = {"Trip": mock_resrobot_response["Trip"] * 2}
+        coordinator.async_set_updated_data(changed)
+        await hass.async_block_till_done()
+        assert mocked.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_attribute_caps_and_compact_mode(
+    hass: HomeAssistant, mock_resrobot_response, freezer
+) -> None:
+    from datetime import timedelta
+    from homeassistant.util import dt as dt_util
+    from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+    departures = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "Caps", "sensor_type": "departure"},
+        options={"time_window": 120, "max_upcoming": 2, "compact_attributes": True},
+        unique_id="caps",
+    )
+    travel = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "api_key": "key",
+            "name": "Short",
+            "sensor_type": "resrobot_travel_search",
+            "origin_type": "stop_id",
+            "origin": "740000001",
+            "destination_type": "stop_id",
+            "destination": "740000002",
+        },
+        options={"time_window": 120, "max_trips": 1, "max_legs": 1, "compact_attributes": True},
+        unique_id="short",
+    )
+    departures.add_to_hass(hass)
+    travel.add_to_hass(hass)
+    items = [_make_departure_item(str(line), "BUS") for line in range(5)]
+    leg = mock_resrobot_response["Trip"][0]["LegList"]["Leg"][0]
+    two_leg_trip = {"LegList": {"Leg": [{**leg, "idx": 0}, {**leg, "idx": 1}]}}
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": items},
+    ), patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_resrobot_travel_search",
+        return_value={"Trip": [two_leg_trip, two_leg_trip]},
+    ):
+        # Sets up both entries of the domain; their first refreshes are spaced
+        assert await hass.config_entries.async_setup(departures.entry_id)
+        freezer.tick(timedelta(seconds=5))
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.caps_upcoming_departures")
+    upcoming = state.attributes["upcoming"]
+    assert len(upcoming) == 2
+    assert set(upcoming[0]) == {
+        "line", "destination", "time_formatted", "minutes_until", "delay_minutes", "canceled", "platform"
+    }
+    # The bulky attributes stay out of the recorder
+    assert {"upcoming", "trips"} <= state.state_info["unrecorded_attributes"]
+
+    attrs = hass.states.get("sensor.short_travel_search").attributes
+    assert attrs["num_trips"] == 1
+    leg = attrs["trips"][0]["legs"][0]
+    assert len(attrs["trips"][0]["legs"]) == 1
+    assert "product" not in leg and leg["origin_name"]
+
+
+@pytest.mark.asyncio
+async def test_state_written_only_on_material_change(hass: HomeAssistant, freezer) -> None:
+    from datetime import timedelta
+    from custom_components.trafiklab.models import KIND_DEPARTURES, TimetableBoard
+
+    freezer.move_to("2025-01-01 12:00:00+00:00")
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "Material", "sensor_type": "departure"},
+        options={"refresh_interval": 1800, "material_attributes": "line, destination"},
+        unique_id="material",
+    )
+    entry.add_to_hass(hass)
+
+    def board(line: str, platform: str) -> TimetableBoard:
+        item = {
+            "scheduled": "2025-01-01T12:10:00+00:00",
+            "route": {"designation": line, "direction": "A"},
+            "realtime_platform": {"designation": platform},
+        }
+        return TimetableBoard.from_api({"departures": [item]}, KIND_DEPARTURES)
+
+    with patch(
+        "custom_components.trafiklab.api.TrafikLabApiClient.get_departures",
+        return_value={"departures": []},
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    def push(data: TimetableBoard) -> None:
+        freezer.tick(timedelta(seconds=10))
+        coordinator.last_successful_update = "2025-01-01T12:00:10+00:00"
+        coordinator.async_set_updated_data(data)
+
+    push(board("52", "A"))
+    await hass.async_block_till_done()
+    written = hass.states.get("sensor.material_upcoming_departures")
+    assert written.attributes["line"] == "52"
+
+    # Only a non-material attribute and last_update differ: nothing is written
+    push(board("52", "B"))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.material_upcoming_departures").last_updated == written.last_updated
+
+    # Attributes built for the digest are reused by the write
+    from custom_components.trafiklab.sensor import TrafikLabSensor
+
+    build = TrafikLabSensor._build_attributes
+    with patch.object(
+        TrafikLabSensor, "_build_attributes", autospec=True, side_effect=build
+    ) as built:
+        push(board("53", "B"))
+        await hass.async_block_till_done()
+    assert built.call_count == 1
+    state = hass.states.get("sensor.material_upcoming_departures")
+    assert state.last_updated > written.last_updated
+    assert state.attributes["line"] == "53"
+    assert state.attributes["platform"] == "B"
@@ -0,0 +1,214 @@
+from __future__ import annotations
+# pyright: reportMissingImports=false, reportGeneralTypeIssues=false
+from datetime import datetime, timedelta
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.trafiklab.const import DOMAIN
+from custom_components.trafiklab.models import TimetableBoard, TimetableEntry
+from custom_components.trafiklab.sensor import normalize_resrobot_trips
+from custom_components.trafiklab.snapshot import (
+    SAVE_DELAY,
+    STORAGE_KEY,
+    decode_snapshot,
+    encode_snapshot,
+)
+
+pytestmark = pytest.mark.usefixtures("enable_custom_integrations")
+
+_PATCH_DEPARTURES = "custom_components.trafiklab.api.TrafikLabApiClient.get_departures"
+
+
+def _entry() -> MockConfigEntry:
+    return MockConfigEntry(
+        domain=DOMAIN,
+        data={"api_key": "key", "stop_id": "740098000", "name": "Stop", "sensor_type": "departure"},
+        options={"refresh_interval": 300},
+        unique_id="snapshot",
+        entry_id="snapshot_entry",
+    )
+
+
+def _board(*minutes_ahead: int) -> TimetableBoard:
+    now = datetime.now()
+    return TimetableBoard(
+        "departures",
+        tuple(
+            TimetableEntry(
+                line="52",
+                destination="Sickla",
+                scheduled=(now + timedelta(minutes=m)).isoformat(timespec="seconds"),
+            )
+            for m in minutes_ahead
+        ),
+    )
+
+
+def _stored(hass_storage: dict[str, Any], board: TimetableBoard, age: timedelta) -> None:
+    updated = (dt_util.utcnow() - age).replace(microsecond=0).isoformat()
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"entries": {"snapshot_entry": encode_snapshot(board, updated)}},
+    }
+
+
+def test_snapshot_round_trip() -> None:
+    board = _board(5, 12)
+    data, updated = decode_snapshot(encode_snapshot(board, "2025-01-01T12:00:00+00:00"))
+    assert data == board
+    assert data.entries[0].timestamp == board.entries[0].timestamp
+    assert updated == "2025-01-01T12:00:00+00:00"
+    raw = {"Trip": [{"LegList": {"Leg": []}}]}
+    assert decode_snapshot(encode_snapshot(raw, None)) == (raw, None)
+    assert encode_snapshot({}, None) is None
+    assert decode_snapshot({"type": "board", "data": {}}) is None
+
+
+def test_resrobot_snapshot_keeps_only_the_fields_the_sensor_reads() -> None:
+    leg = {
+        "idx": 0,
+        "type": "JNY",
+        "category": "BLT",
+        "direction": "Sickla",
+        "number": "4",
+        "duration": "PT12M",
+        "Origin": {"name": "A", "date": "2025-01-01", "time": "12:00:00", "lon": 18.0, "extId": "1"},
+        "Destination": {"name": "B", "date": "2025-01-01", "time": "12:12:00", "Notes": {"Note": []}},
+        "Product": [{"name": "Buss 4", "num": "4", "operator": "SL", "icon": {"res": "bus"}}],
+        "Stops": {"Stop": [{"name": "A"}, {"name": "B"}]},
+        "JourneyDetailRef": {"ref": "1|2|3"},
+    }
+    walk = {
+        "idx": 1,
+        "type": "WALK",
+        "dist": 200,
+        "Origin": {"name": "B", "date": "2025-01-01", "time": "12:12:00"},
+        "Destination": {"name": "C", "date": "2025-01-01", "time": "12:16:00"},
+        "GisRoute": {"durS": "PT4M", "polyline": "x" * 100},
+    }
+    response = {
+        "Trip": [{"LegList": {"Leg": [leg, walk]}, "ctxRecon": "x" * 100, "ServiceDays": []}],
+        "TechnicalMessages": {"TechnicalMessage": []},
+        "serverVersion": "1.0",
+    }
+    data, _ = decode_snapshot(encode_snapshot(response, None))
+    assert list(data) == ["Trip"]
+    stored_leg = data["Trip"][0]["LegList"]["Leg"][0]
+    assert "Stops" not in stored_leg and "lon" not in stored_leg["Origin"]
+    assert stored_leg["Product"] == {"name": "Buss 4", "num": "4"}
+    assert normalize_resrobot_trips(data["Trip"]) == normalize_resrobot_trips(response["Trip"])
+
+
+@pytest.mark.asyncio
+async def test_recent_snapshot_is_shown_without_refreshing(hass: HomeAssistant, hass_storage) -> None:
+    _stored(hass_storage, _board(-3, 8, 20), timedelta(seconds=60))
+    entry = _entry()
+    entry.add_to_hass(hass)
+
+    with patch(_PATCH_DEPARTURES) as mocked:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    assert not mocked.called
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert coordinator.restored_from_snapshot
+    # The departed entry is dropped; the countdown runs from the stored time
+    assert len(coordinator.data.entries) == 2
+    state = hass.states.get("sensor.stop_upcoming_departures")
+    assert state is not None
+    assert int(state.state) in (7, 8)
+
+
+@pytest.mark.asyncio
+async def test_old_snapshot_is_shown_and_refreshed(hass: HomeAssistant, hass_storage) -> None:
+    _stored(hass_storage, _board(30), timedelta(hours=2))
+    entry = _entry()
+    entry.add_to_hass(hass)
+
+    with patch(_PATCH_DEPARTURES, return_value={"departures": []}) as mocked:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    assert mocked.called
+
+
+@pytest.mark.asyncio
+async def test_old_snapshots_of_delayed_entries_are_refreshed(
+    hass: HomeAssistant, hass_storage
+) -> None:
+    updated = (dt_util.utcnow() - timedelta(hours=2)).replace(microsecond=0).isoformat()
+    snapshot = encode_snapshot(_board(30), updated)
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "key": STORAGE_KEY,
+        "data": {"entries": {"first": snapshot, "second": snapshot}},
+    }
+    for entry_id, stop_id in (("first", "740098001"), ("second", "740098002")):
+        MockConfigEntry(
+            domain=DOMAIN,
+            data={"api_key": "key", "stop_id": stop_id, "name": entry_id, "sensor_type": "departure"},
+            options={"refresh_interval": 300},
+            unique_id=entry_id,
+            entry_id=entry_id,
+        ).add_to_hass(hass)
+
+    with patch(_PATCH_DEPARTURES, return_value={"departures": []}) as mocked:
+        # Sets up both entries; the second one's first refresh is delayed
+        assert await hass.config_entries.async_setup("first")
+        await hass.async_block_till_done()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+        await hass.async_block_till_done()
+    assert {c.args[0] for c in mocked.call_args_list} == {"740098001", "740098002"}
+
+
+@pytest.mark.asyncio
+async def test_successful_refresh_is_saved_once_and_removed_with_entry(
+    hass: HomeAssistant, hass_storage
+) -> None:
+    entry = _entry()
+    entry.add_to_hass(hass)
+    when = (datetime.now() + timedelta(minutes=9)).isoformat(timespec="seconds")
+
+    with patch(
+        _PATCH_DEPARTURES,
+        return_value={"departures": [{"scheduled": when, "route": {"designation": "4"}}]},
+    ), patch.object(
+        Store, "async_delay_save", autospec=True, side_effect=Store.async_delay_save
+    ) as delay_save:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        await coordinator.async_refresh()
+    # Two successful updates, one pending write
+    assert [c.args[0].key for c in delay_save.call_args_list].count(STORAGE_KEY) == 1
+
+    with patch(
+        _PATCH_DEPARTURES,
+        return_value={"departures": [{"scheduled": when, "route": {"designation": "4"}}]},
+    ):
+        await coordinator.async_refresh()
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY + 1))
+        await hass.async_block_till_done()
+    stored = hass_storage[STORAGE_KEY]["data"]["entries"]["snapshot_entry"]
+    assert stored["type"] == "board"
+    assert stored["data"]["entries"][0]["line"] == "4"
+
+    # A write still pending when Home Assistant stops is not lost
+    coordinator.async_set_updated_data(_board(3))
+    coordinator._save_snapshot(coordinator.data)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    stored = hass_storage[STORAGE_KEY]["data"]["entries"]["snapshot_entry"]
+    assert stored["data"]["entries"][0]["line"] == "52"
+
+    assert await hass.config_entries.async_remove(entry.entry_id)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2 * SAVE_DELAY + 2))
+    await hass.async_block_till_done()
+    assert hass_storage[STORAGE_KEY]["data"]["entries"] == {}